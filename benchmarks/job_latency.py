@@ -0,0 +1,207 @@
+"""
+IoT Jobs round trips through the real ``MqttManager`` against the local
+jobs simulator.
+
+    uv run -m benchmarks.job_latency [--jobs 50] [--external --port 1883]
+
+For each job the simulator queues an execution and notifies the thing;
+the agent side does what ``JobCoordinator`` does before a mission starts
+(find the next job, read its document, IN_PROGRESS) through ``JobCache``
+and then reports SUCCEEDED. Jobs are picked up either from ``jobs/notify``,
+polling for the next job after each one, or from the ``notify-next``
+stream alone. Reports queued → IN_PROGRESS and → SUCCEEDED latency as seen
+by the service and IoT Jobs requests per job, for jobs fed one at a time
+and in a burst, plus the per-request latency recorded by ``MqttManager``.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from sim.iot_jobs.__main__ import mission_document
+from sim.iot_jobs.broker import Broker
+from sim.iot_jobs.service import IotJobsSimulator
+from src.core.job_cache import JobCache
+from src.core.mqtt_manager import MqttManager
+from src.enums.job_status import JobStatus
+from src.utils.metrics import LatencyHistogram
+
+THING = "fleetcore-drone-0001"
+
+
+class JobRunner:
+    """The job-handling part of ``JobCoordinator``, without a drone."""
+
+    def __init__(self, mqtt: MqttManager, source: str) -> None:
+        self.mqtt = mqtt
+        self.source = source
+        self.jobs = JobCache(mqtt.jobs)
+        self.completed = 0
+        self._notification = None
+        self._wakeup = asyncio.Event()
+        self._done = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.source == "notify":
+            await self.mqtt.subscribe(
+                f"$aws/things/{self.mqtt.thing_name}/jobs/notify",
+                lambda topic, payload: self._on_notification(payload),
+            )
+        else:
+            established = asyncio.Event()
+            self.mqtt.stream_next_job(
+                self._on_notification, lambda live: live and established.set()
+            )
+            await established.wait()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def _on_notification(self, notification):
+        self._notification = notification
+        self._wakeup.set()
+
+    async def wait_for(self, count: int):
+        while self.completed < count:
+            self._done.clear()
+            await self._done.wait()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            notification, self._notification = self._notification, None
+            summary = await self.jobs.next_job(notification)
+            while summary:
+                if await self.jobs.document(summary.job_id) is None:
+                    logger.error(f"Invalid job document for {summary.job_id}")
+                await self.mqtt.update_job_status(summary.job_id, JobStatus.IN_PROGRESS)
+                await self.mqtt.update_job_status(summary.job_id, JobStatus.SUCCEEDED)
+                self.completed += 1
+                self._done.set()
+                # notify-next announces the following job by itself
+                summary = None
+                if self.source == "notify":
+                    summary = await self.jobs.next_job()
+
+
+def latencies(executions, status: str) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for execution in executions:
+        histogram.record(execution.reached[status] - execution.reached["QUEUED"])
+    return histogram
+
+
+def job_requests(mqtt: MqttManager) -> int:
+    metrics = mqtt.request_metrics()
+    return sum(
+        m["count"] + m["failures"] for o, m in metrics.items() if o != "subscribe"
+    )
+
+
+async def feed(
+    simulator: IotJobsSimulator, runner: JobRunner, jobs: int, mode: str
+) -> tuple[list, float]:
+    """Queue ``jobs``, in a burst or each once the previous one succeeded."""
+    runner.completed = 0
+    executions = []
+    start = time.perf_counter()
+    for i in range(jobs):
+        document = mission_document(THING)
+        job_id = f"{runner.source}-{mode}-{i}"
+        executions.append(simulator.add_job(THING, job_id, document))
+        if mode == "sequential":
+            await runner.wait_for(i + 1)
+    await runner.wait_for(jobs)
+    return executions, time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> List[tuple]:
+    broker = None
+    if not args.external:
+        broker = Broker(args.host, 0)
+        await broker.start()
+    port = broker.port if broker else args.port
+
+    simulator = IotJobsSimulator(args.host, port)
+    await simulator.start()
+
+    rows = []
+    for source in ("notify", "notify-next"):
+        mqtt = MqttManager("", "", "", args.host, THING, timeout=10, local_port=port)
+        await mqtt.connect()
+        runner = JobRunner(mqtt, source)
+        await runner.start()
+
+        for mode in ("sequential", "burst"):
+            requests = job_requests(mqtt)
+            executions, elapsed = await feed(simulator, runner, args.jobs, mode)
+            per_job = (job_requests(mqtt) - requests) / args.jobs
+            for status in ("IN_PROGRESS", "SUCCEEDED"):
+                rows.append(
+                    (
+                        f"{source} {mode}",
+                        f"queued → {status}",
+                        latencies(executions, status).snapshot(),
+                        args.jobs / elapsed,
+                        per_job,
+                    )
+                )
+
+        for operation, metrics in sorted(mqtt.request_metrics().items()):
+            rows.append((f"{source} requests", operation, metrics, None, None))
+
+        await runner.stop()
+        await mqtt.disconnect()
+
+    await simulator.stop()
+    if broker:
+        await broker.stop()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--external", action="store_true")
+    args = parser.parse_args()
+
+    logger.remove()
+    rows = asyncio.run(run(args))
+
+    table = Table(title=f"IoT Jobs latency ({args.jobs} jobs)")
+    for column in (
+        "mode",
+        "path",
+        "p50 ms",
+        "p95 ms",
+        "max ms",
+        "jobs/s",
+        "requests/job",
+    ):
+        table.add_column(column, justify="right")
+    for mode, path, snapshot, rate, per_job in rows:
+        table.add_row(
+            mode,
+            path,
+            f"{(snapshot['p50_s'] or 0) * 1000:.1f}",
+            f"{(snapshot['p95_s'] or 0) * 1000:.1f}",
+            f"{(snapshot['max_s'] or 0) * 1000:.1f}",
+            f"{rate:,.1f}" if rate else "",
+            f"{per_job:.1f}" if per_job is not None else "",
+        )
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Drive ``TelemetryCollector`` and ``TelemetryPublisher`` with a synthetic
+drone and an in-memory MQTT sink.
+
+    uv run -m benchmarks.telemetry_pipeline [--duration 5] [--rates 50,200,1000]
+
+Reports the collector's sampling cost and allocations, the publisher's
+serialization time per batch, and an end-to-end load test at fixed
+sample rates.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from src.enums.telemetry_compression import TelemetryCompression
+from src.utils.telemetry.collector import TelemetryCollector
+from src.utils.telemetry.publisher import TelemetryPublisher
+from src.utils.telemetry.ring_buffer import HEALTH_FLAGS
+
+DEVICE_NAME = "fleetcore-drone-0001"
+
+
+class SyntheticDrone:
+    """Stand-in for ``MavsdkController.gather_telemetry``: a random-walk flight."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self._rng = np.random.default_rng(seed)
+        self._walk = iter(())
+        self.lat, self.lon, self.alt = 47.3977, 8.5456, 10.0
+        self.voltage, self.heading = 16.8, 90.0
+        self.health = SimpleNamespace(**{flag: True for flag in HEALTH_FLAGS})
+
+    def _steps(self):
+        # Draw noise in blocks so the stand-in itself stays cheap.
+        while True:
+            yield from self._rng.normal(0, 1, size=(256, 5)).tolist()
+
+    async def gather_telemetry(self):
+        try:
+            d_lat, d_lon, d_alt, d_speed, d_heading = next(self._walk)
+        except StopIteration:
+            self._walk = self._steps()
+            d_lat, d_lon, d_alt, d_speed, d_heading = next(self._walk)
+
+        self.lat += d_lat * 2e-6
+        self.lon += d_lon * 2e-6
+        self.alt = max(0.0, self.alt + d_alt * 0.1)
+        self.voltage -= 5e-5
+        self.heading = (self.heading + d_heading * 0.5) % 360
+
+        return (
+            SimpleNamespace(
+                latitude_deg=self.lat,
+                longitude_deg=self.lon,
+                relative_altitude_m=self.alt,
+            ),
+            SimpleNamespace(
+                voltage_v=self.voltage,
+                remaining_percent=80.0,
+                temperature_degc=31.5,
+            ),
+            self.health,
+            SimpleNamespace(north_m_s=8.0 + d_speed * 0.3, east_m_s=0.5),
+            SimpleNamespace(heading_deg=self.heading),
+            -80,
+            0,
+        )
+
+
+class MemoryMqtt:
+    """In-memory MQTT sink that records what would have been published."""
+
+    def __init__(self) -> None:
+        self.connected = True
+        self.messages = 0
+        self.bytes = 0
+
+    def publish(self, topic: str, message, content_type: Optional[str] = None):
+        self.messages += 1
+        self.bytes += len(message)
+
+
+def _table(title: str, columns: List[str]) -> Table:
+    table = Table(title=title)
+    for column in columns:
+        table.add_column(column, justify="right")
+    return table
+
+
+async def bench_collector(samples: int) -> Table:
+    """Raw sampling cost without pacing."""
+    table = _table(
+        "Collector sampling",
+        ["samples", "samples/s", "µs/sample", "retained B/sample", "peak KiB"],
+    )
+
+    collector = TelemetryCollector(
+        DEVICE_NAME, SyntheticDrone(), interval_hz=1, capacity=samples
+    )
+    for _ in range(samples // 10):  # warm up numpy and the noise generator
+        await collector._sample_telemetry()
+    collector.buffer.read()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(samples):
+        await collector._sample_telemetry()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    collector.buffer.read()
+    start = time.perf_counter()
+    for _ in range(samples):
+        await collector._sample_telemetry()
+    elapsed = time.perf_counter() - start
+
+    table.add_row(
+        str(samples),
+        f"{samples / elapsed:,.0f}",
+        f"{elapsed / samples * 1e6:.1f}",
+        f"{(after - before) / samples:.1f}",
+        f"{(peak - before) / 1024:.1f}",
+    )
+    return table
+
+
+async def bench_serialization(batch_sizes: List[int], samples: int) -> Table:
+    """Publisher encode + publish time per batch."""
+    table = _table(
+        "Publisher serialization",
+        ["batch", "compression", "µs/batch", "B/sample", "alloc KiB/batch"],
+    )
+
+    collector = TelemetryCollector(
+        DEVICE_NAME, SyntheticDrone(), interval_hz=1, capacity=samples
+    )
+    for _ in range(samples):
+        await collector._sample_telemetry()
+    frame = collector.buffer.read()
+
+    for batch_size in batch_sizes:
+        batches = [
+            frame.slice(i, i + batch_size)
+            for i in range(0, len(frame) - batch_size + 1, batch_size)
+        ]
+        for compression in TelemetryCompression:
+            try:
+                mqtt = MemoryMqtt()
+                publisher = TelemetryPublisher(
+                    collector, mqtt, "telemetry", compression=compression
+                )
+            except Exception:
+                continue
+
+            tracemalloc.start()
+            publisher._publish_batch(batches[0])
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            mqtt.bytes = 0
+            start = time.perf_counter()
+            for batch in batches:
+                publisher._publish_batch(batch)
+            elapsed = time.perf_counter() - start
+
+            table.add_row(
+                str(batch_size),
+                compression.value,
+                f"{elapsed / len(batches) * 1e6:.1f}",
+                f"{mqtt.bytes / (len(batches) * batch_size):.1f}",
+                f"{peak / 1024:.1f}",
+            )
+
+    return table
+
+
+async def load_test(rates: List[int], duration: float) -> Table:
+    """Collector and publisher running together at fixed sample rates."""
+    table = _table(
+        f"Load test ({duration:g}s per rate)",
+        [
+            "Hz",
+            "samples/s",
+            "missed",
+            "jitter ms",
+            "max ms",
+            "sent",
+            "dropped",
+            "B/sample",
+        ],
+    )
+
+    for rate in rates:
+        mqtt = MemoryMqtt()
+        collector = TelemetryCollector(
+            DEVICE_NAME, SyntheticDrone(), interval_hz=rate, capacity=4096
+        )
+        publisher = TelemetryPublisher(
+            collector, mqtt, "telemetry", batch_size=max(20, rate), max_latency_s=1.0
+        )
+
+        await publisher.start()
+        await collector.start()
+        await asyncio.sleep(duration)
+        await collector.stop()
+        await asyncio.sleep(collector.interval)
+        await publisher.stop()
+
+        sampled = publisher.samples_sent + len(collector.buffer)
+        table.add_row(
+            str(rate),
+            f"{sampled / duration:,.0f}",
+            str(collector.missed_deadlines),
+            f"{collector.mean_jitter_s * 1e3:.2f}",
+            f"{collector.max_jitter_s * 1e3:.2f}",
+            str(publisher.samples_sent),
+            str(collector.buffer.dropped),
+            f"{mqtt.bytes / max(1, publisher.samples_sent):.1f}",
+        )
+
+    return table
+
+
+async def run(args: argparse.Namespace) -> None:
+    logger.disable("src")
+    console = Console()
+    console.print(await bench_collector(args.samples))
+    console.print(await bench_serialization([10, 20, 100], args.samples))
+    console.print(await load_test(args.rates, args.duration))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--samples", type=int, default=10_000)
+    parser.add_argument(
+        "--rates",
+        type=lambda value: [int(rate) for rate in value.split(",")],
+        default=[10, 50, 200, 1000],
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
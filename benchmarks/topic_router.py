@@ -0,0 +1,111 @@
+"""
+Cost of routing received MQTT messages to subscription handlers.
+
+    uv run -m benchmarks.topic_router [--messages 100000]
+
+Measures ``TopicRouter.match`` with a realistic mix of exact and wildcard
+filters, and end-to-end dispatch from a producer thread (standing in for
+the CRT thread) onto the asyncio loop through ``call_soon_threadsafe``.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from typing import List
+
+from rich.console import Console
+from rich.table import Table
+
+from src.core.topic_router import TopicRouter
+
+THING = "fleetcore-drone-0001"
+
+
+def build_router(filters: int) -> TopicRouter:
+    router = TopicRouter()
+    handler = lambda topic, payload: None  # noqa: E731
+
+    router.add(f"$aws/things/{THING}/jobs/notify", handler)
+    router.add(f"devices/{THING}/stream", handler)
+    router.add(f"devices/{THING}/telemetry/+", handler)
+    router.add("groups/+/cancel", handler)
+    router.add(f"devices/{THING}/commands/#", handler)
+    for i in range(filters):
+        router.add(f"devices/other-{i}/+/status", handler)
+    return router
+
+
+def topics(count: int, distinct: int) -> List[str]:
+    pool = [
+        f"devices/{THING}/commands/c{i}/set" if i % 3 else f"groups/g{i}/cancel"
+        for i in range(distinct)
+    ]
+    return [pool[i % distinct] for i in range(count)]
+
+
+def bench_match(router: TopicRouter, messages: List[str], cached: bool) -> float:
+    start = time.perf_counter()
+    for topic in messages:
+        if not cached:
+            router._cache.clear()
+        router.match(topic)
+    return len(messages) / (time.perf_counter() - start)
+
+
+async def bench_dispatch(router: TopicRouter, messages: List[str]) -> float:
+    loop = asyncio.get_running_loop()
+    done = asyncio.Event()
+    received = 0
+
+    def handler(topic, payload):
+        nonlocal received
+        received += 1
+        if received == len(messages):
+            done.set()
+
+    router.add("bench/+/#", handler)
+    bench_topics = [f"bench/{topic}" for topic in messages]
+
+    def produce():
+        for topic in bench_topics:
+            for matched in router.match(topic):
+                loop.call_soon_threadsafe(matched, topic, b"")
+
+    start = time.perf_counter()
+    threading.Thread(target=produce).start()
+    await done.wait()
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    table = Table(title="Topic routing")
+    for column in ("filters", "distinct topics", "path", "messages/s", "µs/message"):
+        table.add_column(column, justify="right")
+
+    for filters in (10, 1000):
+        router = build_router(filters)
+        for distinct in (16, 4096):
+            messages = topics(args.messages, distinct)
+            for name, rate in (
+                ("match (cached)", bench_match(router, messages, cached=True)),
+                ("match (uncached)", bench_match(router, messages, cached=False)),
+                ("thread → loop", asyncio.run(bench_dispatch(router, messages))),
+            ):
+                table.add_row(
+                    str(filters),
+                    str(distinct),
+                    name,
+                    f"{rate:,.0f}",
+                    f"{1e6 / rate:.2f}",
+                )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
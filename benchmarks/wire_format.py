@@ -0,0 +1,140 @@
+"""
+Compare the compact telemetry batch format against the previous
+CBOR + base64 encoding of ``TelemetryData`` dicts.
+
+    uv run -m benchmarks.wire_format
+"""
+
+import base64
+import time
+from typing import Callable
+
+import cbor2
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.enums.telemetry_compression import TelemetryCompression
+from src.utils.telemetry.ring_buffer import TelemetryFrame, TelemetryRingBuffer
+from src.utils.telemetry.wire_format import (
+    compress_batch,
+    compression_available,
+    decode_batch,
+    encode_batch,
+)
+
+DEVICE_NAME = "fleetcore-drone-0001"
+
+
+def synthetic_frame(count: int, seed: int = 0) -> TelemetryFrame:
+    """Random-walk flight at 10 Hz."""
+    rng = np.random.default_rng(seed)
+    buffer = TelemetryRingBuffer(capacity=count)
+    lat, lon, alt, voltage, heading = 47.3977, 8.5456, 10.0, 16.8, 90.0
+
+    for i in range(count):
+        lat += rng.normal(0, 2e-6)
+        lon += rng.normal(0, 2e-6)
+        alt = max(0.0, alt + rng.normal(0, 0.1))
+        voltage -= abs(rng.normal(0, 0.0005))
+        heading = (heading + rng.normal(0, 0.5)) % 360
+        buffer.append(
+            timestamp=1_760_000_000.0 + i * 0.1 + rng.normal(0, 0.002),
+            latitude_deg=lat,
+            longitude_deg=lon,
+            relative_altitude_m=alt,
+            voltage_v=voltage,
+            remaining_percent=80.0 - i * 0.01,
+            temperature_degc=31.5,
+            ground_speed_ms=abs(rng.normal(8.0, 0.3)),
+            heading_deg=heading,
+            health=0b111111,
+        )
+
+    return buffer.read()
+
+
+def encode_legacy(frame: TelemetryFrame) -> bytes:
+    records = frame.to_records(DEVICE_NAME)
+    return base64.b64encode(cbor2.dumps(records))
+
+
+def decode_legacy(payload: bytes) -> list:
+    return cbor2.loads(base64.b64decode(payload))
+
+
+def per_call_us(fn: Callable[[], object], min_time: float = 0.2) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls * 1e6
+
+
+def main() -> None:
+    table = Table(title="Telemetry batch encoding")
+    for column in (
+        "samples",
+        "format",
+        "bytes",
+        "bytes/sample",
+        "encode µs",
+        "decode µs",
+        "samples/s (encode)",
+    ):
+        table.add_column(column, justify="right")
+
+    for count in (10, 20, 100, 1000):
+        frame = synthetic_frame(count)
+        legacy = encode_legacy(frame)
+        compact = encode_batch(frame, DEVICE_NAME)
+
+        cases = [
+            (
+                "cbor+base64",
+                legacy,
+                lambda: encode_legacy(frame),
+                lambda: decode_legacy(legacy),
+            ),
+            (
+                "compact v1",
+                compact,
+                lambda: encode_batch(frame, DEVICE_NAME),
+                lambda: decode_batch(compact),
+            ),
+        ]
+        for codec in (TelemetryCompression.ZLIB, TelemetryCompression.ZSTD):
+            if not compression_available(codec):
+                continue
+            compressed = compress_batch(compact, codec)
+            cases.append(
+                (
+                    f"compact v1 + {codec.value}",
+                    compressed,
+                    lambda codec=codec: encode_batch(
+                        frame, DEVICE_NAME, compression=codec
+                    ),
+                    lambda compressed=compressed: decode_batch(compressed),
+                )
+            )
+
+        for name, payload, encode, decode in cases:
+            encode_us = per_call_us(encode)
+            table.add_row(
+                str(count),
+                name,
+                str(len(payload)),
+                f"{len(payload) / count:.1f}",
+                f"{encode_us:.1f}",
+                f"{per_call_us(decode):.1f}",
+                f"{count / encode_us * 1e6:,.0f}",
+            )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Serve the IoT Jobs MQTT API locally.
+
+    uv run -m sim.iot_jobs [--port 1883] [--external] [--thing NAME --job-every 30]
+
+Starts the embedded broker, or with ``--external`` uses one already
+listening on ``--host:--port`` (e.g. mosquitto), and the jobs simulator.
+Point the agent at it with ``IOT_ENDPOINT=127.0.0.1`` and
+``MQTT_LOCAL_PORT=1883``.
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from loguru import logger
+
+from sim.iot_jobs.broker import Broker
+from sim.iot_jobs.service import IotJobsSimulator
+
+
+def mission_document(thing_name: str) -> dict:
+    return {
+        "operation": "mission",
+        "data": {
+            "mission_uuid": str(uuid.uuid4()),
+            "download_url": "http://127.0.0.1:8000/mission.zip",
+            "download_path": "./missions",
+            "metadata": {"outpost": "local", "group": thing_name, "bucket": "local"},
+        },
+    }
+
+
+async def serve(args: argparse.Namespace) -> None:
+    broker = None
+    if not args.external:
+        broker = Broker(args.host, args.port)
+        await broker.start()
+
+    simulator = IotJobsSimulator(args.host, broker.port if broker else args.port)
+    await simulator.start()
+
+    try:
+        while True:
+            if args.thing and args.job_every:
+                job_id = f"job-{uuid.uuid4().hex[:8]}"
+                simulator.add_job(args.thing, job_id, mission_document(args.thing))
+                logger.info(f"Queued {job_id} for {args.thing}")
+            await asyncio.sleep(args.job_every or 3600)
+    finally:
+        await simulator.stop()
+        if broker:
+            await broker.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--external", action="store_true")
+    parser.add_argument("--thing")
+    parser.add_argument("--job-every", type=float, default=0)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+A minimal MQTT 5 broker for local testing.
+
+Supports what the agent and the IoT Jobs simulator use: CONNECT, SUBSCRIBE
+and UNSUBSCRIBE with ``+``/``#`` wildcards, PUBLISH at QoS 0 and 1, and
+PINGREQ. There is no TLS, authentication, retained messages, QoS 2 or
+session persistence; point the simulator at mosquitto when those matter.
+"""
+
+import asyncio
+from typing import Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from src.core.topic_router import TopicRouter
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, value = value & 0x7F, value >> 7
+        out.append(byte | (0x80 if value else 0))
+        if not value:
+            return bytes(out)
+
+
+def decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_string(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return len(raw).to_bytes(2, "big") + raw
+
+
+def decode_string(data: bytes, offset: int) -> Tuple[str, int]:
+    length = int.from_bytes(data[offset : offset + 2], "big")
+    offset += 2
+    return data[offset : offset + length].decode("utf-8"), offset + length
+
+
+def packet(packet_type: int, body: bytes, flags: int = 0) -> bytes:
+    return bytes([packet_type << 4 | flags]) + encode_varint(len(body)) + body
+
+
+class _Session:
+    def __init__(
+        self,
+        broker: "Broker",
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.broker = broker
+        self.reader = reader
+        self.writer = writer
+        self.client_id = ""
+        self.subscriptions: Dict[str, int] = {}
+        self._packet_id = 0
+
+    def deliver(self, topic: str, qos: int, properties: bytes, payload: bytes):
+        qos = min(qos, max(self.subscriptions.values(), default=0), 1)
+        header = encode_string(topic)
+        if qos:
+            self._packet_id = self._packet_id % 0xFFFF + 1
+            header += self._packet_id.to_bytes(2, "big")
+        self.writer.write(
+            packet(PUBLISH, header + properties + payload, flags=qos << 1)
+        )
+
+    async def run(self):
+        try:
+            while True:
+                first = await self.reader.readexactly(1)
+                length = shift = 0
+                while True:
+                    (byte,) = await self.reader.readexactly(1)
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                body = await self.reader.readexactly(length)
+                if not self._handle(first[0] >> 4, first[0] & 0x0F, body):
+                    break
+                await self.writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.broker._drop(self)
+            self.writer.close()
+
+    def _handle(self, packet_type: int, flags: int, body: bytes) -> bool:
+        if packet_type == CONNECT:
+            self._on_connect(body)
+        elif packet_type == PUBLISH:
+            self._on_publish(flags, body)
+        elif packet_type == SUBSCRIBE:
+            self._on_subscribe(body)
+        elif packet_type == UNSUBSCRIBE:
+            self._on_unsubscribe(body)
+        elif packet_type == PINGREQ:
+            self.writer.write(packet(PINGRESP, b""))
+        elif packet_type == DISCONNECT:
+            return False
+        return True
+
+    def _on_connect(self, body: bytes):
+        _, offset = decode_string(body, 0)  # protocol name
+        offset += 4  # version, flags, keep alive
+        properties, offset = decode_varint(body, offset)
+        self.client_id, _ = decode_string(body, offset + properties)
+        self.broker._register(self)
+        logger.debug(f"Broker: {self.client_id} connected")
+        self.writer.write(packet(CONNACK, b"\x00\x00\x00"))
+
+    def _on_publish(self, flags: int, body: bytes):
+        qos = flags >> 1 & 0x03
+        topic, offset = decode_string(body, 0)
+        if qos:
+            packet_id = body[offset : offset + 2]
+            offset += 2
+            self.writer.write(packet(PUBACK, packet_id))
+        length, start = decode_varint(body, offset)
+        properties = body[offset : start + length]
+        self.broker.route(topic, qos, properties, body[start + length :])
+
+    def _on_subscribe(self, body: bytes):
+        packet_id = body[:2]
+        length, offset = decode_varint(body, 2)
+        offset += length
+        granted = bytearray()
+        while offset < len(body):
+            topic_filter, offset = decode_string(body, offset)
+            qos = min(body[offset] & 0x03, 1)
+            offset += 1
+            self.subscriptions[topic_filter] = qos
+            self.broker.router.add(topic_filter, self.deliver)
+            granted.append(qos)
+        self.writer.write(packet(SUBACK, packet_id + b"\x00" + bytes(granted)))
+
+    def _on_unsubscribe(self, body: bytes):
+        packet_id = body[:2]
+        length, offset = decode_varint(body, 2)
+        offset += length
+        reasons = bytearray()
+        while offset < len(body):
+            topic_filter, offset = decode_string(body, offset)
+            self.subscriptions.pop(topic_filter, None)
+            self.broker.router.remove(topic_filter, self.deliver)
+            reasons.append(0)
+        self.writer.write(packet(UNSUBACK, packet_id + b"\x00" + bytes(reasons)))
+
+
+class Broker:
+    def __init__(self, host: str = "127.0.0.1", port: int = 1883) -> None:
+        self.host = host
+        self.port = port
+        self.router = TopicRouter()
+        self.sessions: Dict[str, _Session] = {}
+        self._connections: Set[asyncio.Task] = set()
+        self.routed = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._accept, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"MQTT broker listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            for connection in self._connections:
+                connection.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def route(self, topic: str, qos: int, properties: bytes, payload: bytes):
+        self.routed += 1
+        for deliver in self.router.match(topic):
+            deliver(topic, qos, properties, payload)
+
+    async def _accept(self, reader, writer):
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        try:
+            await _Session(self, reader, writer).run()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(connection)
+
+    def _register(self, session: _Session):
+        previous = self.sessions.get(session.client_id)
+        if previous:
+            previous.writer.close()
+        self.sessions[session.client_id] = session
+
+    def _drop(self, session: _Session):
+        for topic_filter in session.subscriptions:
+            self.router.remove(topic_filter, session.deliver)
+        if self.sessions.get(session.client_id) is session:
+            del self.sessions[session.client_id]
@@ -0,0 +1,287 @@
+"""
+The device side of the AWS IoT Jobs MQTT API, served from a local broker.
+
+Implements GetPendingJobExecutions, DescribeJobExecution (including
+``$next``), StartNextPendingJobExecution and UpdateJobExecution on the
+``$aws/things/<thing>/jobs/...`` request topics, answering on the
+``/accepted`` and ``/rejected`` topics with the request's ``clientToken``,
+and publishes ``jobs/notify`` and ``jobs/notify-next`` when a thing's
+pending executions change.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from awscrt import mqtt5
+from loguru import logger
+
+PENDING = ("QUEUED", "IN_PROGRESS")
+TERMINAL = ("SUCCEEDED", "FAILED", "REJECTED", "CANCELED", "REMOVED", "TIMED_OUT")
+
+
+@dataclass
+class JobExecution:
+    job_id: str
+    thing_name: str
+    document: dict
+    execution_number: int = 1
+    version_number: int = 1
+    status: str = "QUEUED"
+    status_details: Dict[str, str] = field(default_factory=dict)
+    queued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    last_updated_at: float = field(default_factory=time.time)
+    # Monotonic time each status was first reached, for latency measurements.
+    reached: Dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        summary = {
+            "jobId": self.job_id,
+            "executionNumber": self.execution_number,
+            "versionNumber": self.version_number,
+            "queuedAt": int(self.queued_at),
+            "lastUpdatedAt": int(self.last_updated_at),
+        }
+        if self.started_at:
+            summary["startedAt"] = int(self.started_at)
+        return summary
+
+    def data(self, include_document: bool = True) -> dict:
+        data = {
+            **self.summary(),
+            "thingName": self.thing_name,
+            "status": self.status,
+            "statusDetails": self.status_details,
+        }
+        if include_document:
+            data["jobDocument"] = self.document
+        return data
+
+    def state(self) -> dict:
+        return {
+            "status": self.status,
+            "statusDetails": self.status_details,
+            "versionNumber": self.version_number,
+        }
+
+
+class IotJobsSimulator:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 1883,
+        client_id: str = "iot-jobs-simulator",
+        timeout: float = 10.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.executions: Dict[str, Dict[str, JobExecution]] = {}
+        self.requests = 0
+        self.rejections = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connected: Optional[asyncio.Future] = None
+        self.client = mqtt5.Client(
+            mqtt5.ClientOptions(
+                host_name=host,
+                port=port,
+                connect_options=mqtt5.ConnectPacket(client_id=client_id),
+                on_publish_callback_fn=self._on_publish_received,
+                on_lifecycle_event_connection_success_fn=self._on_connection_success,
+            )
+        )
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._connected = self._loop.create_future()
+        self.client.start()
+        await asyncio.wait_for(self._connected, self.timeout)
+
+        subscribe = self.client.subscribe(
+            mqtt5.SubscribePacket(
+                subscriptions=[
+                    mqtt5.Subscription(
+                        topic_filter="$aws/things/+/jobs/#",
+                        qos=mqtt5.QoS.AT_LEAST_ONCE,
+                    )
+                ]
+            )
+        )
+        await asyncio.wait_for(asyncio.wrap_future(subscribe), self.timeout)
+        logger.info(f"IoT Jobs simulator serving on {self.host}:{self.port}")
+
+    async def stop(self):
+        self.client.stop()
+
+    def add_job(self, thing_name: str, job_id: str, document: dict) -> JobExecution:
+        """Queue a job execution for ``thing_name`` and notify the thing."""
+        execution = JobExecution(job_id, thing_name, document)
+        execution.reached["QUEUED"] = time.monotonic()
+        self.executions.setdefault(thing_name, {})[job_id] = execution
+        self._notify(thing_name)
+        return execution
+
+    def pending(self, thing_name: str) -> List[JobExecution]:
+        executions = self.executions.get(thing_name, {}).values()
+        return sorted(
+            (e for e in executions if e.status in PENDING),
+            key=lambda e: (e.status != "IN_PROGRESS", e.queued_at),
+        )
+
+    def _on_connection_success(self, event_data):
+        self._loop.call_soon_threadsafe(_resolve, self._connected)
+
+    def _on_publish_received(self, publish_packet_data):
+        packet = publish_packet_data.publish_packet
+        self._loop.call_soon_threadsafe(self._handle, packet.topic, packet.payload)
+
+    def _handle(self, topic: str, payload: bytes):
+        # $aws/things/<thing>/jobs/<operation...>
+        levels = topic.split("/")
+        if len(levels) < 5 or levels[-1] in ("accepted", "rejected", "notify"):
+            return
+        thing_name, operation = levels[2], levels[4:]
+        try:
+            request = json.loads(payload) if payload else {}
+        except ValueError:
+            request = {}
+
+        if operation == ["get"]:
+            response = self._get_pending(thing_name)
+        elif operation == ["start-next"]:
+            response = self._start_next(thing_name, request)
+        elif len(operation) == 2 and operation[1] == "get":
+            response = self._describe(thing_name, operation[0], request)
+        elif len(operation) == 2 and operation[1] == "update":
+            response = self._update(thing_name, operation[0], request)
+        else:
+            return
+
+        self.requests += 1
+        accepted = "code" not in response
+        if not accepted:
+            self.rejections += 1
+        response["timestamp"] = int(time.time())
+        if "clientToken" in request:
+            response["clientToken"] = request["clientToken"]
+        self._publish(f"{topic}/{'accepted' if accepted else 'rejected'}", response)
+
+    def _get_pending(self, thing_name: str) -> dict:
+        pending = self.pending(thing_name)
+        return {
+            "inProgressJobs": [e.summary() for e in pending if e.status != "QUEUED"],
+            "queuedJobs": [e.summary() for e in pending if e.status == "QUEUED"],
+        }
+
+    def _describe(self, thing_name: str, job_id: str, request: dict) -> dict:
+        execution = self._find(thing_name, job_id)
+        if execution is None:
+            return _error("ResourceNotFound", f"No job execution {job_id}")
+        return {"execution": execution.data(request.get("includeJobDocument", True))}
+
+    def _start_next(self, thing_name: str, request: dict) -> dict:
+        pending = self.pending(thing_name)
+        if not pending:
+            return {}
+        execution = pending[0]
+        if execution.status == "QUEUED":
+            self._transition(execution, "IN_PROGRESS", request.get("statusDetails"))
+        return {"execution": execution.data()}
+
+    def _update(self, thing_name: str, job_id: str, request: dict) -> dict:
+        execution = self._find(thing_name, job_id)
+        if execution is None:
+            return _error("ResourceNotFound", f"No job execution {job_id}")
+
+        expected = request.get("expectedVersion")
+        if expected is not None and expected != execution.version_number:
+            return {
+                **_error("VersionMismatch", "Expected version does not match"),
+                "executionState": execution.state(),
+            }
+
+        status = request.get("status")
+        if execution.status in TERMINAL or status not in PENDING + TERMINAL[:3]:
+            return {
+                **_error(
+                    "InvalidStateTransition",
+                    f"Cannot update {execution.status} execution to {status}",
+                ),
+                "executionState": execution.state(),
+            }
+
+        self._transition(execution, status, request.get("statusDetails"))
+        response = {}
+        if request.get("includeJobExecutionState"):
+            response["executionState"] = execution.state()
+        if request.get("includeJobDocument"):
+            response["jobDocument"] = execution.document
+        return response
+
+    def _find(self, thing_name: str, job_id: str) -> Optional[JobExecution]:
+        if job_id == "$next":
+            pending = self.pending(thing_name)
+            return pending[0] if pending else None
+        return self.executions.get(thing_name, {}).get(job_id)
+
+    def _transition(
+        self,
+        execution: JobExecution,
+        status: str,
+        status_details: Optional[Dict[str, str]],
+    ):
+        now = time.time()
+        previous_next = self.pending(execution.thing_name)[:1]
+
+        execution.status = status
+        execution.version_number += 1
+        execution.last_updated_at = now
+        if status_details is not None:
+            execution.status_details = status_details
+        if status == "IN_PROGRESS" and execution.started_at is None:
+            execution.started_at = now
+        execution.reached.setdefault(status, time.monotonic())
+
+        if status in TERMINAL:
+            self._notify(execution.thing_name)
+        elif previous_next != self.pending(execution.thing_name)[:1]:
+            self._notify_next(execution.thing_name)
+
+    def _notify(self, thing_name: str):
+        jobs: Dict[str, List[dict]] = {}
+        for execution in self.pending(thing_name):
+            jobs.setdefault(execution.status, []).append(execution.summary())
+        self._publish(
+            f"$aws/things/{thing_name}/jobs/notify",
+            {"jobs": jobs, "timestamp": int(time.time())},
+        )
+        self._notify_next(thing_name)
+
+    def _notify_next(self, thing_name: str):
+        pending = self.pending(thing_name)
+        message = {"timestamp": int(time.time())}
+        if pending:
+            message["execution"] = pending[0].data()
+        self._publish(f"$aws/things/{thing_name}/jobs/notify-next", message)
+
+    def _publish(self, topic: str, message: dict):
+        self.client.publish(
+            mqtt5.PublishPacket(
+                topic=topic,
+                payload=json.dumps(message).encode("utf-8"),
+                qos=mqtt5.QoS.AT_LEAST_ONCE,
+            )
+        )
+
+
+def _error(code: str, message: str) -> dict:
+    return {"code": code, "message": message}
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(True)
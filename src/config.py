@@ -1,13 +1,25 @@
+import copy
 import os.path
+from dataclasses import dataclass
 from os import _Environ
-from typing import Optional
+from typing import List, Optional
 
 from dotenv import dotenv_values
 
 from src.enums.connection_types import ConnectionTypes
+from src.enums.publish_priority import PublishPriority
+from src.enums.telemetry_compression import TelemetryCompression
 from src.exceptions.config_exceptions import ConfigValueException, ConfigTypeException
 
 
+@dataclass(frozen=True)
+class VehicleConfig:
+    thing_name: str
+    drone_address: str
+    drone_port: int
+    stream_port: int
+
+
 class Config:
     def __init__(self, config_file: Optional[str] = None):
         if config_file:
@@ -35,11 +47,131 @@ class Config:
         self.telemetry_sample_count: int = self._require_int(
             raw, "TELEMETRY_SAMPLE_COUNT"
         )
-        self.internal_topic = f"$aws/things/{self.thing_name}/jobs/notify"
-        self.cancel_topic = f"groups/{self.thing_name}/cancel"
-        self.telemetry_topic = f"devices/{self.thing_name}/telemetry"
-        self.streaming_topic = f"devices/{self.thing_name}/stream"
-        self.alert_topic = f"devices/{self.thing_name}/detection"
+        self.telemetry_high_rate_hz: int = self._optional_int(
+            raw, "TELEMETRY_HIGH_RATE_HZ", self.telemetry_sample_interval * 2
+        )
+        self.telemetry_idle_rate_hz: int = self._optional_int(
+            raw, "TELEMETRY_IDLE_RATE_HZ", 1
+        )
+        slow_field_interval: int = self._optional_int(
+            raw, "TELEMETRY_SLOW_FIELD_INTERVAL_S", 10
+        )
+        self.telemetry_field_intervals: dict[str, float] = {
+            "health": slow_field_interval,
+            "temperature_degc": slow_field_interval,
+            "remaining_percent": slow_field_interval,
+        }
+        self.telemetry_max_batch_bytes: int = self._optional_int(
+            raw, "TELEMETRY_MAX_BATCH_BYTES", 131072
+        )
+        self.telemetry_max_latency_s: float = (
+            self._optional_int(raw, "TELEMETRY_MAX_LATENCY_MS", 3500) / 1000
+        )
+        self.telemetry_min_fill: int = self._optional_int(raw, "TELEMETRY_MIN_FILL", 1)
+        self.telemetry_compression: TelemetryCompression = self._optional_enum(
+            raw,
+            "TELEMETRY_COMPRESSION",
+            TelemetryCompression,
+            TelemetryCompression.NONE,
+        )
+        self.telemetry_journal_dir: str = raw.get(
+            "TELEMETRY_JOURNAL_DIR", "./journal/telemetry"
+        )
+        self.telemetry_journal_max_bytes: int = (
+            self._optional_int(raw, "TELEMETRY_JOURNAL_MAX_MB", 256) << 20
+        )
+        self.telemetry_backfill_rate: int = self._optional_int(
+            raw, "TELEMETRY_BACKFILL_RATE", 5
+        )
+        self.telemetry_summary_interval_s: int = self._optional_int(
+            raw, "TELEMETRY_SUMMARY_INTERVAL_S", 10
+        )
+        self.telemetry_low_battery_percent: int = self._optional_int(
+            raw, "TELEMETRY_LOW_BATTERY_PERCENT", 20
+        )
+        self.telemetry_raw_hold_s: int = self._optional_int(
+            raw, "TELEMETRY_RAW_HOLD_S", 30
+        )
+        self.mqtt_max_in_flight: int = self._optional_int(
+            raw, "MQTT_MAX_IN_FLIGHT", 100
+        )
+        self.mqtt_local_port: Optional[int] = self._optional_int(
+            raw, "MQTT_LOCAL_PORT", None
+        )
+        self.mqtt_min_reconnect_delay_ms: int = self._optional_int(
+            raw, "MQTT_MIN_RECONNECT_DELAY_MS", 1000
+        )
+        self.mqtt_max_reconnect_delay_ms: int = self._optional_int(
+            raw, "MQTT_MAX_RECONNECT_DELAY_MS", 60000
+        )
+        self.mqtt_rtt_interval_s: int = self._optional_int(
+            raw, "MQTT_RTT_INTERVAL_S", 30
+        )
+        self.lte_good_rsrp_dbm: int = self._optional_int(raw, "LTE_GOOD_RSRP_DBM", -90)
+        self.lte_poor_rsrp_dbm: int = self._optional_int(raw, "LTE_POOR_RSRP_DBM", -105)
+        self.mqtt_offline_queue_dir: str = raw.get(
+            "MQTT_OFFLINE_QUEUE_DIR", "./journal/outbound"
+        )
+        self.mqtt_offline_memory_bytes: int = (
+            self._optional_int(raw, "MQTT_OFFLINE_MEMORY_KB", 1024) << 10
+        )
+        self.mqtt_offline_max_bytes: int = (
+            self._optional_int(raw, "MQTT_OFFLINE_MAX_MB", 64) << 20
+        )
+        self.mqtt_offline_drain_rate: int = self._optional_int(
+            raw, "MQTT_OFFLINE_DRAIN_RATE", 50
+        )
+        self.outbound_byte_rates: dict[PublishPriority, int] = {
+            PublishPriority.TELEMETRY: self._optional_int(
+                raw, "OUTBOUND_TELEMETRY_BYTES_PER_S", 65536
+            ),
+            PublishPriority.BACKFILL: self._optional_int(
+                raw, "OUTBOUND_BACKFILL_BYTES_PER_S", 32768
+            ),
+        }
+        bulk_in_flight: int = self._optional_int(
+            raw, "OUTBOUND_BULK_IN_FLIGHT", max(1, self.mqtt_max_in_flight // 2)
+        )
+        self.outbound_max_in_flight: dict[PublishPriority, int] = {
+            PublishPriority.TELEMETRY: bulk_in_flight,
+            PublishPriority.BACKFILL: max(1, bulk_in_flight // 2),
+        }
+        self.outbound_max_queued_bytes: int = (
+            self._optional_int(raw, "OUTBOUND_MAX_QUEUED_KB", 4096) << 10
+        )
+        self.download_chunk_bytes: int = (
+            self._optional_int(raw, "DOWNLOAD_CHUNK_KB", 256) << 10
+        )
+        self.download_timeout_s: int = self._optional_int(raw, "DOWNLOAD_TIMEOUT_S", 30)
+        self.download_retries: int = self._optional_int(raw, "DOWNLOAD_RETRIES", 5)
+        self.download_remote_extract_min_bytes: int = (
+            self._optional_int(raw, "DOWNLOAD_REMOTE_EXTRACT_MIN_KB", 1024) << 10
+        )
+        self.mission_max_items: int = self._optional_int(raw, "MISSION_MAX_ITEMS", 1000)
+        self.mission_max_altitude_m: int = self._optional_int(
+            raw, "MISSION_MAX_ALTITUDE_M", 120
+        )
+        self.mission_cache_dir: str = raw.get("MISSION_CACHE_DIR", "./cache/missions")
+        self.mission_cache_max_bytes: int = (
+            self._optional_int(raw, "MISSION_CACHE_MAX_MB", 1024) << 20
+        )
+        self.mission_staging_dir: str = raw.get(
+            "MISSION_STAGING_DIR", "/tmp/missions/staging"
+        )
+        self.mission_staging_max_bytes: int = (
+            self._optional_int(raw, "MISSION_STAGING_MAX_MB", 512) << 20
+        )
+        self.mission_prefetch_depth: int = self._optional_int(
+            raw, "MISSION_PREFETCH_DEPTH", 1
+        )
+        self.telemetry_export_shm_name: Optional[str] = raw.get(
+            "TELEMETRY_EXPORT_SHM_NAME"
+        )
+        self.telemetry_export_socket: Optional[str] = raw.get("TELEMETRY_EXPORT_SOCKET")
+        self.mavsdk_server_port: int = self._optional_int(
+            raw, "MAVSDK_SERVER_PORT", 50051
+        )
+        self._set_topics()
         self.yolo_model_path: str = self._require_path(raw, "YOLO_MODEL_FILEPATH")
         self.stream_sample_rate: int = self._require_int(raw, "STREAM_SAMPLE_RATE")
         self.stream_port: int = self._require_int(raw, "STREAM_PORT")
@@ -49,6 +181,92 @@ class Config:
         self.detection_confidence_threshold: int = self._require_int(
             raw, "DETECTION_CONFIDENCE_THRESHOLD"
         )
+        self.vehicles: List[VehicleConfig] = self._vehicles(raw)
+        self.fleet_metrics_interval_s: int = self._optional_int(
+            raw, "FLEET_METRICS_INTERVAL_S", 60
+        )
+
+    @property
+    def thing_count(self) -> int:
+        """Things acting over the MQTT connection, one per vehicle."""
+        return max(1, len(self.vehicles))
+
+    def for_vehicle(self, vehicle: VehicleConfig) -> "Config":
+        """
+        This configuration acting for one of ``vehicles``: its thing name,
+        drone and stream port, topics, and its own journal, staging
+        directory, export names and mavsdk_server port so vehicles sharing
+        the process don't collide.
+        """
+        config = copy.copy(self)
+        config.vehicles = [vehicle]
+        config.thing_name = vehicle.thing_name
+        config.drone_address = vehicle.drone_address
+        config.drone_port = vehicle.drone_port
+        config.stream_port = vehicle.stream_port
+        config.mavsdk_server_port = self.mavsdk_server_port + self.vehicles.index(
+            vehicle
+        )
+        config.telemetry_journal_dir = os.path.join(
+            self.telemetry_journal_dir, vehicle.thing_name
+        )
+        config.mission_staging_dir = os.path.join(
+            self.mission_staging_dir, vehicle.thing_name
+        )
+        if self.telemetry_export_shm_name:
+            config.telemetry_export_shm_name = (
+                f"{self.telemetry_export_shm_name}-{vehicle.thing_name}"
+            )
+        if self.telemetry_export_socket:
+            root, ext = os.path.splitext(self.telemetry_export_socket)
+            config.telemetry_export_socket = f"{root}-{vehicle.thing_name}{ext}"
+        config._set_topics()
+        return config
+
+    def _set_topics(self) -> None:
+        self.internal_topic = f"$aws/things/{self.thing_name}/jobs/notify"
+        self.cancel_topic = f"groups/{self.thing_name}/cancel"
+        self.telemetry_topic = f"devices/{self.thing_name}/telemetry"
+        self.telemetry_summary_topic = f"devices/{self.thing_name}/telemetry/summary"
+        self.telemetry_event_topic = f"devices/{self.thing_name}/telemetry/events"
+        self.telemetry_raw_topic = f"devices/{self.thing_name}/telemetry/raw"
+        self.loopback_topic = f"devices/{self.thing_name}/loopback"
+        self.streaming_topic = f"devices/{self.thing_name}/stream"
+        self.alert_topic = f"devices/{self.thing_name}/detection"
+
+    def _vehicles(self, config: dict | _Environ[str]) -> List[VehicleConfig]:
+        """``VEHICLES=thing:address:port[:stream_port],...``, stream ports
+        default to consecutive ports from STREAM_PORT."""
+        value = config.get("VEHICLES")
+        if not value:
+            return []
+
+        vehicles = []
+        for index, spec in enumerate(value.split(",")):
+            fields = spec.strip().split(":")
+            if len(fields) not in (3, 4) or not all(fields):
+                raise ConfigTypeException(
+                    "VEHICLES must be thing:address:port[:stream_port],..."
+                )
+            try:
+                ports = [int(port) for port in fields[2:]]
+            except ValueError:
+                raise ConfigTypeException("VEHICLES ports must be integer")
+            vehicles.append(
+                VehicleConfig(
+                    thing_name=fields[0],
+                    drone_address=fields[1],
+                    drone_port=ports[0],
+                    stream_port=(
+                        ports[1] if len(ports) > 1 else self.stream_port + index
+                    ),
+                )
+            )
+
+        things = [vehicle.thing_name for vehicle in vehicles]
+        if len(set(things)) != len(things):
+            raise ConfigValueException("VEHICLES thing names must be unique")
+        return vehicles
 
     def _require(self, config: dict | _Environ[str], key: str) -> str:
         value = config.get(key)
@@ -71,6 +289,20 @@ class Config:
         except ValueError:
             raise ConfigTypeException(f"{key} must be integer")
 
+    def _optional_int(
+        self, config: dict | _Environ[str], key: str, default: int
+    ) -> int:
+        if config.get(key) is None:
+            return default
+        return self._require_int(config, key)
+
+    def _optional_enum(
+        self, config: dict | _Environ[str], key: str, enum_type, default
+    ):
+        if config.get(key) is None:
+            return default
+        return self._require_enum(config, key, enum_type)
+
     def _require_enum(self, config: dict | _Environ[str], key: str, enum_type):
         value = self._require(config, key)
         try:
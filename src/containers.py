@@ -1,32 +1,60 @@
 from dependency_injector import containers, providers
 
 from src.config import Config
+from src.core.connection_supervisor import ConnectionSupervisor
+from src.core.detection_model import DetectionModel
+from src.core.job_cache import JobCache
+from src.core.mission_prefetcher import MissionPrefetcher
 from src.core.mqtt_manager import MqttManager
+from src.core.offline_queue import OfflineQueue
+from src.core.outbound_scheduler import OutboundScheduler
 from src.core.drone_controller import MavsdkController
 from src.core.state_machine import StateMachine
 from src.core.upload_manager import UploadManager
+from src.utils.telemetry.aggregator import TelemetryAggregator
 from src.utils.telemetry.collector import TelemetryCollector
+from src.utils.telemetry.local_export import LocalTelemetryExporter
 from src.utils.telemetry.publisher import TelemetryPublisher
+from src.utils.telemetry.rate_policy import SamplingRatePolicy, FieldRateFilter
 from src.core.stream_handler import StreamHandler
 from src.coordinator import JobCoordinator
+from src.fleet import FleetCoordinator
 from src.core.kinesis_video_manager import KinesisVideoClient
 from src.core.credential_provider import CredentialProvider
+from src.utils.bundle_cache import BundleCache
+from src.utils.download_handler import MissionDownloader
+from src.utils.journal import SegmentJournal
+from src.utils.mission_plan import MissionPlanParser
 
 
-class ApplicationContainer(containers.DeclarativeContainer):
+class VehicleContainer(containers.DeclarativeContainer):
+    """One vehicle's coordinator, drone, state and telemetry pipeline."""
+
     event_loop = providers.Dependency()
-    config_path = providers.Dependency()
+    config = providers.Dependency()
+    mqtt = providers.Dependency()
+    thing_jobs = providers.Dependency()
+    supervisor = providers.Dependency()
+    outbound = providers.Dependency()
+    downloader = providers.Dependency()
+    mission_plans = providers.Dependency()
+    detection_model = providers.Dependency()
+    credential_provider = providers.Dependency()
+    upload_manager = providers.Dependency()
+    manage_connection = providers.Object(True)
 
-    config = providers.Singleton(Config, config_file=config_path)
+    job_cache = providers.Singleton(JobCache, thing_jobs=thing_jobs)
 
-    mqtt = providers.Singleton(
-        MqttManager,
-        cert_path=config.provided.cert_filepath,
-        private_key_path=config.provided.pri_key_filepath,
-        ca_file_path=config.provided.ca_filepath,
-        endpoint=config.provided.endpoint,
-        thing_name=config.provided.thing_name,
-        timeout=30,
+    mission_prefetcher = providers.Singleton(
+        MissionPrefetcher,
+        thing_jobs=thing_jobs,
+        jobs=job_cache,
+        downloader=downloader,
+        plans=mission_plans,
+        member_name=config.provided.thing_name,
+        staging_dir=config.provided.mission_staging_dir,
+        max_bytes=config.provided.mission_staging_max_bytes,
+        depth=config.provided.mission_prefetch_depth,
     )
 
     drone = providers.Singleton(
@@ -34,15 +62,56 @@ class ApplicationContainer(containers.DeclarativeContainer):
         address=config.provided.drone_address,
         port=config.provided.drone_port,
         protocol=config.provided.drone_connection_type,
+        plans=mission_plans,
+        server_port=config.provided.mavsdk_server_port,
     )
 
     state_machine = providers.Singleton(StateMachine)
 
+    telemetry_rate_policy = providers.Singleton(
+        SamplingRatePolicy,
+        state=state_machine,
+        cruise_hz=config.provided.telemetry_sample_interval,
+        high_hz=config.provided.telemetry_high_rate_hz,
+        idle_hz=config.provided.telemetry_idle_rate_hz,
+    )
+
+    telemetry_exporter = providers.Singleton(
+        LocalTelemetryExporter,
+        shm_name=config.provided.telemetry_export_shm_name,
+        socket_path=config.provided.telemetry_export_socket,
+    )
+
     telemetry_collector = providers.Singleton(
         TelemetryCollector,
         device_name=config.provided.thing_name,
         drone=drone.provided,
         interval_hz=config.provided.telemetry_sample_interval,
+        rate_policy=telemetry_rate_policy,
+        exporter=telemetry_exporter,
+    )
+
+    telemetry_aggregator = providers.Singleton(
+        TelemetryAggregator,
+        collector=telemetry_collector,
+        mqtt=mqtt,
+        summary_topic=config.provided.telemetry_summary_topic,
+        event_topic=config.provided.telemetry_event_topic,
+        window_s=config.provided.telemetry_summary_interval_s,
+        low_battery_percent=config.provided.telemetry_low_battery_percent,
+        raw_hold_s=config.provided.telemetry_raw_hold_s,
+        outbound=outbound,
+    )
+
+    telemetry_field_filter = providers.Singleton(
+        FieldRateFilter,
+        field_intervals=config.provided.telemetry_field_intervals,
+    )
+
+    telemetry_journal = providers.Singleton(
+        SegmentJournal,
+        directory=config.provided.telemetry_journal_dir,
+        max_bytes=config.provided.telemetry_journal_max_bytes,
     )
 
     telemetry_publisher = providers.Singleton(
@@ -51,6 +120,15 @@ class ApplicationContainer(containers.DeclarativeContainer):
         mqtt=mqtt,
         topic=config.provided.telemetry_topic,
         batch_size=config.provided.telemetry_sample_count,
+        max_batch_bytes=config.provided.telemetry_max_batch_bytes,
+        max_latency_s=config.provided.telemetry_max_latency_s,
+        min_fill=config.provided.telemetry_min_fill,
+        compression=config.provided.telemetry_compression,
+        journal=telemetry_journal,
+        backfill_rate=config.provided.telemetry_backfill_rate,
+        field_filter=telemetry_field_filter,
+        buffer=telemetry_aggregator.provided.output,
+        outbound=outbound,
     )
 
     kvs_client_factory = providers.Factory(
@@ -59,28 +137,13 @@ class ApplicationContainer(containers.DeclarativeContainer):
         region=config.provided.kinesis_region,
     )
 
-    credential_provider = providers.Singleton(
-        CredentialProvider,
-        cert_path=config.provided.cert_filepath,
-        key_path=config.provided.pri_key_filepath,
-        ca_path=config.provided.ca_filepath,
-        role_alias=config.provided.role_alias,
-        thing_name=config.provided.thing_name,
-        endpoint=config.provided.endpoint,
-        credentials_endpoint=config.provided.credentials_endpoint,
-    )
-
-    upload_manager = providers.Singleton(
-        UploadManager, credential_provider=credential_provider
-    )
-
     stream_handler = providers.Singleton(
         StreamHandler,
         device_name=config.provided.thing_name,
         port=config.provided.stream_port,
-        yolo_path=config.provided.yolo_model_path,
+        model=detection_model,
         sample_rate=config.provided.stream_sample_rate,
-        mqtt=mqtt,
+        outbound=outbound,
         alert_topic=config.provided.alert_topic,
         presence_confirmation_frames=config.provided.presence_confirmation_frames,
         confidence_threshold=config.provided.detection_confidence_threshold,
@@ -94,10 +157,163 @@ class ApplicationContainer(containers.DeclarativeContainer):
         JobCoordinator,
         config=config,
         mqtt=mqtt,
+        thing_jobs=thing_jobs,
+        supervisor=supervisor,
+        jobs=job_cache,
+        prefetcher=mission_prefetcher,
+        downloader=downloader,
+        outbound=outbound,
         drone=drone,
         state=state_machine,
         collector=telemetry_collector,
+        aggregator=telemetry_aggregator,
         publisher=telemetry_publisher,
         streamer=stream_handler,
         loop=event_loop,
+        manage_connection=manage_connection,
+    )
+
+
+class ApplicationContainer(containers.DeclarativeContainer):
+    event_loop = providers.Dependency()
+    config_path = providers.Dependency()
+
+    config = providers.Singleton(Config, config_file=config_path)
+
+    offline_journal = providers.Singleton(
+        SegmentJournal,
+        directory=config.provided.mqtt_offline_queue_dir,
+        max_bytes=config.provided.mqtt_offline_max_bytes,
+    )
+
+    offline_queue = providers.Singleton(
+        OfflineQueue,
+        journal=offline_journal,
+        memory_limit_bytes=config.provided.mqtt_offline_memory_bytes,
+    )
+
+    mqtt = providers.Singleton(
+        MqttManager,
+        cert_path=config.provided.cert_filepath,
+        private_key_path=config.provided.pri_key_filepath,
+        ca_file_path=config.provided.ca_filepath,
+        endpoint=config.provided.endpoint,
+        thing_name=config.provided.thing_name,
+        timeout=30,
+        max_in_flight=config.provided.mqtt_max_in_flight,
+        loop=event_loop,
+        offline_queue=offline_queue,
+        offline_drain_rate=config.provided.mqtt_offline_drain_rate,
+        min_reconnect_delay_ms=config.provided.mqtt_min_reconnect_delay_ms,
+        max_reconnect_delay_ms=config.provided.mqtt_max_reconnect_delay_ms,
+        local_port=config.provided.mqtt_local_port,
+        thing_count=config.provided.thing_count,
+    )
+
+    connection_supervisor = providers.Singleton(
+        ConnectionSupervisor,
+        mqtt=mqtt,
+        loopback_topic=config.provided.loopback_topic,
+        rtt_interval_s=config.provided.mqtt_rtt_interval_s,
+        good_rsrp_dbm=config.provided.lte_good_rsrp_dbm,
+        poor_rsrp_dbm=config.provided.lte_poor_rsrp_dbm,
+    )
+
+    bundle_cache = providers.Singleton(
+        BundleCache,
+        directory=config.provided.mission_cache_dir,
+        max_bytes=config.provided.mission_cache_max_bytes,
+    )
+
+    mission_downloader = providers.Singleton(
+        MissionDownloader,
+        chunk_size=config.provided.download_chunk_bytes,
+        timeout_s=config.provided.download_timeout_s,
+        retries=config.provided.download_retries,
+        cache=bundle_cache,
+        remote_extract_min_bytes=config.provided.download_remote_extract_min_bytes,
+    )
+
+    mission_plans = providers.Singleton(
+        MissionPlanParser,
+        max_items=config.provided.mission_max_items,
+        max_altitude_m=config.provided.mission_max_altitude_m,
+    )
+
+    outbound = providers.Singleton(
+        OutboundScheduler,
+        mqtt=mqtt,
+        byte_rates=config.provided.outbound_byte_rates,
+        max_in_flight=config.provided.outbound_max_in_flight,
+        max_queued_bytes=config.provided.outbound_max_queued_bytes,
+    )
+
+    detection_model = providers.Singleton(
+        DetectionModel, path=config.provided.yolo_model_path
+    )
+
+    credential_provider = providers.Singleton(
+        CredentialProvider,
+        cert_path=config.provided.cert_filepath,
+        key_path=config.provided.pri_key_filepath,
+        ca_path=config.provided.ca_filepath,
+        role_alias=config.provided.role_alias,
+        thing_name=config.provided.thing_name,
+        endpoint=config.provided.endpoint,
+        credentials_endpoint=config.provided.credentials_endpoint,
+    )
+
+    upload_manager = providers.Singleton(
+        UploadManager, credential_provider=credential_provider
+    )
+
+    # the single vehicle of IOT_THING_NAME, when VEHICLES is not set
+    vehicle = providers.Container(
+        VehicleContainer,
+        event_loop=event_loop,
+        config=config,
+        mqtt=mqtt,
+        thing_jobs=mqtt.provided.jobs,
+        supervisor=connection_supervisor,
+        outbound=outbound,
+        downloader=mission_downloader,
+        mission_plans=mission_plans,
+        detection_model=detection_model,
+        credential_provider=credential_provider,
+        upload_manager=upload_manager,
+    )
+
+    stream_handler = vehicle.stream_handler
+    coordinator = vehicle.coordinator
+
+
+def build_fleet(container: ApplicationContainer) -> FleetCoordinator:
+    """A coordinator per entry of VEHICLES, sharing the container's MQTT
+    connection, outbound scheduler, downloads and detection model."""
+    config = container.config()
+    mqtt = container.mqtt()
+    coordinators = {}
+    for vehicle in config.vehicles:
+        vehicle_container = VehicleContainer(
+            event_loop=container.event_loop(),
+            config=config.for_vehicle(vehicle),
+            mqtt=mqtt,
+            thing_jobs=mqtt.for_thing(vehicle.thing_name),
+            supervisor=container.connection_supervisor(),
+            outbound=container.outbound(),
+            downloader=container.mission_downloader(),
+            mission_plans=container.mission_plans(),
+            detection_model=container.detection_model(),
+            credential_provider=container.credential_provider(),
+            upload_manager=container.upload_manager(),
+            manage_connection=False,
+        )
+        coordinators[vehicle.thing_name] = vehicle_container.coordinator()
+
+    return FleetCoordinator(
+        mqtt=mqtt,
+        supervisor=container.connection_supervisor(),
+        outbound=container.outbound(),
+        coordinators=coordinators,
+        metrics_interval_s=config.fleet_metrics_interval_s,
     )
@@ -1,18 +1,25 @@
 import asyncio
 import json
 import time
-from typing import Optional
+from collections import Counter
+from typing import Dict, Optional
 
+from awsiot.iotjobs import JobExecutionSummary
 from loguru import logger
 
 from src.config import Config
+from src.core.connection_supervisor import ConnectionSupervisor
 from src.core.drone_controller import MavsdkController
-from src.core.mqtt_manager import MqttManager
+from src.core.job_cache import JobCache
+from src.core.mqtt_manager import MqttManager, ThingJobs
+from src.core.outbound_scheduler import OutboundScheduler
 from src.core.state_machine import StateMachine
 from src.core.stream_handler import StreamHandler
 from src.core.manual_controller import ManualController
+from src.core.mission_prefetcher import MissionPrefetcher
 from src.enums.execution_state import ExecutionState
 from src.enums.job_status import JobStatus
+from src.enums.publish_priority import PublishPriority
 from src.exceptions.download_exceptions import (
     DownloadNotAllowedFolderException,
     DownloadException,
@@ -26,10 +33,10 @@ from src.exceptions.drone_excetions import (
 )
 from src.models.job_document import Job
 from src.exceptions.mqtt_exceptions import MqttConnectionException
+from src.utils.telemetry.aggregator import TelemetryAggregator
 from src.utils.telemetry.collector import TelemetryCollector
 from src.utils.telemetry.publisher import TelemetryPublisher
-from src.utils.download_handler import handle_download
-from src.utils.zip_manager import extract_mission
+from src.utils.download_handler import DownloadedMission, MissionDownloader
 
 
 class JobCoordinator:
@@ -37,28 +44,49 @@ class JobCoordinator:
         self,
         config: Config,
         mqtt: MqttManager,
+        thing_jobs: ThingJobs,
+        supervisor: ConnectionSupervisor,
+        jobs: JobCache,
+        prefetcher: MissionPrefetcher,
+        downloader: MissionDownloader,
+        outbound: OutboundScheduler,
         drone: MavsdkController,
         state: StateMachine,
         collector: TelemetryCollector,
+        aggregator: TelemetryAggregator,
         publisher: TelemetryPublisher,
         streamer: StreamHandler,
         loop: asyncio.AbstractEventLoop,
+        manage_connection: bool = True,
     ):
         self.config = config
         self.mqtt = mqtt
+        self.thing_jobs = thing_jobs
+        self.supervisor = supervisor
+        self.jobs = jobs
+        self.prefetcher = prefetcher
+        self.downloader = downloader
+        self.outbound = outbound
         self.drone = drone
         self.state = state
         self.telemetry_collector = collector
+        self.telemetry_aggregator = aggregator
         self.telemetry_publisher = publisher
         self.streamer = streamer
         self.loop = loop
+        # False when the connection, supervisor and outbound scheduler are
+        # shared with other vehicles' coordinators and started elsewhere
+        self.manage_connection = manage_connection
+        self.job_statuses: Counter[str] = Counter()
 
         self.current_job_id: Optional[str] = None
         self.job_document: Optional[Job] = None
         self.current_task: Optional[asyncio.Task] = None
-        self.mission_file: Optional[str] = None
+        self.mission: Optional[DownloadedMission] = None
 
         self._processing = True
+        # None until the notify-next stream is first established
+        self._next_job_stream_live: Optional[bool] = None
 
         self.manual_controller = ManualController(
             drone=self.drone,
@@ -103,12 +131,17 @@ class JobCoordinator:
             self.streamer.send_data_message(response)
 
     async def start(self):
-        try:
-            await self.mqtt.connect()
-            logger.info("MQTT connected")
-        except MqttConnectionException as e:
-            logger.error(e)
-            raise
+        if self.manage_connection:
+            try:
+                await self.mqtt.connect()
+                logger.info("MQTT connected")
+            except MqttConnectionException as e:
+                logger.error(e)
+                raise
+
+            await self.supervisor.start()
+            await self.outbound.start()
+        await self.telemetry_publisher.start_backfill()
 
         try:
             logger.debug(f"Subscribing to {self.config.internal_topic}")
@@ -120,6 +153,13 @@ class JobCoordinator:
                 f"Critical subscription failed for {self.config.internal_topic}: {e}"
             )
 
+        try:
+            self.thing_jobs.stream_next_job(
+                self._next_job_changed_handler, self._next_job_subscription_handler
+            )
+        except Exception as e:
+            logger.error(f"notify-next stream failed, falling back to jobs/notify: {e}")
+
         try:
             logger.debug(f"Subscribing to {self.config.streaming_topic}")
             await self.mqtt.subscribe(
@@ -128,6 +168,16 @@ class JobCoordinator:
         except Exception as e:
             logger.error(f"Subscription failed for {self.config.streaming_topic}: {e}")
 
+        try:
+            logger.debug(f"Subscribing to {self.config.telemetry_raw_topic}")
+            await self.mqtt.subscribe(
+                self.config.telemetry_raw_topic, self._telemetry_raw_command_handler
+            )
+        except Exception as e:
+            logger.error(
+                f"Subscription failed for {self.config.telemetry_raw_topic}: {e}"
+            )
+
         logger.info("Startup sequence complete, coordinator running.")
 
         try:
@@ -142,16 +192,32 @@ class JobCoordinator:
             await asyncio.sleep(1)
 
     def _job_notification_handler(self, topic, payload, **kwargs):
-        asyncio.run_coroutine_threadsafe(self._evaluate_incoming_job(), self.loop)
+        # While idle, notify-next starts jobs. While busy it shows the running
+        # execution, so cancel jobs are still picked up from jobs/notify.
+        if self._next_job_stream_live and self.state.get_state() == ExecutionState.IDLE:
+            return
+        asyncio.run_coroutine_threadsafe(
+            self._evaluate_incoming_job(payload), self.loop
+        )
 
-    async def _evaluate_incoming_job(self):
+    def _next_job_changed_handler(self, event):
+        self.loop.create_task(self._evaluate_incoming_job(event))
+
+    def _next_job_subscription_handler(self, established: bool):
+        was_lost = self._next_job_stream_live is False
+        self._next_job_stream_live = established
+        if established and was_lost:
+            # events published while the subscription was down are lost
+            logger.info("notify-next stream re-established, polling for jobs")
+            self.loop.create_task(self._evaluate_incoming_job())
+
+    async def _evaluate_incoming_job(self, notification=None):
         try:
-            next_job_summary = await self.mqtt.get_next_queued_job()
+            next_job_summary = await self.jobs.next_job(notification)
             if not next_job_summary:
                 return
 
-            job_desc = await self.mqtt.describe_job(next_job_summary.job_id)
-            document = self.mqtt.get_job_document(job_desc)
+            document = await self.jobs.document(next_job_summary.job_id)
 
             if not document:
                 return
@@ -167,46 +233,62 @@ class JobCoordinator:
 
             elif not is_busy:
                 if self.current_job_id != next_job_summary.job_id:
-                    await self._process_next_job()
+                    await self._process_next_job(next_job_summary)
 
             else:
                 logger.info(
                     f"System busy. Ignoring standard job {next_job_summary.job_id} for now."
                 )
+                if self.state.get_state() == ExecutionState.IN_FLIGHT:
+                    self.prefetcher.look_ahead(self.current_job_id)
 
         except Exception as e:
             logger.error(f"Failed to evaluate incoming job: {e}")
 
+    @staticmethod
+    def _parse_enabled_command(payload) -> Optional[bool]:
+        """Parse an on/off command payload, None if it is invalid JSON."""
+        if hasattr(payload, "tobytes"):
+            payload_str = payload.tobytes().decode("utf-8")
+        elif isinstance(payload, (bytes, bytearray)):
+            payload_str = payload.decode("utf-8")
+        else:
+            payload_str = str(payload)
+
+        payload_str = payload_str.strip()
+        logger.debug(f"Raw command payload: '{payload_str}'")
+
+        if not payload_str.startswith("{"):
+            return payload_str.lower() in ["true", "1", "on", "enable"]
+
+        try:
+            data = json.loads(payload_str)
+
+            if "message" in data:
+                msg_val = data["message"]
+                if isinstance(msg_val, str) and msg_val.strip().startswith("{"):
+                    data = json.loads(msg_val)
+                elif isinstance(msg_val, dict):
+                    data = msg_val
+
+            return bool(data.get("enabled", False))
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON in command: {payload_str}")
+            return None
+
+    def _telemetry_raw_command_handler(self, topic, payload, **kwargs):
+        try:
+            enabled = self._parse_enabled_command(payload)
+            if enabled is not None:
+                self.telemetry_aggregator.set_raw_enabled(enabled)
+        except Exception as e:
+            logger.error(f"Error processing raw telemetry command: {e}")
+
     def _streaming_command_handler(self, topic, payload, **kwargs):
         try:
-            if hasattr(payload, "tobytes"):
-                payload_str = payload.tobytes().decode("utf-8")
-            elif isinstance(payload, (bytes, bytearray)):
-                payload_str = payload.decode("utf-8")
-            else:
-                payload_str = str(payload)
-
-            payload_str = payload_str.strip()
-            logger.debug(f"Raw streaming payload: '{payload_str}'")
-
-            should_stream = False
-            if payload_str.startswith("{"):
-                try:
-                    data = json.loads(payload_str)
-
-                    if "message" in data:
-                        msg_val = data["message"]
-                        if isinstance(msg_val, str) and msg_val.strip().startswith("{"):
-                            data = json.loads(msg_val)
-                        elif isinstance(msg_val, dict):
-                            data = msg_val
-
-                    should_stream = bool(data.get("enabled", False))
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in streaming command: {payload_str}")
-                    return
-            else:
-                should_stream = payload_str.lower() in ["true", "1", "on", "enable"]
+            should_stream = self._parse_enabled_command(payload)
+            if should_stream is None:
+                return
 
             logger.info(
                 f"Processed streaming command. Setting state to: {should_stream}"
@@ -234,6 +316,30 @@ class JobCoordinator:
         except Exception as e:
             logger.error(f"Error processing streaming command: {e}")
 
+    async def _update_job_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        status_details: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if status != JobStatus.IN_PROGRESS:
+            self.job_statuses[status.name] += 1
+        await self.outbound.submit(
+            PublishPriority.CONTROL,
+            256,
+            lambda: self.thing_jobs.update_job_status(job_id, status, status_details),
+        )
+
+    def _download_progress_handler(
+        self, job_id: str, received: int, total: Optional[int]
+    ):
+        details = {"stage": "download", "received_bytes": str(received)}
+        if total:
+            details["progress_percent"] = str(received * 100 // total)
+        self.loop.create_task(
+            self._update_job_status(job_id, JobStatus.IN_PROGRESS, details)
+        )
+
     async def _process_cancel_immediate(self, cancel_job_id: str):
         """Interrupts the current task and aborts the drone."""
         logger.info(f"Executing immediate cancellation via job {cancel_job_id}")
@@ -248,15 +354,15 @@ class JobCoordinator:
         await self._trigger_drone_abort()
 
         if self.current_job_id:
-            await self.mqtt.update_job_status(self.current_job_id, JobStatus.CANCELED)
+            await self._update_job_status(self.current_job_id, JobStatus.CANCELED)
 
-        await self.mqtt.update_job_status(cancel_job_id, JobStatus.SUCCEEDED)
+        await self._update_job_status(cancel_job_id, JobStatus.SUCCEEDED)
 
         self.state.force_reset()
         self.current_job_id = None
         self.current_task = None
 
-    async def _process_next_job(self):
+    async def _process_next_job(self, next_job: Optional[JobExecutionSummary] = None):
         if not self._processing:
             return
 
@@ -265,7 +371,7 @@ class JobCoordinator:
             return
 
         try:
-            next_job = await self.mqtt.get_next_queued_job()
+            next_job = next_job or await self.jobs.next_job()
             if not next_job:
                 logger.debug("No next job, skipping..")
                 return
@@ -286,12 +392,11 @@ class JobCoordinator:
         """Execute a job from start to finish."""
         self.current_job_id = job_id
 
-        job_response = await self.mqtt.describe_job(job_id)
-        document = self.mqtt.get_job_document(job_response)
+        document = await self.jobs.document(job_id)
 
         if not document:
             logger.warning(f"Invalid job document for {job_id}")
-            await self.mqtt.update_job_status(job_id, JobStatus.REJECTED)
+            await self._update_job_status(job_id, JobStatus.REJECTED)
             return
 
         self.job_document = document
@@ -301,58 +406,70 @@ class JobCoordinator:
                 await self._execute_download_job(job_id)
             case "CANCEL":
                 logger.info("Processed Cancel job while IDLE.")
-                await self.mqtt.update_job_status(job_id, JobStatus.SUCCEEDED)
+                await self._update_job_status(job_id, JobStatus.SUCCEEDED)
             case _:
                 logger.warning(f"Unsupported action: {document.operation}")
-                await self.mqtt.update_job_status(job_id, JobStatus.REJECTED)
+                await self._update_job_status(job_id, JobStatus.REJECTED)
                 return
 
     async def _execute_download_job(self, job_id: str):
-        await self.mqtt.update_job_status(job_id, JobStatus.IN_PROGRESS)
+        await self._update_job_status(job_id, JobStatus.IN_PROGRESS)
 
         try:
-            await self._download_mission(self.job_document)
+            await self._download_mission(job_id, self.job_document)
             await self._execute_mission()
-            await self.mqtt.update_job_status(job_id, JobStatus.SUCCEEDED)
+            await self._update_job_status(job_id, JobStatus.SUCCEEDED)
             logger.info(f"Job {job_id} completed successfully")
 
         except asyncio.CancelledError:
             raise
         except Exception as e:
             logger.error(f"Job {job_id} failed: {e}")
-            await self.mqtt.update_job_status(job_id, JobStatus.FAILED)
+            await self._update_job_status(job_id, JobStatus.FAILED)
             self.state.trigger("error")
         finally:
+            self.prefetcher.release(job_id)
             self.current_job_id = None
-            self.mission_file = None
+            self.mission = None
             if self.state.get_state() != ExecutionState.IDLE:
                 self.state.force_reset()
 
-    async def _download_mission(self, document: Job):
+    async def _download_mission(self, job_id: str, document: Job):
         self.state.trigger("download")
+        self.mission = await self.prefetcher.claim(job_id)
+        if self.mission:
+            logger.info(f"Using prefetched mission {self.mission.path}")
+            return
+
         url = document.data.download_url
         download_path = document.data.download_path
 
         logger.info(f"Downloading mission from {url}")
         try:
-            path = await self.loop.run_in_executor(
-                None, handle_download, url, download_path
+            self.mission = await self.downloader.download_mission(
+                url,
+                download_path,
+                self.config.thing_name,
+                document.data.sha256,
+                lambda received, total: self._download_progress_handler(
+                    job_id, received, total
+                ),
+                document.data.member_sha256.get(self.config.thing_name),
             )
         except DownloadNotAllowedFolderException:
             raise Exception("Cannot download to a directory other than /tmp")
         except DownloadException as e:
             raise Exception(f"Download failed {e}")
 
-        logger.info("Download succeeded, extracting mission")
-        self.mission_file = extract_mission(path, self.config.thing_name, download_path)
-
     async def _execute_mission(self):
-        if not self.mission_file:
+        if not self.mission:
             raise Exception("No mission file available")
 
         self.state.trigger("upload")
         try:
-            await self.drone.upload_mission(self.mission_file, return_to_launch=True)
+            await self.drone.upload_mission_bytes(
+                self.mission.content, return_to_launch=True
+            )
         except DroneUploadException as e:
             raise Exception(f"Mission upload failed: {e}")
 
@@ -367,6 +484,7 @@ class JobCoordinator:
             await self.drone.start_mission()
         except DroneStartMissionException as e:
             raise Exception(f"Mission start failed: {e}")
+        self.prefetcher.look_ahead(self.current_job_id)
 
         if self.job_document and self.job_document.data:
             mission_uuid = self.job_document.data.mission_uuid
@@ -377,6 +495,7 @@ class JobCoordinator:
         await asyncio.gather(
             self.streamer.start(),
             self.telemetry_publisher.start(),
+            self.telemetry_aggregator.start(),
             self.telemetry_collector.start(),
         )
 
@@ -386,8 +505,9 @@ class JobCoordinator:
         finally:
             self.streamer.set_active_mission_info(None, None)
             await self.streamer.stop()
-            await self.telemetry_publisher.stop()
             await self.telemetry_collector.stop()
+            await self.telemetry_aggregator.stop()
+            await self.telemetry_publisher.stop()
 
     async def _trigger_drone_abort(self):
         """Sends immediate RTL command to drone."""
@@ -437,6 +557,8 @@ class JobCoordinator:
                 asyncio.gather(
                     self.streamer.stop(),
                     self.telemetry_publisher.stop(),
+                    self.telemetry_publisher.stop_backfill(),
+                    self.telemetry_aggregator.stop(),
                     self.telemetry_collector.stop(),
                     return_exceptions=True,
                 ),
@@ -445,6 +567,16 @@ class JobCoordinator:
         except asyncio.TimeoutError:
             logger.error("Telemetry/streaming shutdown timeout")
 
+        self.telemetry_collector.close()
+        if self.manage_connection:
+            await self.outbound.stop()
+            await self.supervisor.stop()
+        await self.prefetcher.stop()
+        logger.info(f"Job cache: {self.jobs.stats()}")
+        logger.info(f"Mission upload: {self.drone.mission_metrics()}")
+        if self.downloader.cache:
+            logger.info(f"Mission bundle cache: {self.downloader.cache.stats()}")
+
         if self.state.get_state() == ExecutionState.IN_FLIGHT:
             try:
                 await asyncio.wait_for(self.drone.cancel_mission(), timeout=2.0)
@@ -453,11 +585,27 @@ class JobCoordinator:
             except Exception as e:
                 logger.error(f"Failed to cancel drone mission: {e}")
 
-        try:
-            await asyncio.wait_for(self.mqtt.disconnect(), timeout=2.0)
-        except asyncio.TimeoutError:
-            logger.error("MQTT disconnect timeout")
-        except Exception as e:
-            logger.error(f"MQTT disconnect error: {e}")
+        if self.manage_connection:
+            try:
+                await asyncio.wait_for(self.mqtt.disconnect(), timeout=2.0)
+            except asyncio.TimeoutError:
+                logger.error("MQTT disconnect timeout")
+            except Exception as e:
+                logger.error(f"MQTT disconnect error: {e}")
 
         logger.info("Coordinator stopped")
+
+    def metrics(self) -> Dict[str, object]:
+        return {
+            "state": self.state.get_state().name,
+            "job": self.current_job_id,
+            "jobs": dict(self.job_statuses),
+            "job_cache": self.jobs.stats(),
+            "prefetch": {
+                "prefetched": self.prefetcher.prefetched,
+                "hits": self.prefetcher.hits,
+                "misses": self.prefetcher.misses,
+                "evicted": self.prefetcher.evicted,
+            },
+            "mission_upload": self.drone.mission_metrics(),
+        }
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.core.mqtt_manager import MqttManager
+from src.enums.connection_state import ConnectionState
+from src.utils.lte_util import get_signal_strength
+from src.utils.metrics import LatencyHistogram
+
+_DOWN = (ConnectionState.DISCONNECTED, ConnectionState.FAILED)
+
+
+class ConnectionSupervisor:
+    """
+    Follows the MQTT connection for the lifetime of the agent.
+
+    Every state change is kept in ``history``; the time from a disconnect
+    to the next successful connect is recorded in ``reconnect_time``. Round
+    trip time is measured every ``rtt_interval_s`` by publishing to a
+    loopback topic the device is subscribed to, since the CRT client does
+    not expose its PINGREQ timing.
+
+    The CRT client backs off exponentially between reconnect attempts,
+    which after a long outage can leave it waiting up to its maximum delay
+    after the link is back. While disconnected, an improvement of the LTE
+    signal class (poor below ``poor_rsrp_dbm``, good from
+    ``good_rsrp_dbm``) restarts the client so it reconnects immediately, at
+    most once every ``min_restart_interval_s``.
+    """
+
+    def __init__(
+        self,
+        mqtt: MqttManager,
+        loopback_topic: str,
+        rtt_interval_s: float = 30.0,
+        good_rsrp_dbm: int = -90,
+        poor_rsrp_dbm: int = -105,
+        min_restart_interval_s: float = 10.0,
+        signal_source: Callable[[], AsyncIterator[int]] = get_signal_strength,
+        history_size: int = 100,
+    ) -> None:
+        self.mqtt = mqtt
+        self.loopback_topic = loopback_topic
+        self.rtt_interval_s = rtt_interval_s
+        self.good_rsrp_dbm = good_rsrp_dbm
+        self.poor_rsrp_dbm = poor_rsrp_dbm
+        self.min_restart_interval_s = min_restart_interval_s
+        self.signal_source = signal_source
+
+        self.history: Deque[Tuple[float, ConnectionState]] = deque(maxlen=history_size)
+        self.disconnects = 0
+        self.fast_reconnects = 0
+        self.reconnect_time = LatencyHistogram()
+        self.last_reconnect_s: Optional[float] = None
+        self.rtt = LatencyHistogram()
+        self.last_rtt_s: Optional[float] = None
+        self.rtt_lost = 0
+        self.last_rsrp: Optional[int] = None
+
+        self._down_since: Optional[float] = None
+        self._last_restart = float("-inf")
+        self._pings: Dict[int, float] = {}
+        self._sequence = 0
+        self._tasks: List[asyncio.Task] = []
+        self.error_count = 0
+        self.last_error: Optional[Exception] = None
+
+        mqtt.add_state_listener(self._on_state)
+
+    @property
+    def state(self) -> ConnectionState:
+        return self.mqtt.state
+
+    async def start(self):
+        if self._tasks:
+            return
+        await self.mqtt.subscribe(self.loopback_topic, self._on_loopback)
+        self._tasks = [
+            asyncio.create_task(self._rtt_loop()),
+            asyncio.create_task(self._signal_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        stats = self.stats()
+        logger.info(
+            f"MQTT connection: {stats['disconnects']} disconnects, "
+            f"{stats['fast_reconnects']} fast reconnects, "
+            f"p95 reconnect {stats['reconnect_time']['p95_s'] or 0:.1f} s, "
+            f"p95 RTT {(stats['rtt']['p95_s'] or 0) * 1000:.0f} ms"
+        )
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state.value,
+            "disconnects": self.disconnects,
+            "fast_reconnects": self.fast_reconnects,
+            "last_reconnect_s": self.last_reconnect_s,
+            "reconnect_time": self.reconnect_time.snapshot(),
+            "last_rtt_s": self.last_rtt_s,
+            "rtt": self.rtt.snapshot(),
+            "rtt_lost": self.rtt_lost,
+            "last_rsrp_dbm": self.last_rsrp,
+        }
+
+    def signal_class(self, rsrp: Optional[int]) -> int:
+        """0 for poor, 1 for fair, 2 for good; unknown signal counts as poor."""
+        if rsrp is None or rsrp < self.poor_rsrp_dbm:
+            return 0
+        return 2 if rsrp >= self.good_rsrp_dbm else 1
+
+    def _on_state(self, state: ConnectionState, error: Optional[Exception]) -> None:
+        now = time.monotonic()
+        self.history.append((time.time(), state))
+
+        if state == ConnectionState.CONNECTED and self._down_since is not None:
+            self.last_reconnect_s = now - self._down_since
+            self.reconnect_time.record(self.last_reconnect_s)
+            self._down_since = None
+            logger.info(f"MQTT reconnected after {self.last_reconnect_s:.1f} s")
+        elif state == ConnectionState.DISCONNECTED and self._down_since is None:
+            self.disconnects += 1
+            self._down_since = now
+            self._pings.clear()
+
+    def _on_loopback(self, topic: str, payload: bytes) -> None:
+        try:
+            sequence = json.loads(payload)["sequence"]
+        except (ValueError, KeyError, TypeError):
+            return
+        sent = self._pings.pop(sequence, None)
+        if sent is not None:
+            self.last_rtt_s = time.monotonic() - sent
+            self.rtt.record(self.last_rtt_s)
+
+    async def _rtt_loop(self):
+        while True:
+            await asyncio.sleep(self.rtt_interval_s)
+            self.rtt_lost += len(self._pings)
+            self._pings.clear()
+            if not self.mqtt.connected:
+                continue
+
+            self._sequence += 1
+            self._pings[self._sequence] = time.monotonic()
+            try:
+                self.mqtt.publish(
+                    self.loopback_topic, json.dumps({"sequence": self._sequence})
+                )
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = e
+                self._pings.pop(self._sequence, None)
+
+    async def _signal_loop(self):
+        async for rsrp in self.signal_source():
+            previous = self.signal_class(self.last_rsrp)
+            self.last_rsrp = rsrp
+            if self.signal_class(rsrp) <= previous or self.state not in _DOWN:
+                continue
+
+            now = time.monotonic()
+            if now - self._last_restart < self.min_restart_interval_s:
+                continue
+            self._last_restart = now
+            self.fast_reconnects += 1
+            logger.info(f"LTE signal improved to {rsrp} dBm, reconnecting now")
+            try:
+                self.mqtt.restart()
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = e
+                logger.error(f"MQTT restart failed: {e}")
@@ -0,0 +1,21 @@
+import threading
+
+from ultralytics import YOLO
+
+
+class DetectionModel:
+    """
+    The YOLO model, loaded once per process and shared by the stream
+    handlers of every vehicle. Ultralytics predictors keep per-call state,
+    so inference from the handlers' worker threads is serialized.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._model = YOLO(path)
+        self._lock = threading.Lock()
+        self.inferences = 0
+
+    def __call__(self, frame, **kwargs):
+        with self._lock:
+            self.inferences += 1
+            return self._model(frame, **kwargs)
@@ -1,29 +1,61 @@
 import asyncio
+import hashlib
+import math
+import struct
+import time
 from datetime import datetime
-from typing import AsyncIterator, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 from xmlrpc.client import DateTime
 
+from loguru import logger
 from mavsdk import System as MavSystem
 from mavsdk.action import ActionError
+from mavsdk.mission_raw import MissionItem, MissionRawError
 from mavsdk.telemetry import TelemetryError, Position, Battery, Health, Heading
 from mavsdk.telemetry_server import VelocityNed
 
 from src.exceptions.drone_excetions import *
+from src.exceptions.mission_exceptions import MissionPlanException
 from src.models.drone_coordinates import DroneCoordinates
 from src.models.mission_progress import MissionProgressData
 
 from src.enums.connection_types import ConnectionTypes
 from src.utils.lte_util import get_signal_strength
+from src.utils.metrics import LatencyHistogram
+from src.utils.mission_plan import MissionPlanParser
 
 
 class MavsdkController:
-    def __init__(self, address: str, port: int, protocol: ConnectionTypes) -> None:
+    def __init__(
+        self,
+        address: str,
+        port: int,
+        protocol: ConnectionTypes,
+        plans: Optional[MissionPlanParser] = None,
+        server_port: int = 50051,
+    ) -> None:
         self._connected = False
         self.address: str = address
         self.port: int = port
         self.protocol: str = protocol.value
-        self.system: MavSystem = MavSystem()
+        # each controller runs its own mavsdk_server, on its own gRPC port
+        self.system: MavSystem = MavSystem(port=server_port)
         self.uptime_epoch = datetime.now()
+        self.plans = plans or MissionPlanParser()
+        self.upload_latency = LatencyHistogram()
+
+        # digest of the items the vehicle holds, as far as we know
+        self._onboard_mission: Optional[str] = None
+        # mission change events seen, and how many had been seen when the
+        # vehicle last held our mission
+        self._mission_changes = 0
+        self._changes_at_upload = 0
+        self._mission_watch: Optional[asyncio.Task] = None
+        self.uploads = 0
+        self.uploads_skipped = 0
+        self.items_uploaded = 0
+        self.items_skipped = 0
+        self.missions_verified = 0
 
     async def connect(self) -> None:
         """Connect to drone hardware."""
@@ -59,20 +91,115 @@ class MavsdkController:
     async def upload_mission(
         self, path_to_mission: str, return_to_launch: bool = True
     ) -> None:
-        """Upload a mission."""
+        """Upload the plan file at ``path_to_mission``, see ``upload_mission_bytes``."""
+        try:
+            with open(path_to_mission, "rb") as file:
+                content = file.read()
+        except OSError as e:
+            raise DroneUploadException(e)
+        await self.upload_mission_bytes(content, return_to_launch)
+
+    async def upload_mission_bytes(
+        self, content: bytes, return_to_launch: bool = True
+    ) -> None:
+        """
+        Upload a QGroundControl plan, parsed and validated on our side
+        straight from memory.
+
+        The transfer is skipped when the vehicle still holds the same items
+        from our previous upload, and the mission is rewound to its first
+        item instead. Once the vehicle has reported a mission change since
+        that upload, its copy is read back and compared before skipping.
+        """
         try:
+            plan = self.plans.load_bytes(content)
+        except MissionPlanException as e:
+            raise DroneUploadException(e)
+        digest = _items_digest(plan.items)
+        self._watch_mission_changes()
+
+        try:
+            started = time.perf_counter()
             await self.system.mission.set_return_to_launch_after_mission(
                 return_to_launch
             )
+            if digest == self._onboard_mission and await self._still_onboard(digest):
+                await self.system.mission_raw.set_current_mission_item(0)
+                self.uploads_skipped += 1
+                self.items_skipped += len(plan.items)
+                logger.info(
+                    f"Mission {plan.sha256[:12]} already on the vehicle, "
+                    f"upload of {len(plan.items)} items skipped"
+                )
+                return
 
-            out = await self.system.mission_raw.import_qgroundcontrol_mission(
-                path_to_mission
-            )
-
-            await self.system.mission_raw.upload_mission(out.mission_items)
-        except ActionError as e:
+            self._onboard_mission = None
+            self._changes_at_upload = self._mission_changes
+            await self.system.mission_raw.upload_mission(plan.items)
+            upload_s = time.perf_counter() - started
+        except (ActionError, MissionRawError) as e:
             raise DroneUploadException(e)
 
+        self._onboard_mission = digest
+        self.upload_latency.record(upload_s)
+        self.uploads += 1
+        self.items_uploaded += len(plan.items)
+        logger.info(
+            f"Uploaded mission {plan.sha256[:12]}: {len(plan.items)} items, "
+            f"parsed in {plan.parse_s * 1000:.1f} ms, uploaded in {upload_s:.2f} s"
+        )
+
+    def mission_metrics(self) -> dict:
+        return {
+            "parse": self.plans.parse_latency.snapshot(),
+            "upload": self.upload_latency.snapshot(),
+            "plan_cache_hits": self.plans.hits,
+            "plan_cache_misses": self.plans.misses,
+            "uploads": self.uploads,
+            "uploads_skipped": self.uploads_skipped,
+            "items_uploaded": self.items_uploaded,
+            "items_skipped": self.items_skipped,
+            "missions_verified": self.missions_verified,
+        }
+
+    def _watch_mission_changes(self) -> None:
+        if not self._watching_missions():
+            self._onboard_mission = None
+            self._mission_watch = asyncio.create_task(self._count_mission_changes())
+
+    def _watching_missions(self) -> bool:
+        return self._mission_watch is not None and not self._mission_watch.done()
+
+    async def _still_onboard(self, digest: str) -> bool:
+        if not self._watching_missions():
+            return False
+        if self._mission_changes == self._changes_at_upload:
+            return True
+
+        # the change may be our own upload's or anyone else's: only the
+        # vehicle's copy tells
+        changes = self._mission_changes
+        try:
+            items = await self.system.mission_raw.download_mission()
+        except MissionRawError as e:
+            logger.warning(f"Could not read the mission back: {e}")
+            return False
+        self.missions_verified += 1
+        if _items_digest(items) != digest:
+            logger.info("Mission changed on the vehicle")
+            self._onboard_mission = None
+            return False
+        self._changes_at_upload = changes
+        return True
+
+    async def _count_mission_changes(self):
+        try:
+            async for _ in self.system.mission_raw.mission_changed():
+                self._mission_changes += 1
+        except Exception as e:
+            logger.warning(f"Mission change stream ended: {e}")
+        self._onboard_mission = None
+
     async def start_mission(self) -> None:
         try:
             await self.system.mission_raw.start_mission()
@@ -80,6 +207,7 @@ class MavsdkController:
             raise DroneStartMissionException(e)
 
     async def cancel_mission(self) -> None:
+        self._onboard_mission = None
         try:
             await self.system.mission_raw.clear_mission()
             await self.system.action.return_to_launch()
@@ -159,3 +287,35 @@ class MavsdkController:
             signal_strength_raw,
             seconds,
         )
+
+
+def _items_digest(items: List[MissionItem]) -> str:
+    """
+    Digest of the items as the vehicle stores them: ``current`` is left out
+    and the float fields are compared at the float32 precision they travel
+    in, so a copy read back from the vehicle matches the one we uploaded.
+    """
+    digest = hashlib.sha256()
+    for item in items:
+        fields = (
+            item.seq,
+            item.frame,
+            item.command,
+            item.autocontinue,
+            *map(_float32, (item.param1, item.param2, item.param3, item.param4)),
+            item.x,
+            item.y,
+            _float32(item.z),
+            item.mission_type,
+        )
+        digest.update(repr(fields).encode())
+    return digest.hexdigest()
+
+
+def _float32(value: float) -> Optional[float]:
+    if math.isnan(value):
+        return None
+    try:
+        return struct.unpack("<f", struct.pack("<f", value))[0]
+    except OverflowError:
+        return value
@@ -0,0 +1,170 @@
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from awsiot.iotjobs import (
+    JobExecutionData,
+    JobExecutionSummary,
+    NextJobExecutionChangedEvent,
+)
+from loguru import logger
+from pydantic import ValidationError
+
+from src.core.mqtt_manager import ThingJobs
+from src.models.job_document import Job
+
+
+class JobCache:
+    """
+    Parsed job documents and coalesced IoT Jobs lookups.
+
+    A job's document cannot change once the job is created, so each one is
+    fetched with ``describe_job`` and validated once, then served from an
+    LRU of ``max_entries`` job ids; an invalid document is cached as None.
+    Concurrent lookups of the same document, and concurrent
+    ``next_job`` calls, share one request.
+
+    Notifications that already carry what a lookup would return skip the
+    round trip: ``jobs/notify`` lists the queued executions, and
+    ``jobs/notify-next`` (as a payload or a stream event) includes the next
+    execution with its document.
+    """
+
+    def __init__(self, thing_jobs: ThingJobs, max_entries: int = 64) -> None:
+        self.thing_jobs = thing_jobs
+        self.max_entries = max_entries
+        self._documents: OrderedDict[str, Optional[Job]] = OrderedDict()
+        self._lookups: Dict[str, asyncio.Future] = {}
+        self._next: Optional[asyncio.Future] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.from_notifications = 0
+
+    async def next_job(
+        self, notification: Optional[bytes] = None
+    ) -> Optional[JobExecutionSummary]:
+        """The next queued execution, from ``notification`` when it says."""
+        if notification is not None:
+            try:
+                summary = self.from_notification(notification)
+                self.from_notifications += 1
+                return summary
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.debug(f"Notification without job details: {e}")
+
+        if self._next is None:
+            self._next = asyncio.ensure_future(self.thing_jobs.get_next_queued_job())
+            self._next.add_done_callback(self._clear_next)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(self._next)
+
+    async def document(self, job_id: str) -> Optional[Job]:
+        """The validated document of ``job_id``, None if it is invalid."""
+        if job_id in self._documents:
+            self.hits += 1
+            self._documents.move_to_end(job_id)
+            return self._documents[job_id]
+
+        lookup = self._lookups.get(job_id)
+        if lookup is not None:
+            self.coalesced += 1
+            return await asyncio.shield(lookup)
+
+        self.misses += 1
+        lookup = asyncio.ensure_future(self._describe(job_id))
+        self._lookups[job_id] = lookup
+        lookup.add_done_callback(lambda f: self._clear_lookup(job_id, f))
+        return await asyncio.shield(lookup)
+
+    def from_notification(self, payload) -> Optional[JobExecutionSummary]:
+        """
+        Parse a ``notify`` or ``notify-next`` payload, or a notify-next
+        stream event, into the next queued execution, caching its document
+        when included. Raises if the payload is not one of those.
+        """
+        if isinstance(payload, NextJobExecutionChangedEvent):
+            return self._next_execution(payload.execution)
+        if hasattr(payload, "tobytes"):
+            payload = payload.tobytes()
+        message = json.loads(payload)
+
+        if "execution" in message:
+            return self._next_execution(
+                JobExecutionData.from_payload(message["execution"])
+            )
+
+        if "jobs" in message:
+            queued = message["jobs"].get("QUEUED") or []
+            return JobExecutionSummary.from_payload(queued[0]) if queued else None
+
+        if "timestamp" in message:
+            # notify-next without an execution: nothing is pending
+            return None
+        raise ValueError("Not a job notification")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._documents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "from_notifications": self.from_notifications,
+        }
+
+    def _next_execution(
+        self, execution: Optional[JobExecutionData]
+    ) -> Optional[JobExecutionSummary]:
+        if execution is None:
+            return None
+        if execution.job_document is not None:
+            self._store(execution.job_id, _validate(execution.job_document))
+        if (execution.status or "QUEUED") != "QUEUED":
+            # queued executions may follow the one in progress
+            raise ValueError(f"Next execution is {execution.status}")
+        return JobExecutionSummary(
+            job_id=execution.job_id,
+            execution_number=execution.execution_number,
+            version_number=execution.version_number,
+            queued_at=execution.queued_at,
+            started_at=execution.started_at,
+            last_updated_at=execution.last_updated_at,
+        )
+
+    async def _describe(self, job_id: str) -> Optional[Job]:
+        response = await self.thing_jobs.describe_job(job_id)
+        document = self.thing_jobs.get_job_document(response)
+        self._store(job_id, document)
+        return document
+
+    def _store(self, job_id: str, document: Optional[Job]) -> None:
+        self._documents[job_id] = document
+        self._documents.move_to_end(job_id)
+        while len(self._documents) > self.max_entries:
+            self._documents.popitem(last=False)
+
+    def _clear_lookup(self, job_id: str, future: asyncio.Future) -> None:
+        if self._lookups.get(job_id) is future:
+            del self._lookups[job_id]
+        self._done(future)
+
+    def _clear_next(self, future: asyncio.Future) -> None:
+        if self._next is future:
+            self._next = None
+        self._done(future)
+
+    @staticmethod
+    def _done(future: asyncio.Future) -> None:
+        # Callers may have stopped waiting; mark the outcome as retrieved.
+        if not future.cancelled():
+            future.exception()
+
+
+def _validate(document: dict) -> Optional[Job]:
+    try:
+        return Job.model_validate(document)
+    except ValidationError:
+        return None
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from loguru import logger
+
+from src.core.job_cache import JobCache
+from src.core.mqtt_manager import ThingJobs
+from src.utils.download_handler import DownloadedMission, MissionDownloader
+from src.utils.mission_plan import MissionPlanParser
+
+
+@dataclass
+class StagedMission:
+    job_id: str
+    directory: str
+    mission: DownloadedMission
+    size: int
+    staged_at: float = field(default_factory=time.time)
+
+
+class MissionPrefetcher:
+    """
+    Downloads and extracts the missions of queued jobs ahead of time.
+
+    ``look_ahead`` fetches the missions of the next ``depth`` queued jobs
+    into ``staging_dir/<job_id>/`` in the background, normally while the
+    current mission flies, and parses them, so starting the next job only
+    needs the MAVSDK upload. Staged missions are kept within ``max_bytes``:
+    the size a fetch will write is reserved before it starts, from the
+    bundle's central directory or Content-Length, and a mission that does
+    not fit is skipped without downloading it. Missions of jobs that left
+    the queue are evicted on the next look-ahead. ``claim`` hands a staged
+    mission to the job that runs it, waiting for a download that is still
+    in progress, and ``release`` deletes it once the job is done.
+    """
+
+    def __init__(
+        self,
+        thing_jobs: ThingJobs,
+        jobs: JobCache,
+        downloader: MissionDownloader,
+        plans: MissionPlanParser,
+        member_name: str,
+        staging_dir: str = "/tmp/missions/staging",
+        max_bytes: int = 512 << 20,
+        depth: int = 1,
+    ) -> None:
+        self.thing_jobs = thing_jobs
+        self.jobs = jobs
+        self.downloader = downloader
+        self.plans = plans
+        self.member_name = member_name
+        self.staging_dir = staging_dir
+        self.max_bytes = max_bytes
+        self.depth = depth
+
+        self._staged: Dict[str, StagedMission] = {}
+        self._claimed: Dict[str, StagedMission] = {}
+        self._fetches: Dict[str, asyncio.Task] = {}
+        # bytes reserved by fetches in progress
+        self._reserved: Dict[str, int] = {}
+        self._look_ahead: Optional[asyncio.Task] = None
+
+        self.prefetched = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.error_count = 0
+        self.last_error: Optional[Exception] = None
+
+    @property
+    def staged_bytes(self) -> int:
+        return (
+            sum(m.size for m in self._staged.values())
+            + sum(m.size for m in self._claimed.values())
+            + sum(self._reserved.values())
+        )
+
+    def look_ahead(self, running_job_id: Optional[str] = None) -> None:
+        """Start prefetching the next queued jobs unless already looking."""
+        if self._look_ahead is None or self._look_ahead.done():
+            self._look_ahead = asyncio.create_task(
+                self._prefetch_queued(running_job_id)
+            )
+
+    async def claim(self, job_id: str) -> Optional[DownloadedMission]:
+        """The staged mission of ``job_id``, None if it was not prefetched."""
+        if job_id not in self._staged and job_id not in self._fetches:
+            # the look-ahead may not have reached this job yet
+            if self._look_ahead is not None:
+                await asyncio.gather(self._look_ahead, return_exceptions=True)
+        fetch = self._fetches.get(job_id)
+        if fetch is not None:
+            await asyncio.gather(fetch, return_exceptions=True)
+
+        staged = self._staged.pop(job_id, None)
+        if staged is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._claimed[job_id] = staged
+        return staged.mission
+
+    def release(self, job_id: str) -> None:
+        staged = self._claimed.pop(job_id, None) or self._staged.pop(job_id, None)
+        if staged:
+            shutil.rmtree(staged.directory, ignore_errors=True)
+
+    async def stop(self):
+        tasks = [t for t in (self._look_ahead, *self._fetches.values()) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for job_id in list(self._staged):
+            self.release(job_id)
+        logger.info(
+            f"Mission prefetch: {self.prefetched} staged, {self.hits} used, "
+            f"{self.misses} missed, {self.evicted} evicted"
+        )
+
+    async def _prefetch_queued(self, running_job_id: Optional[str]):
+        try:
+            queued = await self.thing_jobs.get_queued_jobs()
+        except Exception as e:
+            self.error_count += 1
+            self.last_error = e
+            return
+
+        queued_ids = {summary.job_id for summary in queued}
+        for job_id in [j for j in self._staged if j not in queued_ids]:
+            self.release(job_id)
+            self.evicted += 1
+
+        upcoming = [s.job_id for s in queued if s.job_id != running_job_id]
+        for job_id in upcoming[: self.depth]:
+            if job_id in self._staged:
+                continue
+            if job_id not in self._fetches:
+                self._fetches[job_id] = asyncio.create_task(self._prefetch(job_id))
+            await asyncio.gather(self._fetches[job_id], return_exceptions=True)
+
+    async def _prefetch(self, job_id: str):
+        directory = os.path.join(self.staging_dir, job_id) + "/"
+        try:
+            document = await self.jobs.document(job_id)
+            if document is None or document.operation != "DOWNLOAD":
+                return
+
+            member_sha256 = document.data.member_sha256.get(self.member_name)
+            expected = await self.downloader.mission_size(
+                document.data.download_url,
+                self.member_name,
+                document.data.sha256,
+                member_sha256,
+            )
+            if expected is not None and self.staged_bytes + expected > self.max_bytes:
+                logger.info(f"No staging room for {job_id} ({expected} B), skipping")
+                return
+            self._reserved[job_id] = expected or 0
+
+            started = time.monotonic()
+            mission = await self.downloader.download_mission(
+                document.data.download_url,
+                directory,
+                self.member_name,
+                document.data.sha256,
+                member_sha256=member_sha256,
+            )
+            # parsed and validated now, the upload finds it in the plan cache
+            self.plans.load_bytes(mission.content)
+
+            size = sum(
+                os.path.getsize(os.path.join(directory, name))
+                for name in os.listdir(directory)
+            )
+            # the estimate may have been missing or short
+            del self._reserved[job_id]
+            if self.staged_bytes + size > self.max_bytes:
+                logger.info(f"No staging room for {job_id} ({size} B), skipping")
+                shutil.rmtree(directory, ignore_errors=True)
+                return
+
+            self._staged[job_id] = StagedMission(job_id, directory, mission, size)
+            self.prefetched += 1
+            logger.info(
+                f"Prefetched mission of {job_id} in "
+                f"{time.monotonic() - started:.1f} s ({size} B)"
+            )
+        except asyncio.CancelledError:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        except Exception as e:
+            self.error_count += 1
+            self.last_error = e
+            logger.warning(f"Prefetch of {job_id} failed: {e}")
+            shutil.rmtree(directory, ignore_errors=True)
+        finally:
+            self._reserved.pop(job_id, None)
+            self._fetches.pop(job_id, None)
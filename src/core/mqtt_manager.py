@@ -1,18 +1,30 @@
 import asyncio
-from typing import Optional, Dict, Callable
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Optional, Dict, Callable, List
 
 from awscrt import mqtt5, mqtt_request_response
-from awsiot import mqtt5_client_builder, iotjobs
+from awsiot import mqtt5_client_builder, iotjobs, ServiceStreamOptions
 from awsiot.iotjobs import (
+    NextJobExecutionChangedEvent,
     JobExecutionSummary,
     DescribeJobExecutionResponse,
 )
 from loguru import logger
 from pydantic import ValidationError
 
+from src.core.offline_queue import OfflineQueue
+from src.core.topic_router import TopicRouter
+from src.enums.connection_state import ConnectionState
 from src.enums.job_status import JobStatus
 from src.exceptions.mqtt_exceptions import MqttConnectionException, MqttPublishException
 from src.models.job_document import Job
+from src.utils.metrics import LatencyHistogram
+
+# offline queue messages sent before waiting for their PUBACKs
+_DRAIN_WINDOW = 32
 
 
 class MqttManager:
@@ -24,13 +36,86 @@ class MqttManager:
         endpoint: str,
         thing_name: str,
         timeout: int,
+        max_in_flight: int = 100,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        offline_queue: Optional[OfflineQueue] = None,
+        offline_drain_rate: float = 50.0,
+        min_reconnect_delay_ms: int = 1000,
+        max_reconnect_delay_ms: int = 60000,
+        local_port: Optional[int] = None,
+        thing_count: int = 1,
     ):
         self.thing_name = thing_name
         self.timeout = timeout
-        self._subscriptions: Dict[str, Callable] = {}
+        self.router = TopicRouter()
+        self.dispatch_errors = 0
         self._connected_future = asyncio.Future()
+        self.connected = False
+        self.state = ConnectionState.STOPPED
+        self._connected_event = asyncio.Event()
+        self._state_listeners: List[
+            Callable[[ConnectionState, Optional[Exception]], None]
+        ] = []
+
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.in_flight_by_topic: Dict[str, int] = defaultdict(int)
+        self.publishes_acked = 0
+        self.publishes_failed = 0
+        self.last_publish_error: Optional[Exception] = None
+        self.publish_latency = LatencyHistogram()
+        self._publish_lock = threading.Lock()
+        self._window_free = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = loop
+
+        self.offline_queue = offline_queue
+        self.offline_drain_rate = offline_drain_rate
+        self._drain_task: Optional[asyncio.Task] = None
+
+        self.request_latency: Dict[str, LatencyHistogram] = defaultdict(
+            LatencyHistogram
+        )
+        self.request_failures: Dict[str, int] = defaultdict(int)
+
+        if local_port:
+            self.client = self._local_client(
+                endpoint,
+                local_port,
+                thing_name,
+                min_reconnect_delay_ms,
+                max_reconnect_delay_ms,
+            )
+        else:
+            self.client = self._mtls_client(
+                cert_path,
+                private_key_path,
+                ca_file_path,
+                endpoint,
+                thing_name,
+                min_reconnect_delay_ms,
+                max_reconnect_delay_ms,
+            )
+
+        rr_options = mqtt_request_response.ClientOptions(
+            max_request_response_subscriptions=2 * thing_count,
+            max_streaming_subscriptions=2 * thing_count,
+            operation_timeout_in_seconds=timeout,
+        )
+
+        self.jobs_client = iotjobs.IotJobsClientV2(self.client, rr_options)
+        self.jobs = ThingJobs(self, thing_name)
 
-        self.client = mqtt5_client_builder.mtls_from_path(
+    def _mtls_client(
+        self,
+        cert_path: str,
+        private_key_path: str,
+        ca_file_path: str,
+        endpoint: str,
+        thing_name: str,
+        min_reconnect_delay_ms: int,
+        max_reconnect_delay_ms: int,
+    ) -> mqtt5.Client:
+        return mqtt5_client_builder.mtls_from_path(
             endpoint=endpoint,
             cert_filepath=cert_path,
             pri_key_filepath=private_key_path,
@@ -38,20 +123,49 @@ class MqttManager:
             client_id=thing_name,
             clean_session=False,
             session_expiry_interval_sec=3600,
+            min_reconnect_delay_ms=min_reconnect_delay_ms,
+            max_reconnect_delay_ms=max_reconnect_delay_ms,
             on_publish_received=self._on_publish_received,
             on_lifecycle_stopped=self._on_lifecycle_stopped,
+            on_lifecycle_attempting_connect=self._on_lifecycle_attempting_connect,
             on_lifecycle_connection_success=self._on_lifecycle_connection_success,
             on_lifecycle_connection_failure=self._on_lifecycle_connection_failure,
+            on_lifecycle_disconnection=self._on_lifecycle_disconnection,
         )
 
-        rr_options = mqtt_request_response.ClientOptions(
-            max_request_response_subscriptions=2,
-            max_streaming_subscriptions=2,
-            operation_timeout_in_seconds=timeout,
+    def _local_client(
+        self,
+        host: str,
+        port: int,
+        thing_name: str,
+        min_reconnect_delay_ms: int,
+        max_reconnect_delay_ms: int,
+    ) -> mqtt5.Client:
+        """Plain TCP client for a local broker such as ``sim.iot_jobs``."""
+        return mqtt5.Client(
+            mqtt5.ClientOptions(
+                host_name=host,
+                port=port,
+                connect_options=mqtt5.ConnectPacket(
+                    client_id=thing_name, session_expiry_interval_sec=3600
+                ),
+                min_reconnect_delay_ms=min_reconnect_delay_ms,
+                max_reconnect_delay_ms=max_reconnect_delay_ms,
+                on_publish_callback_fn=self._on_publish_received,
+                on_lifecycle_event_stopped_fn=self._on_lifecycle_stopped,
+                on_lifecycle_event_attempting_connect_fn=(
+                    self._on_lifecycle_attempting_connect
+                ),
+                on_lifecycle_event_connection_success_fn=(
+                    self._on_lifecycle_connection_success
+                ),
+                on_lifecycle_event_connection_failure_fn=(
+                    self._on_lifecycle_connection_failure
+                ),
+                on_lifecycle_event_disconnection_fn=self._on_lifecycle_disconnection,
+            )
         )
 
-        self.jobs_client = iotjobs.IotJobsClientV2(self.client, rr_options)
-
     def _on_publish_received(self, publish_packet_data):
         publish_packet = publish_packet_data.publish_packet
         if not publish_packet:
@@ -64,26 +178,99 @@ class MqttManager:
         payload = publish_packet.payload
         logger.debug(f"Received message on {topic}")
 
-        callback = self._subscriptions.get(topic)
-        if callback:
-            callback(topic, payload)
+        for handler in self.router.match(topic):
+            if self._loop:
+                self._loop.call_soon_threadsafe(self._dispatch, handler, topic, payload)
+            else:
+                self._dispatch(handler, topic, payload)
+
+    def _dispatch(self, handler: Callable, topic: str, payload) -> None:
+        try:
+            handler(topic, payload)
+        except Exception as e:
+            self.dispatch_errors += 1
+            logger.error(f"Handler for {topic} failed: {e}")
+
+    def _invoke(self, callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            self.dispatch_errors += 1
+            logger.error(f"Callback {callback} failed: {e}")
 
     def _on_lifecycle_stopped(self, stop_event_data):
         logger.info("MQTT Client stopped")
+        self.connected = False
+        self._notify(ConnectionState.STOPPED)
+
+    def _on_lifecycle_attempting_connect(self, attempting_connect_data):
+        self._notify(ConnectionState.CONNECTING)
 
     def _on_lifecycle_connection_success(self, success_event_data):
         logger.info("MQTT Connection Success")
-        if not self._connected_future.done():
-            self._connected_future.set_result(True)
+        self.connected = True
+        self._notify(ConnectionState.CONNECTED)
+        if self.offline_queue and self._loop:
+            self._loop.call_soon_threadsafe(self._start_drain)
+
+    def _on_lifecycle_disconnection(self, disconnect_event_data):
+        logger.warning(f"MQTT Disconnected: {disconnect_event_data.exception}")
+        self.connected = False
+        self._notify(ConnectionState.DISCONNECTED, disconnect_event_data.exception)
 
     def _on_lifecycle_connection_failure(self, failure_event_data):
         logger.error(f"MQTT Connection Failure: {failure_event_data.exception}")
-        if not self._connected_future.done():
-            self._connected_future.set_exception(failure_event_data.exception)
+        self.connected = False
+        self._notify(ConnectionState.FAILED, failure_event_data.exception)
+
+    def add_state_listener(
+        self, listener: Callable[[ConnectionState, Optional[Exception]], None]
+    ) -> None:
+        """Call ``listener(state, error)`` on the event loop on every transition."""
+        self._state_listeners.append(listener)
+
+    def _notify(self, state: ConnectionState, error: Optional[Exception] = None):
+        """Runs on the CRT thread, hands the transition to the event loop."""
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._set_state, state, error)
+        else:
+            self._set_state(state, error)
+
+    def _set_state(self, state: ConnectionState, error: Optional[Exception]):
+        self.state = state
+        if state == ConnectionState.CONNECTED:
+            self._connected_event.set()
+            if not self._connected_future.done():
+                self._connected_future.set_result(True)
+        else:
+            self._connected_event.clear()
+            if state == ConnectionState.FAILED and not self._connected_future.done():
+                self._connected_future.set_exception(error)
+
+        for listener in self._state_listeners:
+            try:
+                listener(state, error)
+            except Exception as e:
+                logger.error(f"Connection state listener failed: {e}")
+
+    async def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        """Wait until connected, False if ``timeout`` passes first."""
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def restart(self) -> None:
+        """Stop and start the client, dropping any reconnect backoff."""
+        logger.info("Restarting MQTT client")
+        self.client.stop()
+        self.client.start()
 
     async def connect(self) -> None:
         try:
             logger.info(f"Connecting MQTT5 client: {self.thing_name}")
+            self._loop = self._loop or asyncio.get_running_loop()
             self.client.start()
             await asyncio.wait_for(self._connected_future, timeout=self.timeout)
         except Exception as e:
@@ -92,10 +279,30 @@ class MqttManager:
 
     async def disconnect(self) -> None:
         self.client.stop()
+        if self.offline_queue:
+            self.offline_queue.journal.sync()
+            self.offline_queue.log_backlog()
+        latency = self.publish_latency.snapshot()
+        logger.info(
+            f"MQTT publishes: {self.publishes_acked} acked, "
+            f"{self.publishes_failed} failed, {self.in_flight} in flight, "
+            f"p95 ack latency {(latency['p95_s'] or 0) * 1000:.0f} ms"
+        )
+        for operation, metrics in self.request_metrics().items():
+            logger.info(
+                f"{operation}: {metrics['count']} ok, {metrics['failures']} failed, "
+                f"p95 {(metrics['p95_s'] or 0) * 1000:.0f} ms"
+            )
 
     async def subscribe(self, topic: str, callback: Callable):
+        """
+        Subscribe ``callback`` to a topic filter, which may contain ``+`` and
+        ``#`` wildcards. Callbacks run on the event loop as
+        ``callback(topic, payload)``, every matching filter's callbacks are
+        called.
+        """
         logger.info(f"Subscribing to {topic}...")
-        self._subscriptions[topic] = callback
+        self.router.add(topic, callback)
 
         subscribe_packet = mqtt5.SubscribePacket(
             subscriptions=[
@@ -104,31 +311,303 @@ class MqttManager:
         )
 
         try:
-            future = self.client.subscribe(subscribe_packet)
-            await asyncio.to_thread(future.result, self.timeout)
+            await asyncio.wait_for(
+                self._request("subscribe", self.client.subscribe(subscribe_packet)),
+                self.timeout,
+            )
             logger.info(f"Subscribed to {topic}")
         except Exception as e:
             logger.warning(f"Subscription to {topic} timed out or failed: {e}")
             if not isinstance(e, TimeoutError):
                 pass
 
-    def publish(self, topic: str, message: str):
+    def publish(
+        self, topic: str, message: str | bytes, content_type: Optional[str] = None
+    ) -> Future:
+        """
+        Publish at QoS1 without waiting. The returned future completes with
+        the PUBACK; the outcome is counted in the publish metrics either way.
+
+        With an ``offline_queue``, publishes made while disconnected, or
+        while an earlier backlog is still draining, are queued instead and
+        sent in order at ``offline_drain_rate`` once connected.
+        """
+        if self.offline_queue and (not self.connected or self.offline_queue.pending):
+            return self.offline_queue.put(topic, message, content_type)
+        return self._publish_now(topic, message, content_type)
+
+    def _publish_now(
+        self, topic: str, message: str | bytes, content_type: Optional[str] = None
+    ) -> Future:
         try:
+            if isinstance(message, str):
+                payload = message.encode("utf-8")
+                payload_format = mqtt5.PayloadFormatIndicator.AWS_MQTT5_PFI_UTF8
+            else:
+                payload = message
+                payload_format = mqtt5.PayloadFormatIndicator.AWS_MQTT5_PFI_BYTES
+
             publish_packet = mqtt5.PublishPacket(
                 topic=topic,
-                payload=message.encode("utf-8"),
+                payload=payload,
                 qos=mqtt5.QoS.AT_LEAST_ONCE,
+                payload_format_indicator=payload_format,
+                content_type=content_type,
             )
-            self.client.publish(publish_packet)
+            started = time.monotonic()
+            future = self.client.publish(publish_packet)
+        except Exception as e:
+            raise MqttPublishException(e)
+
+        with self._publish_lock:
+            self.in_flight += 1
+            self.in_flight_by_topic[topic] += 1
+        future.add_done_callback(lambda f: self._on_publish_complete(topic, started, f))
+        return future
+
+    def _start_drain(self) -> None:
+        if self.offline_queue.pending and (
+            self._drain_task is None or self._drain_task.done()
+        ):
+            self.offline_queue.log_backlog()
+            self._drain_task = asyncio.create_task(self._drain_offline_queue())
+
+    async def _drain_offline_queue(self):
+        """
+        Send the backlog in windows of ``_DRAIN_WINDOW`` messages, paced at
+        ``offline_drain_rate``. Messages leave the queue only once their
+        PUBACK arrived; if the link drops first they stay queued and are
+        sent again by the drain after the next connection.
+        """
+        queue = self.offline_queue
+        while self.connected and queue.pending:
+            items = queue.peek(_DRAIN_WINDOW)
+            sent = []
+            for item in items:
+                if not self.connected:
+                    break
+                try:
+                    future = self._publish_now(
+                        item.topic, item.message, item.content_type
+                    )
+                except MqttPublishException as e:
+                    logger.warning(f"Offline queue drain paused: {e}")
+                    break
+                sent.append((item, future))
+                await asyncio.sleep(1.0 / self.offline_drain_rate)
+
+            delivered = []
+            for item, future in sent:
+                try:
+                    await asyncio.wrap_future(future)
+                except Exception as e:
+                    logger.warning(f"Offline queue drain paused: {e}")
+                    break
+                # a PUBACK error is the broker's answer, sending again won't change it
+                delivered.append(item)
+                if item.future:
+                    _chain_future(future, item.future)
+
+            queue.pop(delivered)
+            if len(delivered) < len(items):
+                return
+
+        if not queue.pending:
+            logger.info("Offline MQTT queue drained")
+
+    async def publish_async(
+        self, topic: str, message: str | bytes, content_type: Optional[str] = None
+    ) -> asyncio.Future:
+        """
+        Publish once fewer than ``max_in_flight`` publishes await their
+        PUBACK, waiting for room otherwise. Returns an awaitable that
+        resolves to the ``PublishCompletionData`` or raises
+        ``MqttPublishException`` if the broker rejected the message.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        while self.in_flight >= self.max_in_flight:
+            self._window_free.clear()
+            await self._window_free.wait()
+
+        future = self.publish(topic, message, content_type)
+        return asyncio.ensure_future(self._acknowledged(future))
+
+    async def _acknowledged(self, future: Future) -> mqtt5.PublishCompletionData:
+        try:
+            completion = await asyncio.wrap_future(future)
         except Exception as e:
             raise MqttPublishException(e)
 
+        error = self._puback_error(completion)
+        if error:
+            raise error
+        return completion
+
+    @staticmethod
+    def _puback_error(
+        completion: mqtt5.PublishCompletionData,
+    ) -> Optional[MqttPublishException]:
+        puback = completion.puback if completion else None
+        if puback and puback.reason_code >= 128:
+            return MqttPublishException(
+                f"PUBACK {mqtt5.PubackReasonCode(puback.reason_code).name}"
+            )
+        return None
+
+    def _on_publish_complete(self, topic: str, started: float, future: Future):
+        """Runs on the CRT event loop thread."""
+        if future.cancelled():
+            error = MqttPublishException("publish cancelled")
+        else:
+            error = future.exception()
+        if error is None:
+            error = self._puback_error(future.result())
+
+        with self._publish_lock:
+            self.in_flight -= 1
+            self.in_flight_by_topic[topic] -= 1
+            if not self.in_flight_by_topic[topic]:
+                del self.in_flight_by_topic[topic]
+
+            if error is None:
+                self.publishes_acked += 1
+            else:
+                self.publishes_failed += 1
+                self.last_publish_error = error
+
+        if error is None:
+            self.publish_latency.record(time.monotonic() - started)
+        else:
+            logger.warning(f"Publish to {topic} failed: {error}")
+
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._window_free.set)
+
+    def stream_next_job(
+        self,
+        on_event: Callable[[NextJobExecutionChangedEvent], None],
+        on_subscription: Callable[[bool], None],
+    ) -> None:
+        """``ThingJobs.stream_next_job`` for this connection's thing."""
+        self.jobs.stream_next_job(on_event, on_subscription)
+
+    async def get_next_queued_job(self) -> Optional[JobExecutionSummary]:
+        return await self.jobs.get_next_queued_job()
+
+    async def get_queued_jobs(self) -> List[JobExecutionSummary]:
+        return await self.jobs.get_queued_jobs()
+
+    async def describe_job(self, job_id: str) -> DescribeJobExecutionResponse:
+        return await self.jobs.describe_job(job_id)
+
+    def get_job_document(
+        self, job_response: DescribeJobExecutionResponse
+    ) -> Optional[Job]:
+        return ThingJobs.get_job_document(job_response)
+
+    async def update_job_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        status_details: Optional[Dict[str, str]] = None,
+    ) -> None:
+        await self.jobs.update_job_status(job_id, status, status_details)
+
+    def for_thing(self, thing_name: str) -> "ThingJobs":
+        """The IoT Jobs API of another thing, over this connection."""
+        return ThingJobs(self, thing_name)
+
+    async def _request(self, operation: str, future: Future):
+        """
+        Await a CRT future on the event loop, its done-callback resolves the
+        asyncio side so no thread waits on it. Latency is recorded per
+        ``operation``. Cancelling the caller leaves the CRT future alone, the
+        SDK completes it later and fails if it was cancelled.
+        """
+        started = time.monotonic()
+        try:
+            result = await asyncio.shield(asyncio.wrap_future(future))
+        except BaseException:
+            self.request_failures[operation] += 1
+            raise
+
+        self.request_latency[operation].record(time.monotonic() - started)
+        return result
+
+    def request_metrics(self) -> Dict[str, dict]:
+        return {
+            operation: {
+                **self.request_latency[operation].snapshot(),
+                "failures": self.request_failures[operation],
+            }
+            for operation in self.request_latency.keys() | self.request_failures.keys()
+        }
+
+
+class ThingJobs:
+    """
+    IoT Jobs requests and the notify-next stream for ``thing_name``, made
+    over ``mqtt``'s connection and counted in its request metrics. Lets one
+    agent manage several vehicles, each with its own thing.
+    """
+
+    def __init__(self, mqtt: MqttManager, thing_name: str) -> None:
+        self.mqtt = mqtt
+        self.thing_name = thing_name
+        self._next_job_stream: Optional[mqtt_request_response.StreamingOperation] = None
+
+    def stream_next_job(
+        self,
+        on_event: Callable[[NextJobExecutionChangedEvent], None],
+        on_subscription: Callable[[bool], None],
+    ) -> None:
+        """
+        Open the ``jobs/notify-next`` stream. ``on_event`` gets each event,
+        ``on_subscription(True)`` is called whenever the subscription is
+        (re-)established and ``on_subscription(False)`` when it is lost;
+        events published in between are missed. Both run on the event loop.
+        """
+        mqtt = self.mqtt
+        mqtt._loop = mqtt._loop or asyncio.get_running_loop()
+        established = (
+            mqtt_request_response.SubscriptionStatusEventType.SUBSCRIPTION_ESTABLISHED
+        )
+
+        def on_status(event: mqtt_request_response.SubscriptionStatusEvent):
+            if event.type != established:
+                logger.warning(f"notify-next {event.type.name}: {event.error}")
+            mqtt._loop.call_soon_threadsafe(
+                mqtt._invoke, on_subscription, event.type == established
+            )
+
+        options = ServiceStreamOptions(
+            incoming_event_listener=lambda event: mqtt._loop.call_soon_threadsafe(
+                mqtt._invoke, on_event, event
+            ),
+            subscription_status_listener=on_status,
+        )
+        request = iotjobs.NextJobExecutionChangedSubscriptionRequest(
+            thing_name=self.thing_name
+        )
+        self._next_job_stream = (
+            mqtt.jobs_client.create_next_job_execution_changed_stream(request, options)
+        )
+        self._next_job_stream.open()
+
     async def get_next_queued_job(self) -> Optional[JobExecutionSummary]:
+        queued = await self.get_queued_jobs()
+        return queued[0] if queued else None
+
+    async def get_queued_jobs(self) -> List[JobExecutionSummary]:
         try:
             req = iotjobs.GetPendingJobExecutionsRequest(thing_name=self.thing_name)
-            future = self.jobs_client.get_pending_job_executions(req)
-            response = await asyncio.to_thread(future.result)
-            return response.queued_jobs[0] if response.queued_jobs else None
+            response = await self.mqtt._request(
+                "get_pending_job_executions",
+                self.mqtt.jobs_client.get_pending_job_executions(req),
+            )
+            return response.queued_jobs or []
         except Exception as e:
             logger.error(f"Failed to get pending jobs: {e}")
             raise
@@ -137,12 +616,12 @@ class MqttManager:
         req = iotjobs.DescribeJobExecutionRequest(
             thing_name=self.thing_name, job_id=job_id
         )
-        future = self.jobs_client.describe_job_execution(req)
-        return await asyncio.to_thread(future.result)
+        return await self.mqtt._request(
+            "describe_job_execution", self.mqtt.jobs_client.describe_job_execution(req)
+        )
 
-    def get_job_document(
-        self, job_response: DescribeJobExecutionResponse
-    ) -> Optional[Job]:
+    @staticmethod
+    def get_job_document(job_response: DescribeJobExecutionResponse) -> Optional[Job]:
         try:
             if not job_response or not job_response.execution:
                 return None
@@ -150,9 +629,29 @@ class MqttManager:
         except ValidationError:
             return None
 
-    async def update_job_status(self, job_id: str, status: JobStatus) -> None:
+    async def update_job_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        status_details: Optional[Dict[str, str]] = None,
+    ) -> None:
         req = iotjobs.UpdateJobExecutionRequest(
-            thing_name=self.thing_name, job_id=job_id, status=status.name
+            thing_name=self.thing_name,
+            job_id=job_id,
+            status=status.name,
+            status_details=status_details,
         )
-        future = self.jobs_client.update_job_execution(req)
-        await asyncio.to_thread(future.result)
+        await self.mqtt._request(
+            "update_job_execution", self.mqtt.jobs_client.update_job_execution(req)
+        )
+
+
+def _chain_future(source: Future, target: Future) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception():
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,183 @@
+import struct
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import cached_property
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.exceptions.mqtt_exceptions import MqttPublishException
+from src.utils.journal import SegmentJournal
+
+_RECORD = struct.Struct("<dBHH")  # queued at, utf-8 flag, topic and content type length
+
+
+@dataclass
+class QueuedPublish:
+    topic: str
+    message: str | bytes
+    content_type: Optional[str] = None
+    queued_at: float = field(default_factory=time.time)
+    future: Optional[Future] = None
+    # position in the journal, counted from the first record ever removed
+    index: Optional[int] = None
+
+    def encode(self) -> bytes:
+        utf8 = isinstance(self.message, str)
+        payload = self.message.encode("utf-8") if utf8 else self.message
+        topic = self.topic.encode("utf-8")
+        content_type = (self.content_type or "").encode("utf-8")
+        return (
+            _RECORD.pack(self.queued_at, utf8, len(topic), len(content_type))
+            + topic
+            + content_type
+            + payload
+        )
+
+    @staticmethod
+    def decode(record: bytes) -> "QueuedPublish":
+        queued_at, utf8, topic_len, content_type_len = _RECORD.unpack_from(record)
+        offset = _RECORD.size
+        topic = record[offset : offset + topic_len].decode("utf-8")
+        offset += topic_len
+        content_type = record[offset : offset + content_type_len].decode("utf-8")
+        payload = record[offset + content_type_len :]
+        return QueuedPublish(
+            topic,
+            payload.decode("utf-8") if utf8 else payload,
+            content_type or None,
+            queued_at,
+        )
+
+    @cached_property
+    def size(self) -> int:
+        """Encoded bytes of the topic and message."""
+        message = self.message
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        return len(message) + len(self.topic.encode("utf-8"))
+
+
+class OfflineQueue:
+    """
+    FIFO of publishes made while MQTT is disconnected.
+
+    Messages are held in memory up to ``memory_limit_bytes``; beyond that,
+    and for as long as anything is on disk, they are appended to the
+    ``journal`` so order is kept and the backlog survives restarts. Each
+    ``put`` returns a future that completes with the publish once it is
+    drained; records recovered from disk after a restart have none.
+
+    Readers ``peek`` the oldest messages and ``pop`` them once delivered,
+    so a message stays queued until its PUBACK arrives. Messages evicted
+    from the journal in between are not popped twice.
+    """
+
+    def __init__(
+        self, journal: SegmentJournal, memory_limit_bytes: int = 1 << 20
+    ) -> None:
+        self.journal = journal
+        self.memory_limit_bytes = memory_limit_bytes
+        self._memory: Deque[QueuedPublish] = deque()
+        self._memory_bytes = 0
+        # (index, future) of the records journaled by this queue, oldest first
+        self._journal_futures: Deque[Tuple[int, Future]] = deque()
+        # journal records committed or evicted so far, the index of the head
+        self._journal_removed = 0
+
+        self.queued = 0
+        self.spilled = 0
+        self.evicted = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._memory) + len(self.journal)
+
+    def put(
+        self, topic: str, message: str | bytes, content_type: Optional[str] = None
+    ) -> Future:
+        item = QueuedPublish(topic, message, content_type, future=Future())
+        self.queued += 1
+
+        if not len(self.journal) and (
+            self._memory_bytes + item.size <= self.memory_limit_bytes
+        ):
+            self._memory.append(item)
+            self._memory_bytes += item.size
+            return item.future
+
+        evicted_before = self.journal.evicted_records
+        self.journal.append(item.encode())
+        self._journal_removed += self.journal.evicted_records - evicted_before
+        self._journal_futures.append(
+            (self._journal_removed + len(self.journal) - 1, item.future)
+        )
+        self.spilled += 1
+
+        while self._journal_futures[0][0] < self._journal_removed:
+            self.evicted += 1
+            _, future = self._journal_futures.popleft()
+            future.set_exception(MqttPublishException("Evicted from the offline queue"))
+        return item.future
+
+    def peek(self, max_items: int = 1) -> List[QueuedPublish]:
+        """Return up to ``max_items`` of the oldest messages, without removing them."""
+        items = list(islice(self._memory, max_items))
+        if len(items) < max_items and len(self.journal):
+            records = self.journal.peek(max_items - len(items))
+            for index, record in enumerate(records, self._journal_removed):
+                item = QueuedPublish.decode(record)
+                item.index = index
+                item.future = self._journal_future(index)
+                items.append(item)
+        return items
+
+    def _journal_future(self, index: int) -> Optional[Future]:
+        # the futures cover the newest records, one per consecutive index
+        if self._journal_futures:
+            position = index - self._journal_futures[0][0]
+            if 0 <= position < len(self._journal_futures):
+                return self._journal_futures[position][1]
+        return None
+
+    def pop(self, items: List[QueuedPublish]) -> None:
+        """Remove ``items``, the oldest messages as returned by ``peek``."""
+        committed = 0
+        for item in items:
+            if item.index is None:
+                if self._memory and self._memory[0] is item:
+                    self._memory.popleft()
+                    self._memory_bytes -= item.size
+            # records evicted since they were peeked are already gone
+            elif item.index == self._journal_removed + committed:
+                committed += 1
+
+        if committed:
+            self.journal.commit(committed)
+            self._journal_removed += committed
+        while (
+            self._journal_futures
+            and self._journal_futures[0][0] < self._journal_removed
+        ):
+            self._journal_futures.popleft()
+
+    def backlog(self) -> Dict[str, float]:
+        oldest = next(iter(self.peek()), None)
+        return {
+            "count": self.pending,
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self.journal.size_bytes,
+            "oldest_age_s": time.time() - oldest.queued_at if oldest else 0.0,
+        }
+
+    def log_backlog(self) -> None:
+        backlog = self.backlog()
+        if backlog["count"]:
+            logger.info(
+                f"Offline MQTT queue: {backlog['count']} messages, "
+                f"{backlog['memory_bytes'] + backlog['disk_bytes']} B, "
+                f"oldest {backlog['oldest_age_s']:.0f} s"
+            )
@@ -0,0 +1,281 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from src.core.mqtt_manager import MqttManager
+from src.enums.publish_priority import PublishPriority
+from src.exceptions.mqtt_exceptions import MqttPublishException
+from src.utils.metrics import LatencyHistogram
+
+
+class _TokenBucket:
+    """Refills at ``rate`` per second up to one second's worth."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.rate, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` may be taken; oversized amounts go into debt."""
+        self._refill(now)
+        needed = min(amount, self.rate)
+        return max(0.0, (needed - self.tokens) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+
+@dataclass
+class _Outbound:
+    priority: PublishPriority
+    size: int
+    send: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class _TrafficClass:
+    def __init__(
+        self,
+        priority: PublishPriority,
+        message_rate: Optional[float],
+        byte_rate: Optional[float],
+        max_in_flight: Optional[int],
+    ) -> None:
+        self.priority = priority
+        self.queue: Deque[_Outbound] = deque()
+        self.messages = _TokenBucket(message_rate) if message_rate else None
+        self.bytes = _TokenBucket(byte_rate) if byte_rate else None
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.queued_bytes = 0
+
+        self.sent = 0
+        self.bytes_sent = 0
+        self.failed = 0
+        self.preempted = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+
+    def wait_time(self, item: _Outbound, now: float) -> float:
+        wait = 0.0
+        if self.messages:
+            wait = max(wait, self.messages.wait_time(1, now))
+        if self.bytes:
+            wait = max(wait, self.bytes.wait_time(item.size, now))
+        return wait
+
+
+class OutboundScheduler:
+    """
+    Orders outbound MQTT traffic by ``PublishPriority``.
+
+    The highest priority class with a sendable message always goes first.
+    Each class may have a message rate and a byte rate (token buckets with
+    one second of burst) and a cap on its in-flight sends, so bulk classes
+    cannot occupy the whole MQTT in-flight window. When more than
+    ``max_queued_bytes`` are waiting, the oldest messages of lower classes
+    are preempted to make room, failing their futures with
+    ``MqttPublishException``; if that is not enough the new message is
+    rejected the same way.
+    """
+
+    def __init__(
+        self,
+        mqtt: MqttManager,
+        message_rates: Optional[Dict[PublishPriority, float]] = None,
+        byte_rates: Optional[Dict[PublishPriority, float]] = None,
+        max_in_flight: Optional[Dict[PublishPriority, int]] = None,
+        max_queued_bytes: int = 4 << 20,
+    ) -> None:
+        self.mqtt = mqtt
+        self.max_queued_bytes = max_queued_bytes
+        self.classes: Dict[PublishPriority, _TrafficClass] = {
+            priority: _TrafficClass(
+                priority,
+                (message_rates or {}).get(priority),
+                (byte_rates or {}).get(priority),
+                (max_in_flight or {}).get(priority),
+            )
+            for priority in PublishPriority
+        }
+
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.error_count = 0
+        self.last_error: Optional[Exception] = None
+
+    @property
+    def queued_bytes(self) -> int:
+        return sum(c.queued_bytes for c in self.classes.values())
+
+    def submit(
+        self,
+        priority: PublishPriority,
+        size: int,
+        send: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Future:
+        """Queue ``send`` and return a future for its result."""
+        item = _Outbound(
+            priority, size, send, asyncio.get_running_loop().create_future()
+        )
+        traffic = self.classes[priority]
+
+        self._preempt(priority, size)
+        if self.queued_bytes and self.queued_bytes + size > self.max_queued_bytes:
+            traffic.rejected += 1
+            item.future.set_exception(
+                MqttPublishException(f"{priority.name} queue full")
+            )
+            return item.future
+
+        traffic.queue.append(item)
+        traffic.queued_bytes += size
+        self._wakeup.set()
+        return item.future
+
+    def publish(
+        self,
+        priority: PublishPriority,
+        topic: str,
+        message: str | bytes,
+        content_type: Optional[str] = None,
+    ) -> asyncio.Future:
+        """Queue a publish, the future resolves once it is acknowledged."""
+
+        async def send():
+            ack = await self.mqtt.publish_async(topic, message, content_type)
+            return await ack
+
+        return self.submit(priority, len(message), send)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for traffic in self.classes.values():
+            while traffic.queue:
+                item = traffic.queue.popleft()
+                if not item.future.done():
+                    item.future.set_exception(
+                        MqttPublishException("Outbound scheduler stopped")
+                    )
+            traffic.queued_bytes = 0
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            traffic.priority.name: {
+                "queued": len(traffic.queue),
+                "queued_bytes": traffic.queued_bytes,
+                "in_flight": traffic.in_flight,
+                "sent": traffic.sent,
+                "bytes_sent": traffic.bytes_sent,
+                "failed": traffic.failed,
+                "preempted": traffic.preempted,
+                "rejected": traffic.rejected,
+                "queue_wait": traffic.queue_wait.snapshot(),
+            }
+            for traffic in self.classes.values()
+        }
+
+    def _preempt(self, priority: PublishPriority, size: int) -> None:
+        for lower in sorted(self.classes, reverse=True):
+            if lower <= priority:
+                return
+
+            traffic = self.classes[lower]
+            while traffic.queue and self.queued_bytes + size > self.max_queued_bytes:
+                item = traffic.queue.popleft()
+                traffic.queued_bytes -= item.size
+                traffic.preempted += 1
+                item.future.set_exception(
+                    MqttPublishException(f"{lower.name} preempted by {priority.name}")
+                )
+
+    async def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch_ready()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_ready(self) -> Optional[float]:
+        """Start every sendable message, return how long until the next one is."""
+        now = time.monotonic()
+        delay: Optional[float] = None
+
+        for priority in sorted(self.classes):
+            traffic = self.classes[priority]
+            while traffic.queue:
+                if (
+                    traffic.max_in_flight is not None
+                    and traffic.in_flight >= traffic.max_in_flight
+                ):
+                    break
+
+                item = traffic.queue[0]
+                if item.future.cancelled():
+                    traffic.queue.popleft()
+                    traffic.queued_bytes -= item.size
+                    continue
+
+                wait = traffic.wait_time(item, now)
+                if wait > 0:
+                    delay = wait if delay is None else min(delay, wait)
+                    break
+
+                traffic.queue.popleft()
+                traffic.queued_bytes -= item.size
+                self._start(traffic, item, now)
+
+        return delay
+
+    def _start(self, traffic: _TrafficClass, item: _Outbound, now: float) -> None:
+        if traffic.messages:
+            traffic.messages.take(1)
+        if traffic.bytes:
+            traffic.bytes.take(item.size)
+        traffic.in_flight += 1
+        traffic.queue_wait.record(now - item.queued_at)
+
+        task = asyncio.create_task(item.send())
+        task.add_done_callback(lambda t: self._on_sent(traffic, item, t))
+
+    def _on_sent(self, traffic: _TrafficClass, item: _Outbound, task: asyncio.Task):
+        traffic.in_flight -= 1
+        self._wakeup.set()
+
+        error = task.exception() if not task.cancelled() else None
+        if error is None and not task.cancelled():
+            traffic.sent += 1
+            traffic.bytes_sent += item.size
+            if not item.future.done():
+                item.future.set_result(task.result())
+            return
+
+        traffic.failed += 1
+        self.error_count += 1
+        self.last_error = error
+        logger.debug(f"{traffic.priority.name} send failed: {error}")
+        if not item.future.done():
+            item.future.set_exception(error or MqttPublishException("Send cancelled"))
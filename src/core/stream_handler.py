@@ -8,13 +8,15 @@ from typing import Optional, Tuple, Any, List, Callable, AsyncIterator
 import cv2
 import gi
 import numpy as np
-from ultralytics import YOLO
 
 from src.core.kinesis_video_manager import KinesisVideoClient
-from src.core.mqtt_manager import MqttManager
+from src.core.outbound_scheduler import OutboundScheduler
 from src.core.credential_provider import CredentialProvider
+from src.core.detection_model import DetectionModel
 from src.core.upload_manager import UploadManager
 from src.enums.detection_object import DetectionObjects
+from src.enums.publish_priority import PublishPriority
+from src.exceptions.mqtt_exceptions import MqttPublishException
 from src.models.drone_coordinates import DroneCoordinates
 from src.models.job_document import Metadata
 from src.utils.gst_video_track import GstVideoTrack
@@ -29,9 +31,9 @@ class StreamHandler:
         self,
         device_name: str,
         port: int,
-        yolo_path: str,
+        model: DetectionModel,
         sample_rate: int,
-        mqtt: MqttManager,
+        outbound: OutboundScheduler,
         alert_topic: str,
         presence_confirmation_frames: int,
         confidence_threshold: int,
@@ -44,9 +46,9 @@ class StreamHandler:
 
         self._device_name = device_name
         self._port = port
-        self._model = YOLO(yolo_path)
+        self._model = model
         self._sample_rate = sample_rate
-        self._mqtt_manager = mqtt
+        self._outbound = outbound
         self._alert_topic = alert_topic
         self._presence_confirmation_frames = presence_confirmation_frames
         self._confidence_threshold: float = confidence_threshold / 100
@@ -419,7 +421,8 @@ class StreamHandler:
         except StopAsyncIteration:
             location = None
 
-        self._mqtt_manager.publish(
+        ack = self._outbound.publish(
+            PublishPriority.ALERT,
             topic=self._alert_topic,
             message=json.dumps(
                 {
@@ -440,6 +443,11 @@ class StreamHandler:
         )
         asyncio.create_task(self._async_upload(frame, s3_key))
 
+        try:
+            await ack
+        except MqttPublishException as e:
+            logger.error(f"Detection alert was not acknowledged: {e}")
+
     async def _async_upload(self, frame, s3_key):
         try:
             _, buffer = cv2.imencode(".jpg", frame)
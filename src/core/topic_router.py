@@ -0,0 +1,102 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+_SINGLE = "+"
+_MULTI = "#"
+
+
+class _Node:
+    __slots__ = ("children", "handlers")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.handlers: List[Callable] = []
+
+
+class TopicRouter:
+    """
+    Maps MQTT topic filters to handlers with a trie, one level per topic
+    segment. ``+`` matches exactly one level and ``#`` the remaining levels
+    including none (``a/#`` matches ``a``). Wildcards at the first level do
+    not match ``$`` topics, as required by MQTT.
+
+    Matches are cached per topic until the filters change. Safe to use from
+    the CRT thread while handlers are added on the event loop.
+    """
+
+    def __init__(self, cache_size: int = 1024) -> None:
+        self._root = _Node()
+        self._cache: Dict[str, List[Callable]] = {}
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def add(self, topic_filter: str, handler: Callable) -> None:
+        levels = topic_filter.split("/")
+        if _MULTI in levels[:-1] or any(
+            len(level) > 1 and (_SINGLE in level or _MULTI in level) for level in levels
+        ):
+            raise ValueError(f"Invalid topic filter {topic_filter}")
+
+        with self._lock:
+            node = self._root
+            for level in levels:
+                node = node.children.setdefault(level, _Node())
+            if handler not in node.handlers:
+                node.handlers.append(handler)
+            self._cache.clear()
+
+    def remove(self, topic_filter: str, handler: Optional[Callable] = None) -> None:
+        """Remove ``handler``, or every handler, from ``topic_filter``."""
+        with self._lock:
+            path = [self._root]
+            for level in topic_filter.split("/"):
+                node = path[-1].children.get(level)
+                if node is None:
+                    return
+                path.append(node)
+
+            node = path[-1]
+            node.handlers = [h for h in node.handlers if handler and h != handler]
+
+            levels = topic_filter.split("/")
+            for parent, level in zip(reversed(path[:-1]), reversed(levels)):
+                child = parent.children[level]
+                if child.handlers or child.children:
+                    break
+                del parent.children[level]
+
+            self._cache.clear()
+
+    def match(self, topic: str) -> List[Callable]:
+        handlers = self._cache.get(topic)
+        if handlers is not None:
+            return handlers
+
+        with self._lock:
+            handlers = []
+            self._collect(self._root, topic.split("/"), 0, handlers)
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[topic] = handlers
+        return handlers
+
+    def _collect(
+        self, node: _Node, levels: List[str], depth: int, handlers: List[Callable]
+    ) -> None:
+        wildcards = not (depth == 0 and levels[0].startswith("$"))
+
+        multi = node.children.get(_MULTI)
+        if multi and wildcards:
+            handlers.extend(h for h in multi.handlers if h not in handlers)
+
+        if depth == len(levels):
+            handlers.extend(h for h in node.handlers if h not in handlers)
+            return
+
+        child = node.children.get(levels[depth])
+        if child:
+            self._collect(child, levels, depth + 1, handlers)
+
+        single = node.children.get(_SINGLE)
+        if single and wildcards:
+            self._collect(single, levels, depth + 1, handlers)
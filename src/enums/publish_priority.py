@@ -0,0 +1,10 @@
+from enum import IntEnum
+
+
+class PublishPriority(IntEnum):
+    """Outbound traffic classes, lower values are sent first."""
+
+    CONTROL = 0
+    ALERT = 1
+    TELEMETRY = 2
+    BACKFILL = 3
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class TelemetryCompression(Enum):
+    NONE = "none"
+    ZLIB = "zlib"
+    ZSTD = "zstd"
@@ -4,3 +4,11 @@ class DownloadException(Exception):
 
 class DownloadNotAllowedFolderException(DownloadException):
     pass
+
+
+class DownloadIntegrityException(DownloadException):
+    pass
+
+
+class DownloadRangeNotSupportedException(DownloadException):
+    pass
@@ -0,0 +1,2 @@
+class MissionPlanException(Exception):
+    pass
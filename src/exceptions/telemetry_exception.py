@@ -1,2 +1,6 @@
 class TelemetryException(Exception):
     pass
+
+
+class WireFormatException(TelemetryException):
+    pass
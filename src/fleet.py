@@ -0,0 +1,104 @@
+import asyncio
+from typing import Dict
+
+from loguru import logger
+
+from src.coordinator import JobCoordinator
+from src.core.connection_supervisor import ConnectionSupervisor
+from src.core.mqtt_manager import MqttManager
+from src.core.outbound_scheduler import OutboundScheduler
+from src.exceptions.mqtt_exceptions import MqttConnectionException
+
+
+class FleetCoordinator:
+    """
+    Runs a ``JobCoordinator`` per vehicle on one event loop.
+
+    The MQTT connection, its supervisor and the outbound scheduler are
+    shared by all vehicles and started and stopped here; the coordinators
+    are built with ``manage_connection=False`` and only bring up their own
+    vehicle. A vehicle that fails to start is logged and left out, the
+    others keep running. Per-vehicle metrics are logged every
+    ``metrics_interval_s``.
+    """
+
+    def __init__(
+        self,
+        mqtt: MqttManager,
+        supervisor: ConnectionSupervisor,
+        outbound: OutboundScheduler,
+        coordinators: Dict[str, JobCoordinator],
+        metrics_interval_s: float = 60,
+    ) -> None:
+        self.mqtt = mqtt
+        self.supervisor = supervisor
+        self.outbound = outbound
+        self.coordinators = coordinators
+        self.metrics_interval_s = metrics_interval_s
+        self._starting: Dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        try:
+            await self.mqtt.connect()
+            logger.info("MQTT connected")
+        except MqttConnectionException as e:
+            logger.error(e)
+            raise
+
+        await self.supervisor.start()
+        await self.outbound.start()
+
+        # a vehicle that is slow to connect must not hold up the others
+        for thing_name, coordinator in self.coordinators.items():
+            task = asyncio.create_task(coordinator.start())
+            task.add_done_callback(
+                lambda t, thing_name=thing_name: self._on_started(thing_name, t)
+            )
+            self._starting[thing_name] = task
+        logger.info(f"Starting {len(self.coordinators)} vehicles")
+
+    def _on_started(self, thing_name: str, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception():
+            logger.error(f"Vehicle {thing_name} failed to start: {task.exception()}")
+        else:
+            logger.info(f"Vehicle {thing_name} running")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval_s)
+            self.log_metrics()
+
+    def metrics(self) -> Dict[str, dict]:
+        return {
+            thing_name: coordinator.metrics()
+            for thing_name, coordinator in self.coordinators.items()
+        }
+
+    def log_metrics(self) -> None:
+        for thing_name, metrics in self.metrics().items():
+            logger.info(f"Vehicle {thing_name}: {metrics}")
+        logger.info(f"MQTT requests: {self.mqtt.request_metrics()}")
+
+    async def stop(self):
+        logger.info("Shutting down fleet")
+
+        for task in self._starting.values():
+            task.cancel()
+        await asyncio.gather(
+            *(coordinator.stop() for coordinator in self.coordinators.values()),
+            return_exceptions=True,
+        )
+        self.log_metrics()
+
+        await self.outbound.stop()
+        await self.supervisor.stop()
+        try:
+            await asyncio.wait_for(self.mqtt.disconnect(), timeout=2.0)
+        except asyncio.TimeoutError:
+            logger.error("MQTT disconnect timeout")
+        except Exception as e:
+            logger.error(f"MQTT disconnect error: {e}")
+
+        logger.info("Fleet stopped")
@@ -8,7 +8,7 @@ import warnings
 
 from src.exceptions.aioice_exception_patch import global_exception_handler
 
-from src.containers import ApplicationContainer
+from src.containers import ApplicationContainer, build_fleet
 from src.exceptions.config_exceptions import ConfigException
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
@@ -33,6 +33,10 @@ def main(config_path: Optional[str] = None):
         logger.error(f"Configuration error: {e}")
         sys.exit(1)
 
+    if config.vehicles:
+        run_fleet(loop, container)
+        return
+
     stream_handler = container.stream_handler()
     coordinator = container.coordinator()
 
@@ -53,6 +57,22 @@ def main(config_path: Optional[str] = None):
         loop.close()
 
 
+def run_fleet(loop: asyncio.AbstractEventLoop, container: ApplicationContainer):
+    fleet = build_fleet(container)
+
+    try:
+        loop.run_until_complete(fleet.start())
+        loop.run_until_complete(fleet.run())
+    except KeyboardInterrupt:
+        logger.info("Shutdown requested")
+    except Exception:
+        logger.exception("Fatal error occurred during execution")
+        sys.exit(1)
+    finally:
+        loop.run_until_complete(fleet.stop())
+        loop.close()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -11,6 +13,9 @@ class Data(BaseModel):
     mission_uuid: str = Field(..., alias="mission_uuid")
     download_url: str
     download_path: str
+    sha256: Optional[str] = None
+    # SHA-256 of each drone's mission in the bundle, by member name
+    member_sha256: Dict[str, str] = Field(default_factory=dict)
     metadata: Metadata
 
     class Config:
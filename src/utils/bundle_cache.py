@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import threading
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+_BUNDLE_SUFFIX = ".zip"
+_MEMBER_SUFFIX = ".member"
+_ETAGS_FILE = "etags.json"
+
+
+class BundleCache:
+    """
+    Content-addressed cache of downloaded mission bundles.
+
+    Bundles are stored as ``<sha256>.zip`` in ``directory`` and looked up by
+    the hash from the job document. For documents without one, the ETag
+    last served for the URL (ignoring the query string, which changes with
+    every presigned URL) is remembered so the download can be revalidated
+    with ``If-None-Match``. Single missions read out of a bundle remotely
+    are stored as ``<sha256>.member`` by their own hash. Entries are
+    evicted least recently used first
+    once the cache grows past ``max_bytes``; recency is the file's mtime so
+    it survives restarts.
+
+    Safe to use from the downloader's worker threads.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 << 20) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.bytes_saved = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._etags: Dict[str, Tuple[str, str]] = self._load_etags()
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in self._entries())
+
+    def __contains__(self, sha256: str) -> bool:
+        """Whether the bundle is cached, without counting a hit."""
+        return os.path.exists(self._path(sha256.lower()))
+
+    def lookup(self, sha256: str) -> Optional[str]:
+        """Path of the cached bundle with this hash, None if not cached."""
+        path = self._path(sha256.lower())
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            os.utime(path)
+            self.hits += 1
+            self.bytes_saved += os.path.getsize(path)
+        return path
+
+    def lookup_member(self, sha256: str) -> Optional[bytes]:
+        """The cached mission with this hash, None if not cached."""
+        path = self._path(sha256.lower(), _MEMBER_SUFFIX)
+        with self._lock:
+            try:
+                with open(path, "rb") as file:
+                    content = file.read()
+            except FileNotFoundError:
+                return None
+            os.utime(path)
+            self.hits += 1
+            self.bytes_saved += len(content)
+        return content
+
+    def store_member(self, content: bytes, sha256: str) -> None:
+        """Add a mission that had to be read remotely, counted as a miss."""
+        path = self._path(sha256.lower(), _MEMBER_SUFFIX)
+        with self._lock:
+            self.misses += 1
+            with open(path + ".tmp", "wb") as file:
+                file.write(content)
+            os.replace(path + ".tmp", path)
+            self._evict()
+
+    def etag(self, url: str) -> Optional[Tuple[str, str]]:
+        """The ETag and hash of the bundle last served for ``url``, if cached."""
+        with self._lock:
+            known = self._etags.get(_resource(url))
+        if known and os.path.exists(self._path(known[1])):
+            return known
+        return None
+
+    def copy_to(self, sha256: str, destination: str) -> None:
+        """Put the cached bundle at ``destination``, hard linked if possible."""
+        source = self._path(sha256.lower())
+        if os.path.exists(destination):
+            os.remove(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+    def store(self, bundle: str, sha256: str, url: str, etag: Optional[str]) -> None:
+        """Add a bundle that had to be downloaded, counted as a miss."""
+        path = self._path(sha256)
+        with self._lock:
+            self.misses += 1
+            if not os.path.exists(path):
+                try:
+                    os.link(bundle, path)
+                except OSError:
+                    shutil.copyfile(bundle, path + ".tmp")
+                    os.replace(path + ".tmp", path)
+            if etag:
+                self._etags[_resource(url)] = (etag, sha256)
+                self._save_etags()
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "bundles": len(self._bundles()),
+            "members": len(self._entries()) - len(self._bundles()),
+            "bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        size = sum(os.path.getsize(p) for p in entries)
+        while entries and size > self.max_bytes:
+            oldest = entries.pop(0)
+            size -= os.path.getsize(oldest)
+            os.remove(oldest)
+            self.evicted += 1
+            logger.debug(f"Evicted cached {oldest}")
+
+        cached = {
+            os.path.basename(p)[: -len(_BUNDLE_SUFFIX)]
+            for p in entries
+            if p.endswith(_BUNDLE_SUFFIX)
+        }
+        stale = [r for r, (_, digest) in self._etags.items() if digest not in cached]
+        for resource in stale:
+            del self._etags[resource]
+        if stale:
+            self._save_etags()
+
+    def _bundles(self):
+        return [p for p in self._entries() if p.endswith(_BUNDLE_SUFFIX)]
+
+    def _entries(self):
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith((_BUNDLE_SUFFIX, _MEMBER_SUFFIX))
+        ]
+
+    def _path(self, sha256: str, suffix: str = _BUNDLE_SUFFIX) -> str:
+        return os.path.join(self.directory, sha256 + suffix)
+
+    def _load_etags(self) -> Dict[str, Tuple[str, str]]:
+        try:
+            with open(os.path.join(self.directory, _ETAGS_FILE)) as file:
+                return {r: tuple(v) for r, v in json.load(file).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_etags(self):
+        path = os.path.join(self.directory, _ETAGS_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(self._etags, file)
+        os.replace(path + ".tmp", path)
+
+
+def _resource(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
@@ -1,29 +1,40 @@
+import asyncio
+import hashlib
+import http.client
 import os
+import struct
+import tempfile
+import time
+import urllib.error
 import urllib.request
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+from zipfile import BadZipFile
+
 from loguru import logger
 
 from src.exceptions.download_exceptions import (
     DownloadException,
+    DownloadIntegrityException,
     DownloadNotAllowedFolderException,
+    DownloadRangeNotSupportedException,
 )
+from src.utils.bundle_cache import BundleCache
+from src.utils.zip_manager import RemoteZip, read_mission
 
+BUNDLE_NAME = "mission.bundle.zip"
+# enough for the end of central directory and, usually, the central directory
+TAIL_BYTES = 8192
+
+ProgressCallback = Callable[[int, Optional[int]], None]
 
-def download_file(url: str, path: str) -> None:
-    """
-    Download file from url to path.
-    Args:
-        url (str): The url to download the file from.
-        path (str): The path to save the file to.
-    """
-    if path.endswith("/"):
-        path = path + "mission.bundle.zip"
-    else:
-        path = path + "/mission.bundle.zip"
 
-    try:
-        urllib.request.urlretrieve(url, path)
-    except Exception as e:
-        raise DownloadException(e)
+@dataclass
+class DownloadedMission:
+    # the mission written to the download directory, and its bytes
+    path: str
+    content: bytes
 
 
 def ensure_dir(path: str) -> None:
@@ -38,28 +49,405 @@ def ensure_dir(path: str) -> None:
         os.makedirs(directory)
 
 
-def handle_download(url: str, path: str) -> str:
+class MissionDownloader:
     """
-    Handle the file download process.
-    Args:
-        url (str): The url to download the file from.
-        path (str): The path to save the file to.
-    Returns:
-        tuple: 0 if the process is successful, 1 otherwise, and the path to the saved file.
+    Streams mission bundles to disk, resuming interrupted transfers.
+
+    The bundle is written in ``chunk_size`` pieces to a temporary file unique
+    to the download, so concurrent downloads into the same directory do not
+    clash, and renamed to ``mission.bundle.zip`` once complete. A connection
+    that fails or stalls for ``timeout_s`` is retried up to ``retries``
+    times, backing off from ``retry_delay_s``, with an HTTP Range request for
+    the missing bytes; servers that ignore the range restart the transfer.
+    The SHA-256 of the bundle is checked against ``sha256`` when the job
+    document provides one.
+
+    With a ``cache``, bundles whose hash is already cached are not
+    downloaded at all, and bundles without a hash are revalidated with the
+    ETag the cache remembers for the URL; a 304 is served from the cache.
+
+    ``download_mission`` reads only the drone's member of large multi-drone
+    bundles, see ``RemoteZip``, when the job document provides the member's
+    own SHA-256 to check it against; the member is then cached by that
+    hash. Bundles without one are downloaded, verified and cached whole.
+
+    Transfers run in a worker thread; ``on_progress(received, total)`` is
+    called on the event loop at most every ``progress_interval_s``.
     """
-    if path.startswith("/tmp"):
-        ensure_dir(path)
-    else:
-        raise DownloadNotAllowedFolderException()
-
-    try:
-        download_file(url, path)
-
-        if path.endswith("/"):
-            path = path + "mission.bundle.zip"
-        else:
-            path = path + "/mission.bundle.zip"
-
-        return path
-    except Exception as e:
-        raise DownloadException(e)
+
+    def __init__(
+        self,
+        chunk_size: int = 256 << 10,
+        timeout_s: float = 30,
+        retries: int = 5,
+        retry_delay_s: float = 1,
+        progress_interval_s: float = 5,
+        cache: Optional[BundleCache] = None,
+        remote_extract_min_bytes: Optional[int] = 1 << 20,
+    ) -> None:
+        self.chunk_size = chunk_size
+        self.timeout_s = timeout_s
+        self.retries = retries
+        self.retry_delay_s = retry_delay_s
+        self.progress_interval_s = progress_interval_s
+        self.cache = cache
+        self.remote_extract_min_bytes = remote_extract_min_bytes
+
+        self.completed = 0
+        self.members_read = 0
+        self.resumed = 0
+        self.error_count = 0
+        self.last_error: Optional[Exception] = None
+
+    async def download(
+        self,
+        url: str,
+        path: str,
+        sha256: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Download ``url`` into the directory ``path``, return the bundle path."""
+        return await self._run(self._download, url, path, sha256, on_progress)
+
+    async def download_mission(
+        self,
+        url: str,
+        path: str,
+        member_name: str,
+        sha256: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        member_sha256: Optional[str] = None,
+    ) -> DownloadedMission:
+        """
+        Extract the ``member_name`` mission of the bundle at ``url`` into the
+        directory ``path``, return it with its bytes for in-memory parsing
+        and upload. With ``member_sha256``,
+        bundles of at least ``remote_extract_min_bytes`` that are not cached
+        are read member-only with Range requests; others are downloaded
+        whole. The mission is checked against ``member_sha256`` either way.
+        """
+        return await self._run(
+            self._download_mission,
+            url,
+            path,
+            member_name,
+            sha256,
+            member_sha256,
+            on_progress,
+        )
+
+    async def mission_size(
+        self,
+        url: str,
+        member_name: str,
+        sha256: Optional[str] = None,
+        member_sha256: Optional[str] = None,
+    ) -> Optional[int]:
+        """
+        Bytes ``download_mission`` would write for this mission: the member,
+        plus the bundle when it is downloaded whole. Sizes come from the
+        bundle's central directory, or its Content-Length (bundle only) when
+        the server does not support Range requests; None if neither is known.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._mission_size, url, member_name, sha256, member_sha256
+        )
+
+    async def _run(self, target, url: str, path: str, *args):
+        if not path.startswith("/tmp"):
+            raise DownloadNotAllowedFolderException()
+        directory = path if path.endswith("/") else path + "/"
+        ensure_dir(directory)
+
+        loop = asyncio.get_running_loop()
+        *args, on_progress = args
+        report = None
+        if on_progress:
+            report = lambda *a: loop.call_soon_threadsafe(on_progress, *a)
+        try:
+            return await loop.run_in_executor(
+                None, target, url, directory, *args, report
+            )
+        except DownloadException as e:
+            self.error_count += 1
+            self.last_error = e
+            raise
+
+    def _download_mission(
+        self,
+        url: str,
+        directory: str,
+        member_name: str,
+        sha256: Optional[str],
+        member_sha256: Optional[str],
+        report: Optional[ProgressCallback],
+    ) -> DownloadedMission:
+        mission_file = os.path.join(directory, member_name)
+        content = None
+        if self.cache and member_sha256:
+            content = self.cache.lookup_member(member_sha256)
+            if content is not None:
+                logger.info(f"Mission {member_sha256[:12]} served from cache")
+        cached = None
+        if content is None and self.cache and sha256:
+            cached = self.cache.lookup(sha256)
+
+        if content is None and not cached and self._may_read_member(member_sha256):
+            content = self._read_member(url, member_name)
+            if content is not None:
+                _verify(content, member_sha256)
+                self.members_read += 1
+                if self.cache:
+                    self.cache.store_member(content, member_sha256)
+                if report:
+                    report(len(content), len(content))
+
+        if content is None:
+            bundle = cached or self._download(url, directory, sha256, report)
+            content = read_mission(bundle, member_name)
+            if content is None:
+                raise DownloadException(f"Bundle has no {member_name} mission")
+            _verify(content, member_sha256)
+
+        with open(mission_file + ".part", "wb") as file:
+            file.write(content)
+        os.replace(mission_file + ".part", mission_file)
+        return DownloadedMission(mission_file, content)
+
+    def _may_read_member(self, member_sha256: Optional[str]) -> bool:
+        # only a member that can be verified on its own is read remotely
+        return self.remote_extract_min_bytes is not None and bool(member_sha256)
+
+    def _mission_size(
+        self,
+        url: str,
+        member_name: str,
+        sha256: Optional[str],
+        member_sha256: Optional[str],
+    ) -> Optional[int]:
+        tail, size = self._read_tail(url)
+        if tail is None:
+            return self._content_length(url)
+        try:
+            archive = RemoteZip(lambda s, e: self._read_range(url, s, e), size, tail)
+            member_size = archive.file_size(member_name)
+        except (KeyError, BadZipFile, DownloadException, struct.error):
+            return size
+        cached = self.cache and sha256 and sha256 in self.cache
+        if not cached and self._may_read_member(member_sha256):
+            if size >= self.remote_extract_min_bytes:
+                return member_size
+        return size + member_size
+
+    def _read_member(self, url: str, member_name: str) -> Optional[bytes]:
+        """The member's bytes, None if the bundle should be downloaded whole."""
+        tail, size = self._read_tail(url)
+        if tail is None or size < self.remote_extract_min_bytes:
+            return None
+        try:
+            archive = RemoteZip(lambda s, e: self._read_range(url, s, e), size, tail)
+            return archive.read(member_name)
+        except KeyError as e:
+            raise DownloadException(e)
+        except (
+            BadZipFile,
+            DownloadRangeNotSupportedException,
+            struct.error,
+            zlib.error,
+        ) as e:
+            logger.warning(f"Cannot read {member_name} remotely ({e}), downloading")
+            return None
+
+    def _download(
+        self,
+        url: str,
+        directory: str,
+        sha256: Optional[str],
+        report: Optional[ProgressCallback],
+    ) -> str:
+        bundle = os.path.join(directory, BUNDLE_NAME)
+        known = None
+        if self.cache and sha256:
+            if self.cache.lookup(sha256):
+                logger.info(f"Mission bundle {sha256[:12]} served from cache")
+                self.cache.copy_to(sha256, bundle)
+                return bundle
+        elif self.cache:
+            known = self.cache.etag(url)
+
+        fd, part = tempfile.mkstemp(prefix=".mission.", suffix=".part", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                digest, etag = self._transfer(url, file, report, known and known[0])
+                if digest is None and not self.cache.lookup(known[1]):
+                    # evicted since the ETag was looked up
+                    digest, etag = self._transfer(url, file, report)
+            if digest is None:
+                logger.info(f"Mission bundle {known[1][:12]} not modified, cached")
+                self.cache.copy_to(known[1], bundle)
+                return bundle
+
+            _check_digest(digest, sha256)
+            os.replace(part, bundle)
+            self.completed += 1
+            if self.cache:
+                self.cache.store(bundle, digest, url, etag)
+            return bundle
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+    def _transfer(
+        self,
+        url: str,
+        file,
+        report: Optional[ProgressCallback],
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        The SHA-256 and ETag of ``url`` written to ``file``, no hash on a 304.
+
+        An interrupted transfer resumes with a Range request conditional on
+        the first response's strong ETag or Last-Modified (If-Range), so a
+        changed object is sent whole instead of appended to the old head.
+        Without either, the transfer restarts from the beginning.
+        """
+        hasher = hashlib.sha256()
+        received = 0
+        total: Optional[int] = None
+        etag: Optional[str] = None
+        validator: Optional[str] = None
+        reported = 0.0
+        attempt = 0
+
+        while True:
+            request = urllib.request.Request(url)
+            if received and validator is None:
+                logger.warning("Download cannot be resumed safely, restarting")
+                file.seek(0)
+                file.truncate()
+                hasher = hashlib.sha256()
+                received = 0
+            if received:
+                request.add_header("Range", f"bytes={received}-")
+                request.add_header("If-Range", validator)
+            elif if_none_match:
+                request.add_header("If-None-Match", if_none_match)
+            try:
+                with urllib.request.urlopen(
+                    request, timeout=self.timeout_s
+                ) as response:
+                    if received and response.status == 206:
+                        self.resumed += 1
+                    else:
+                        if received:
+                            logger.warning(
+                                "Server sent the whole object, restarting download"
+                            )
+                            file.seek(0)
+                            file.truncate()
+                            hasher = hashlib.sha256()
+                            received = 0
+                        etag = response.headers.get("ETag")
+                        validator = _range_validator(response.headers)
+                    length = response.headers.get("Content-Length")
+                    if length is not None:
+                        total = received + int(length)
+
+                    while chunk := response.read(self.chunk_size):
+                        file.write(chunk)
+                        hasher.update(chunk)
+                        received += len(chunk)
+                        now = time.monotonic()
+                        if report and now - reported >= self.progress_interval_s:
+                            reported = now
+                            report(received, total)
+
+                if total is not None and received < total:
+                    raise DownloadException(f"Connection closed at {received}/{total}")
+                if report:
+                    report(received, total)
+                return hasher.hexdigest(), etag
+
+            except (OSError, http.client.HTTPException, DownloadException) as e:
+                if isinstance(e, urllib.error.HTTPError) and e.code == 304:
+                    return None, if_none_match
+                if isinstance(e, urllib.error.HTTPError) and e.code < 500:
+                    raise DownloadException(e)
+                attempt += 1
+                self._back_off(attempt, received, e)
+
+    def _read_tail(self, url: str) -> Tuple[Optional[bytes], int]:
+        """The last bytes of ``url`` and its size, no bytes without Range support."""
+        request = urllib.request.Request(url, headers={"Range": f"bytes=-{TAIL_BYTES}"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                content_range = response.headers.get("Content-Range", "")
+                if response.status != 206 or "/" not in content_range:
+                    return None, 0
+                return response.read(), int(content_range.rsplit("/", 1)[1])
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logger.debug(f"Range read of {url} failed: {e}")
+            return None, 0
+
+    def _content_length(self, url: str) -> Optional[int]:
+        request = urllib.request.Request(url, method="HEAD")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                length = response.headers.get("Content-Length")
+                return int(length) if length is not None else None
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logger.debug(f"HEAD of {url} failed: {e}")
+            return None
+
+    def _read_range(self, url: str, start: int, end: int) -> bytes:
+        data = bytearray()
+        attempt = 0
+        while start + len(data) < end:
+            request = urllib.request.Request(
+                url, headers={"Range": f"bytes={start + len(data)}-{end - 1}"}
+            )
+            try:
+                with urllib.request.urlopen(
+                    request, timeout=self.timeout_s
+                ) as response:
+                    if response.status != 206:
+                        raise DownloadRangeNotSupportedException(url)
+                    while chunk := response.read(self.chunk_size):
+                        data += chunk
+            except (OSError, http.client.HTTPException) as e:
+                if isinstance(e, urllib.error.HTTPError) and e.code < 500:
+                    raise DownloadException(e)
+                attempt += 1
+                self._back_off(attempt, len(data), e)
+        return bytes(data[: end - start])
+
+    def _back_off(self, attempt: int, received: int, error: Exception) -> None:
+        if attempt > self.retries:
+            raise DownloadException(error)
+        delay = min(self.retry_delay_s * 2 ** (attempt - 1), 30)
+        logger.warning(
+            f"Download interrupted at {received} B ({error}), "
+            f"retrying in {delay} s ({attempt}/{self.retries})"
+        )
+        time.sleep(delay)
+
+
+def _range_validator(headers) -> Optional[str]:
+    """The strong ETag or the Last-Modified date to send as If-Range."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _verify(content: bytes, sha256: Optional[str]) -> None:
+    _check_digest(hashlib.sha256(content).hexdigest(), sha256)
+
+
+def _check_digest(digest: str, sha256: Optional[str]) -> None:
+    if sha256 and digest != sha256.lower():
+        raise DownloadIntegrityException(
+            f"SHA-256 mismatch: expected {sha256}, got {digest}"
+        )
@@ -0,0 +1,291 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+_RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+_CURSOR = struct.Struct("<QQ")  # segment sequence, byte offset
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_FILE = "cursor"
+
+
+class SegmentJournal:
+    """
+    Bounded append-only journal of opaque records on disk.
+
+    Records are framed as ``<length><crc32><payload>`` in numbered segment
+    files. Readers ``peek`` the oldest records and ``commit`` them once
+    handled; fully committed segments are deleted. When the journal grows
+    past ``max_bytes`` the oldest segments are evicted and their records
+    counted in ``evicted_records``. A torn or corrupt record ends its
+    segment and is counted in ``corrupt_records``.
+
+    Appended records are fsynced every ``sync_records`` records, and at most
+    ``sync_interval_s`` after they were written, so a crash or power loss
+    loses little more than that window; segments are fsynced when they
+    rotate. The read cursor is saved on the same schedule of committed
+    records and on ``close``: after a crash the records committed since
+    are read again, delivery is at least once.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 1 << 20,
+        max_bytes: int = 256 << 20,
+        sync_records: int = 64,
+        sync_interval_s: float = 1.0,
+    ) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max(max_bytes, segment_bytes)
+        self.sync_records = sync_records
+        self.sync_interval_s = sync_interval_s
+        self.evicted_records = 0
+        self.corrupt_records = 0
+        self.syncs = 0
+
+        # the sync timer runs on its own thread
+        self._lock = threading.RLock()
+        self._unsynced = 0
+        self._unsaved_commits = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer: Optional[threading.Timer] = None
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments: Dict[int, List[int]] = {}  # sequence -> record offsets
+        self._sizes: Dict[int, int] = {}
+        self._write_sequence = -1
+        self._writer = None
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(_SEGMENT_SUFFIX):
+                self._load_segment(int(name[: -len(_SEGMENT_SUFFIX)]))
+
+        self._read_segment, self._read_offset = self._load_cursor()
+        for sequence in [s for s in self._segments if s < self._read_segment]:
+            self._delete_segment(sequence)
+
+        self._write_sequence = max(self._segments, default=self._read_segment)
+        self._pending = self._count_pending()
+
+        if len(self):
+            logger.info(f"Journal {directory}: {len(self)} pending records")
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def _count_pending(self) -> int:
+        pending = 0
+        for sequence, offsets in self._segments.items():
+            if sequence == self._read_segment:
+                pending += sum(1 for o in offsets if o >= self._read_offset)
+            elif sequence > self._read_segment:
+                pending += len(offsets)
+        return pending
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def append(self, record: bytes) -> None:
+        with self._lock:
+            if self._writer is None or self._sizes[self._write_sequence] >= (
+                self.segment_bytes
+            ):
+                self._rotate()
+
+            offset = self._sizes[self._write_sequence]
+            self._writer.write(_RECORD_HEADER.pack(len(record), zlib.crc32(record)))
+            self._writer.write(record)
+            self._writer.flush()
+            self._unsynced += 1
+            self._pending += 1
+
+            self._segments[self._write_sequence].append(offset)
+            self._sizes[self._write_sequence] += _RECORD_HEADER.size + len(record)
+            self._sync_when_due()
+
+            while self.size_bytes > self.max_bytes and len(self._segments) > 1:
+                self._evict_oldest()
+
+    def sync(self) -> None:
+        """Force the records appended and the commits made so far to disk."""
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._writer and self._unsynced:
+                os.fsync(self._writer.fileno())
+                self.syncs += 1
+            self._unsynced = 0
+            if self._unsaved_commits:
+                self._save_cursor()
+            self._last_sync = time.monotonic()
+
+    def _sync_when_due(self) -> None:
+        if (
+            max(self._unsynced, self._unsaved_commits) >= self.sync_records
+            or time.monotonic() - self._last_sync >= self.sync_interval_s
+        ):
+            self.sync()
+        elif self._sync_timer is None:
+            self._sync_timer = threading.Timer(self.sync_interval_s, self.sync)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def peek(self, max_records: int = 1) -> List[bytes]:
+        """Return up to ``max_records`` of the oldest uncommitted records."""
+        records: List[bytes] = []
+        sequence, offset = self._read_segment, self._read_offset
+
+        for current in sorted(s for s in self._segments if s >= sequence):
+            offsets = self._segments[current]
+            pending = offsets[
+                bisect_left(offsets, offset) if current == sequence else 0 :
+            ]
+            if not pending:
+                continue
+
+            with open(self._path(current), "rb") as segment:
+                for record_offset in pending:
+                    segment.seek(record_offset)
+                    length, _ = _RECORD_HEADER.unpack(segment.read(_RECORD_HEADER.size))
+                    records.append(segment.read(length))
+                    if len(records) >= max_records:
+                        return records
+
+        return records
+
+    def commit(self, count: int) -> None:
+        """Mark the ``count`` oldest records as handled."""
+        with self._lock:
+            self._pending = max(0, self._pending - count)
+            self._unsaved_commits += count
+            for current in sorted(s for s in self._segments if s >= self._read_segment):
+                offsets = self._segments[current]
+                start = 0
+                if current == self._read_segment:
+                    start = bisect_left(offsets, self._read_offset)
+
+                if count < len(offsets) - start:
+                    self._read_segment = current
+                    self._read_offset = offsets[start + count]
+                    break
+
+                count -= len(offsets) - start
+                if current != self._write_sequence:
+                    self._delete_segment(current)
+                    self._read_segment, self._read_offset = current + 1, 0
+                else:
+                    self._read_segment = current
+                    self._read_offset = self._sizes[current]
+                    break
+
+            self._sync_when_due()
+
+    def close(self) -> None:
+        with self._lock:
+            self.sync()
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+
+    def _rotate(self) -> None:
+        if self._writer:
+            self.sync()
+            self._writer.close()
+            self._write_sequence += 1
+
+        self._segments.setdefault(self._write_sequence, [])
+        self._sizes.setdefault(self._write_sequence, 0)
+        self._writer = open(self._path(self._write_sequence), "ab")
+        self._sync_directory()
+
+    def _evict_oldest(self) -> None:
+        oldest = min(self._segments)
+        start = self._read_offset if oldest == self._read_segment else 0
+        evicted = sum(1 for o in self._segments[oldest] if o >= start)
+        self.evicted_records += evicted
+        self._pending -= evicted
+        logger.warning(f"Journal {self.directory} full, evicting segment {oldest}")
+
+        self._delete_segment(oldest)
+        if self._read_segment <= oldest:
+            self._read_segment, self._read_offset = oldest + 1, 0
+            self._save_cursor()
+
+    def _load_segment(self, sequence: int) -> None:
+        offsets: List[int] = []
+        path = self._path(sequence)
+        size = os.path.getsize(path)
+
+        with open(path, "rb") as segment:
+            offset = 0
+            while offset + _RECORD_HEADER.size <= size:
+                length, crc = _RECORD_HEADER.unpack(segment.read(_RECORD_HEADER.size))
+                payload = segment.read(length)
+                if len(payload) != length or zlib.crc32(payload) != crc:
+                    self.corrupt_records += 1
+                    break
+                offsets.append(offset)
+                offset += _RECORD_HEADER.size + length
+
+        if offset != size:
+            with open(path, "r+b") as segment:
+                segment.truncate(offset)
+
+        self._segments[sequence] = offsets
+        self._sizes[sequence] = offset
+
+    def _load_cursor(self) -> tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, _CURSOR_FILE), "rb") as cursor:
+                return _CURSOR.unpack(cursor.read(_CURSOR.size))
+        except (OSError, struct.error):
+            return min(self._segments, default=0), 0
+
+    def _save_cursor(self) -> None:
+        self._unsaved_commits = 0
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        with open(path + ".tmp", "wb") as cursor:
+            cursor.write(_CURSOR.pack(self._read_segment, self._read_offset))
+            cursor.flush()
+            os.fsync(cursor.fileno())
+        os.replace(path + ".tmp", path)
+        self._sync_directory()
+
+    def _sync_directory(self) -> None:
+        """Persist created, renamed and deleted entries of the directory."""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return  # not supported on this platform
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _delete_segment(self, sequence: int) -> None:
+        if sequence == self._write_sequence and self._writer:
+            with self._lock:
+                if self._sync_timer is not None:
+                    self._sync_timer.cancel()
+                    self._sync_timer = None
+                self._unsynced = 0
+                self._writer.close()
+                self._writer = None
+        self._segments.pop(sequence, None)
+        self._sizes.pop(sequence, None)
+        try:
+            os.remove(self._path(sequence))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, sequence: int) -> str:
+        return os.path.join(self.directory, f"{sequence:016d}{_SEGMENT_SUFFIX}")
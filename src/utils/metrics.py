@@ -0,0 +1,75 @@
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+# Upper bounds in seconds, roughly 1-2.5-5 per decade from 1 ms to 60 s.
+DEFAULT_BUCKETS_S: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram, safe to record into from any thread.
+
+    Percentiles are reported as the upper bound of the bucket they fall in
+    (``max`` for the overflow bucket).
+    """
+
+    def __init__(self, buckets_s: tuple[float, ...] = DEFAULT_BUCKETS_S) -> None:
+        self.buckets_s = buckets_s
+        self._counts: List[int] = [0] * (len(buckets_s) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_s, seconds)] += 1
+            self.count += 1
+            self.total_s += seconds
+            self.max_s = max(self.max_s, seconds)
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.count:
+                return None
+
+            rank = q / 100 * self.count
+            seen = 0
+            for i, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    if i < len(self.buckets_s):
+                        return min(self.buckets_s[i], self.max_s)
+                    return self.max_s
+            return self.max_s
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean_s": self.mean_s,
+            "p50_s": self.percentile(50),
+            "p95_s": self.percentile(95),
+            "p99_s": self.percentile(99),
+            "max_s": self.max_s,
+        }
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from mavsdk.mission_raw import MissionItem
+
+from src.exceptions.mission_exceptions import MissionPlanException
+from src.utils.metrics import LatencyHistogram
+
+# MAV_FRAME values whose x/y are latitude/longitude
+_GLOBAL_FRAMES = {0, 3, 5, 6, 10, 11}
+# ... and whose z is relative to home or terrain rather than AMSL
+_RELATIVE_FRAMES = {3, 6, 10, 11}
+_EARTH_RADIUS_M = 6371000.0
+
+
+@dataclass
+class Geofence:
+    # (vertices as (lat, lon), inclusion)
+    polygons: List[Tuple[List[Tuple[float, float]], bool]] = field(default_factory=list)
+    # (lat, lon, radius in m, inclusion)
+    circles: List[Tuple[float, float, float, bool]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.polygons or self.circles)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """Inside any inclusion zone, if there are any, and no exclusion zone."""
+        inclusions = []
+        for vertices, inclusion in self.polygons:
+            inside = _in_polygon(lat, lon, vertices)
+            if not inclusion and inside:
+                return False
+            if inclusion:
+                inclusions.append(inside)
+        for center_lat, center_lon, radius, inclusion in self.circles:
+            inside = _distance_m(lat, lon, center_lat, center_lon) <= radius
+            if not inclusion and inside:
+                return False
+            if inclusion:
+                inclusions.append(inside)
+        return not inclusions or any(inclusions)
+
+
+@dataclass
+class MissionPlan:
+    sha256: str
+    items: List[MissionItem]
+    geofence: Geofence
+    home: Optional[Tuple[float, float, float]]
+    parse_s: float
+
+
+class MissionPlanParser:
+    """
+    Parses QGroundControl ``.plan`` files into ``mission_raw`` items.
+
+    Produces the items MAVSDK's ``import_qgroundcontrol_mission`` would, for
+    simple items and the generated items of survey and corridor scans, so
+    missions can be uploaded from memory. Plans are validated against
+    ``max_items``, ``max_altitude_m`` above home (or terrain) and the plan's
+    own geofence, and cached by content hash in an LRU of ``max_entries``
+    so re-flown missions are parsed once. ``load_bytes`` takes the plan as
+    downloaded; ``load`` reads it from a file for callers that only have one.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1000,
+        max_altitude_m: float = 120,
+        max_entries: int = 16,
+    ) -> None:
+        self.max_items = max_items
+        self.max_altitude_m = max_altitude_m
+        self.max_entries = max_entries
+        self._plans: OrderedDict[str, MissionPlan] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.parse_latency = LatencyHistogram()
+
+    def load(self, path: str) -> MissionPlan:
+        with open(path, "rb") as file:
+            return self.load_bytes(file.read())
+
+    def load_bytes(self, content: bytes) -> MissionPlan:
+        sha256 = hashlib.sha256(content).hexdigest()
+        plan = self._plans.get(sha256)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(sha256)
+            return plan
+
+        self.misses += 1
+        started = time.perf_counter()
+        try:
+            document = json.loads(content)
+            mission = document["mission"]
+            items = [item for raw in mission["items"] for item in _simple_items(raw)]
+            home = mission.get("plannedHomePosition")
+            plan = MissionPlan(
+                sha256=sha256,
+                items=[_mission_item(seq, raw) for seq, raw in enumerate(items)],
+                geofence=_geofence(document.get("geoFence") or {}),
+                home=_home(home) if home else None,
+                parse_s=0.0,
+            )
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            raise MissionPlanException(f"Not a QGroundControl plan: {e!r}")
+        self._validate(plan)
+        plan.parse_s = time.perf_counter() - started
+        self.parse_latency.record(plan.parse_s)
+
+        self._plans[sha256] = plan
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _validate(self, plan: MissionPlan) -> None:
+        if not plan.items:
+            raise MissionPlanException("Mission has no items")
+        if len(plan.items) > self.max_items:
+            raise MissionPlanException(
+                f"Mission has {len(plan.items)} items, at most {self.max_items} allowed"
+            )
+
+        for item in plan.items:
+            if item.frame not in _GLOBAL_FRAMES or (item.x == 0 and item.y == 0):
+                continue
+            lat, lon = item.x / 1e7, item.y / 1e7
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise MissionPlanException(f"Item {item.seq} has invalid position")
+
+            altitude = item.z
+            if item.frame not in _RELATIVE_FRAMES and plan.home:
+                altitude -= plan.home[2]
+            if altitude > self.max_altitude_m:
+                raise MissionPlanException(
+                    f"Item {item.seq} altitude {altitude:.1f} m exceeds "
+                    f"{self.max_altitude_m} m"
+                )
+            if plan.geofence and not plan.geofence.contains(lat, lon):
+                raise MissionPlanException(f"Item {item.seq} is outside the geofence")
+
+
+def _home(raw: list) -> Tuple[float, float, float]:
+    lat, lon, altitude = (float(value) for value in raw)
+    return lat, lon, altitude
+
+
+def _simple_items(raw: dict) -> List[dict]:
+    if raw["type"] == "SimpleItem":
+        return [raw]
+    if raw["type"] == "ComplexItem":
+        transects = raw.get("TransectStyleComplexItem", raw)
+        return [item for i in transects["Items"] for item in _simple_items(i)]
+    raise ValueError(f"Unsupported item type {raw['type']}")
+
+
+def _mission_item(seq: int, raw: dict) -> MissionItem:
+    params = [math.nan if p is None else float(p) for p in raw["params"]]
+    frame = raw["frame"]
+    scale = 1e7 if frame in _GLOBAL_FRAMES else 1
+    x, y = (0 if math.isnan(p) else round(p * scale) for p in params[4:6])
+    return MissionItem(
+        seq=seq,
+        frame=frame,
+        command=raw["command"],
+        current=1 if seq == 0 else 0,
+        autocontinue=1 if raw.get("autoContinue", True) else 0,
+        param1=params[0],
+        param2=params[1],
+        param3=params[2],
+        param4=params[3],
+        x=x,
+        y=y,
+        z=params[6],
+        mission_type=0,
+    )
+
+
+def _geofence(raw: dict) -> Geofence:
+    fence = Geofence()
+    for polygon in raw.get("polygons", []):
+        vertices = [(lat, lon) for lat, lon in polygon["polygon"]]
+        fence.polygons.append((vertices, polygon.get("inclusion", True)))
+    for circle in raw.get("circles", []):
+        (lat, lon), radius = circle["circle"]["center"], circle["circle"]["radius"]
+        fence.circles.append((lat, lon, radius, circle.get("inclusion", True)))
+    return fence
+
+
+def _in_polygon(lat: float, lon: float, vertices: List[Tuple[float, float]]) -> bool:
+    inside = False
+    for (lat1, lon1), (lat2, lon2) in zip(vertices, vertices[-1:] + vertices[:-1]):
+        if (lon1 > lon) != (lon2 > lon):
+            if lat < lat1 + (lon - lon1) * (lat2 - lat1) / (lon2 - lon1):
+                inside = not inside
+    return inside
+
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
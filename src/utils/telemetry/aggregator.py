@@ -0,0 +1,238 @@
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.core.mqtt_manager import MqttManager
+from src.core.outbound_scheduler import OutboundScheduler
+from src.enums.publish_priority import PublishPriority
+from src.utils.telemetry.collector import TelemetryCollector
+from src.utils.telemetry.ring_buffer import (
+    HEALTH_FLAGS,
+    TelemetryFrame,
+    TelemetryRingBuffer,
+    unpack_health,
+)
+
+_GPS_BIT = 1 << HEALTH_FLAGS.index("is_global_position_ok")
+
+
+class TelemetryAggregator:
+    """
+    Sits between the collector and the publisher.
+
+    Every ``window_s`` it publishes a summary (count, min/max/mean/last per
+    field, last health) to ``summary_topic``. Low battery, GPS loss and
+    other health flag changes are published to ``event_topic`` as they
+    happen. Raw samples are only forwarded to ``output`` (which the
+    publisher drains) while raw mode is enabled on demand, or for
+    ``raw_hold_s`` after an event, in which case the current window's
+    samples are forwarded as well.
+
+    With an ``outbound`` scheduler, events are sent as ``ALERT`` and
+    summaries as ``TELEMETRY`` traffic.
+    """
+
+    def __init__(
+        self,
+        collector: TelemetryCollector,
+        mqtt: MqttManager,
+        summary_topic: str,
+        event_topic: str,
+        window_s: float = 10.0,
+        low_battery_percent: float = 20.0,
+        raw_hold_s: float = 30.0,
+        poll_s: float = 1.0,
+        capacity: int = 1024,
+        outbound: Optional[OutboundScheduler] = None,
+    ) -> None:
+        self.collector = collector
+        self.mqtt = mqtt
+        self.summary_topic = summary_topic
+        self.event_topic = event_topic
+        self.window_s = window_s
+        self.low_battery_percent = low_battery_percent
+        self.raw_hold_s = raw_hold_s
+        self.poll_s = poll_s
+        self.outbound = outbound
+        self.output = TelemetryRingBuffer(capacity)
+
+        self.raw_enabled = False
+        self._raw_until = 0.0
+        self._window: List[TelemetryFrame] = []
+        self._window_started = time.monotonic()
+        self._last_sample: Optional[TelemetryFrame] = None
+
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self.error_count = 0
+        self.last_error: Optional[Exception] = None
+        self.summaries_sent = 0
+        self.events_sent = 0
+
+    def set_raw_enabled(self, enabled: bool) -> None:
+        logger.info(f"Raw telemetry forwarding {'enabled' if enabled else 'disabled'}")
+        self.raw_enabled = enabled
+
+    @property
+    def forwarding_raw(self) -> bool:
+        return self.raw_enabled or time.monotonic() < self._raw_until
+
+    async def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._window = []
+        self._window_started = time.monotonic()
+        self._last_sample = None
+        self._task = asyncio.create_task(self._aggregate_loop())
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def _aggregate_loop(self):
+        buffer = self.collector.buffer
+
+        while self._running:
+            try:
+                remaining = self._window_started + self.window_s - time.monotonic()
+                timeout = max(0.0, min(self.poll_s, remaining))
+                await buffer.wait_for(buffer.capacity // 2, timeout)
+                self._process(buffer.read())
+
+                if time.monotonic() - self._window_started >= self.window_s:
+                    self._flush_window()
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = e
+
+        self._process(buffer.read())
+        self._flush_window()
+
+    def _process(self, frame: TelemetryFrame) -> None:
+        if not len(frame):
+            return
+
+        self._window.append(frame)
+        was_forwarding = self.forwarding_raw
+        triggered = self._detect_events(frame)
+        self._last_sample = frame.slice(-1)
+
+        if triggered:
+            self._raw_until = time.monotonic() + self.raw_hold_s
+            if not was_forwarding:
+                for window_frame in self._window[:-1]:
+                    self.output.extend(window_frame)
+
+        if self.forwarding_raw:
+            self.output.extend(frame)
+
+    def _flush_window(self) -> None:
+        if self._window:
+            frame = TelemetryFrame.concat(self._window)
+            self._publish(
+                self.summary_topic, self.summarize(frame), PublishPriority.TELEMETRY
+            )
+            self.summaries_sent += 1
+
+        self._window = []
+        self._window_started = time.monotonic()
+
+    def summarize(self, frame: TelemetryFrame) -> dict:
+        timestamps = frame["timestamp"]
+        return {
+            "device_name": self.collector.device_name,
+            "start": float(timestamps[0]),
+            "end": float(timestamps[-1]),
+            "count": len(frame),
+            "fields": frame.stats(),
+            "health": unpack_health(int(frame["health"][-1])),
+        }
+
+    def _detect_events(self, frame: TelemetryFrame) -> bool:
+        """Publish threshold crossings in ``frame``; True if any occurred."""
+        if self._last_sample is not None:
+            frame = TelemetryFrame.concat([self._last_sample, frame])
+        if len(frame) < 2:
+            return False
+
+        timestamps = frame["timestamp"]
+        events = []
+
+        battery = frame["remaining_percent"]
+        crossed = np.flatnonzero(
+            (battery[:-1] >= self.low_battery_percent)
+            & (battery[1:] < self.low_battery_percent)
+        )
+        for i in crossed + 1:
+            events.append(
+                (
+                    "low_battery",
+                    timestamps[i],
+                    {"remaining_percent": float(battery[i])},
+                )
+            )
+
+        health = frame["health"].astype(np.uint8)
+        changed = np.flatnonzero(health[:-1] ^ health[1:]) + 1
+        for i in changed:
+            flipped = int(health[i - 1] ^ health[i])
+            if flipped & _GPS_BIT:
+                gps_ok = bool(health[i] & _GPS_BIT)
+                events.append(
+                    ("gps_recovered" if gps_ok else "gps_degraded", timestamps[i], {})
+                )
+            others = flipped & ~_GPS_BIT
+            if others:
+                events.append(
+                    (
+                        "health_changed",
+                        timestamps[i],
+                        {
+                            flag: bool(health[i] >> bit & 1)
+                            for bit, flag in enumerate(HEALTH_FLAGS)
+                            if others >> bit & 1
+                        },
+                    )
+                )
+
+        for event_type, timestamp, details in events:
+            logger.warning(f"Telemetry event {event_type}: {details}")
+            self._publish(
+                self.event_topic,
+                {
+                    "device_name": self.collector.device_name,
+                    "type": event_type,
+                    "timestamp": float(timestamp),
+                    "details": details,
+                },
+                PublishPriority.ALERT,
+            )
+            self.events_sent += 1
+
+        return bool(events)
+
+    def _publish(self, topic: str, message: dict, priority: PublishPriority) -> None:
+        try:
+            # NaN is not JSON; summaries must not produce it
+            payload = json.dumps(message, allow_nan=False)
+            if self.outbound:
+                sent = self.outbound.publish(priority, topic, payload)
+                sent.add_done_callback(self._on_sent)
+            else:
+                self.mqtt.publish(topic, payload)
+        except Exception as e:
+            self.error_count += 1
+            self.last_error = e
+
+    def _on_sent(self, sent: asyncio.Future) -> None:
+        if not sent.cancelled() and sent.exception():
+            self.error_count += 1
+            self.last_error = sent.exception()
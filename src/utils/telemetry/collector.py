@@ -1,67 +1,103 @@
 import asyncio
-from datetime import datetime
+import time
 from math import sqrt
 from typing import Optional
 
 from src.core.drone_controller import MavsdkController
-from src.models.telemetry_data import TelemetryData, Position, Battery, Health, Velocity
+from src.utils.telemetry.local_export import LocalTelemetryExporter
+from src.utils.telemetry.rate_policy import SamplingRatePolicy
+from src.utils.telemetry.ring_buffer import TelemetryRingBuffer, pack_health
+from src.utils.telemetry.scheduler import DeadlineScheduler
 
 
 class TelemetryCollector:
     def __init__(
-        self, device_name: str, drone: MavsdkController, interval_hz: float
+        self,
+        device_name: str,
+        drone: MavsdkController,
+        interval_hz: float,
+        capacity: int = 1024,
+        rate_policy: Optional[SamplingRatePolicy] = None,
+        exporter: Optional[LocalTelemetryExporter] = None,
     ) -> None:
         self.device_name = device_name
         self.drone = drone
-        self.interval = 1.0 / interval_hz
-        self.queue = asyncio.Queue(maxsize=100)
+        self.scheduler = DeadlineScheduler(1.0 / interval_hz)
+        self.buffer = TelemetryRingBuffer(capacity)
+        self.rate_policy = rate_policy
+        self.exporter = exporter
         self.__running = False
         self.error_count = 0
         self.last_error: Optional[Exception] = None
 
+    @property
+    def interval(self) -> float:
+        return self.scheduler.interval
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        self.scheduler.interval = interval
+
+    @property
+    def missed_deadlines(self) -> int:
+        return self.scheduler.missed_deadlines
+
+    @property
+    def max_jitter_s(self) -> float:
+        return self.scheduler.max_jitter_s
+
+    @property
+    def mean_jitter_s(self) -> float:
+        return self.scheduler.mean_jitter_s
+
     async def start(self):
         """Start collecting telemetry at fixed rate."""
         self.__running = True
+        self.scheduler.reset()
         asyncio.create_task(self._collect_loop())
 
     async def stop(self):
         self.__running = False
 
+    def close(self):
+        """Release the local export, if any."""
+        if self.exporter:
+            self.exporter.close()
+
     async def _collect_loop(self):
-        """Sample telemetry at fixed intervals."""
+        """Sample on scheduler deadlines, at the rate policy's interval if set."""
         while self.__running:
-            try:
-                telemetry = await self._sample_telemetry()
-
-                try:
-                    self.queue.put_nowait(telemetry)
-                except asyncio.QueueFull:
-                    self.queue.get_nowait()
+            await self.scheduler.wait()
+            if not self.__running:
+                break
 
-                    self.queue.put_nowait(telemetry)
+            try:
+                await self._sample_telemetry()
+                if self.rate_policy:
+                    self.interval = self.rate_policy.next_interval(self.buffer)
             except Exception as e:
                 self.error_count += 1
                 self.last_error = e
 
-            await asyncio.sleep(self.interval)
-
-    async def _sample_telemetry(self) -> TelemetryData:
-        """Sample telemetry at fixed rate."""
-        position_raw, battery_raw, health_raw, velocity_raw, heading_raw = (
-            self.drone.gather_telemetry()
+    async def _sample_telemetry(self) -> None:
+        """Sample telemetry into the ring buffer, oldest samples are overwritten."""
+        position_raw, battery_raw, health_raw, velocity_raw, heading_raw, _, _ = (
+            await self.drone.gather_telemetry()
         )
 
-        ground_speed: float = sqrt(velocity_raw.east_m_s**2 + velocity_raw.north_m_s**2)
-
-        data: TelemetryData = TelemetryData(
-            device_name=self.device_name,
-            timestamp=datetime.now().timestamp(),
-            position=Position(**position_raw.__dict__),
-            battery=Battery(**battery_raw.__dict__),
-            health=Health(**health_raw.__dict__),
-            velocity=Velocity(
-                ground_speed_ms=ground_speed, heading_deg=heading_raw.heading_deg
-            ),
+        sample = dict(
+            timestamp=time.time(),
+            latitude_deg=position_raw.latitude_deg,
+            longitude_deg=position_raw.longitude_deg,
+            relative_altitude_m=position_raw.relative_altitude_m,
+            voltage_v=battery_raw.voltage_v,
+            remaining_percent=battery_raw.remaining_percent,
+            temperature_degc=battery_raw.temperature_degc,
+            ground_speed_ms=sqrt(velocity_raw.east_m_s**2 + velocity_raw.north_m_s**2),
+            heading_deg=heading_raw.heading_deg,
+            health=pack_health(health_raw),
         )
+        self.buffer.append(**sample)
 
-        return data
+        if self.exporter:
+            self.exporter.export(sample)
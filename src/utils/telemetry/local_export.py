@@ -0,0 +1,155 @@
+"""
+Export every telemetry sample to other processes on the companion computer.
+
+Both transports carry the same fixed little-endian record, no padding::
+
+    u64 sequence, then one field per ``COLUMNS`` entry in order:
+    f64 timestamp, f64 latitude_deg, f64 longitude_deg,
+    f32 relative_altitude_m, f32 voltage_v, f32 remaining_percent,
+    f32 temperature_degc, f32 ground_speed_ms, f32 heading_deg, u8 health
+
+In shared memory the record is a seqlock: the writer makes ``sequence`` odd,
+writes the fields, then makes it even again. Readers retry while it is odd
+or changed during their copy. Over the Unix datagram socket ``sequence`` is
+the sample count, so receivers can detect gaps.
+"""
+
+import socket
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.utils.telemetry.ring_buffer import COLUMNS
+
+RECORD = struct.Struct(
+    "<Q" + "".join(np.dtype(dtype).char for dtype in COLUMNS.values())
+)
+_SEQUENCE = struct.Struct("<Q")
+
+
+def decode_record(record: bytes) -> Tuple[int, Dict[str, float]]:
+    sequence, *values = RECORD.unpack(record)
+    return sequence, dict(zip(COLUMNS, values))
+
+
+class LocalTelemetryExporter:
+    """
+    Writes each sample into the shared memory block ``shm_name`` and/or
+    sends it to the Unix datagram socket at ``socket_path``. Either may be
+    None to disable that transport. Datagrams nobody is listening for are
+    counted in ``dropped`` rather than treated as errors.
+    """
+
+    def __init__(
+        self, shm_name: Optional[str] = None, socket_path: Optional[str] = None
+    ) -> None:
+        self.shm_name = shm_name
+        self.socket_path = socket_path
+        self.samples = 0
+        self.dropped = 0
+        self.error_count = 0
+        self.last_error: Optional[Exception] = None
+
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._socket: Optional[socket.socket] = None
+        self._sequence = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.shm_name or self.socket_path)
+
+    def export(self, sample: Dict[str, float]) -> None:
+        if not self.enabled:
+            return
+
+        self.samples += 1
+        values = [sample[name] for name in COLUMNS]
+
+        try:
+            if self.shm_name:
+                self._write_shared(values)
+            if self.socket_path:
+                self._send_datagram(values)
+        except Exception as e:
+            self.error_count += 1
+            self.last_error = e
+
+    def close(self) -> None:
+        if self._shm:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+    def _write_shared(self, values: list) -> None:
+        if self._shm is None:
+            self._shm = self._open_shared()
+
+        buf = self._shm.buf
+        self._sequence += 1
+        _SEQUENCE.pack_into(buf, 0, self._sequence)
+        RECORD.pack_into(buf, 0, self._sequence, *values)
+        self._sequence += 1
+        _SEQUENCE.pack_into(buf, 0, self._sequence)
+
+    def _open_shared(self) -> shared_memory.SharedMemory:
+        try:
+            shm = shared_memory.SharedMemory(
+                self.shm_name, create=True, size=RECORD.size
+            )
+        except FileExistsError:
+            # Left behind by a previous run, reuse it.
+            shm = shared_memory.SharedMemory(self.shm_name)
+            self._sequence = _SEQUENCE.unpack_from(shm.buf, 0)[0] & ~1
+
+        logger.info(f"Exporting telemetry to shared memory {self.shm_name}")
+        return shm
+
+    def _send_datagram(self, values: list) -> None:
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+
+        try:
+            self._socket.sendto(RECORD.pack(self.samples, *values), self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+            self.dropped += 1
+
+
+class SharedTelemetryReader:
+    """Reference reader for the shared memory export."""
+
+    def __init__(self, shm_name: str, max_retries: int = 1000) -> None:
+        self._shm = shared_memory.SharedMemory(shm_name)
+        # Attaching registers the block with this process' resource tracker,
+        # which would unlink it from under the writer on exit.
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.max_retries = max_retries
+
+    def read(self) -> Optional[Tuple[int, Dict[str, float]]]:
+        """Latest consistent ``(sample count, fields)``, None if unavailable."""
+        buf = self._shm.buf
+
+        for _ in range(self.max_retries):
+            before = _SEQUENCE.unpack_from(buf, 0)[0]
+            if before & 1:
+                continue
+
+            record = bytes(buf[: RECORD.size])
+            if _SEQUENCE.unpack_from(buf, 0)[0] != before:
+                continue
+
+            if before == 0:
+                return None
+            sequence, fields = decode_record(record)
+            return sequence // 2, fields
+
+        return None
+
+    def close(self) -> None:
+        self._shm.close()
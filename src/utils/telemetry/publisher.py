@@ -1,36 +1,119 @@
 import asyncio
-import base64
+import time
 from typing import Optional
 
-import cbor2
+from loguru import logger
 
 from src.core.mqtt_manager import MqttManager
+from src.core.outbound_scheduler import OutboundScheduler
+from src.enums.publish_priority import PublishPriority
+from src.enums.telemetry_compression import TelemetryCompression
+from src.exceptions.telemetry_exception import (
+    TelemetryException,
+    WireFormatException,
+)
+from src.utils.journal import SegmentJournal
 from src.utils.telemetry.collector import TelemetryCollector
+from src.utils.telemetry.rate_policy import FieldRateFilter
+from src.utils.telemetry.ring_buffer import TelemetryFrame, TelemetryRingBuffer
+from src.utils.telemetry.wire_format import (
+    encode_batch,
+    compress_batch,
+    compression_available,
+    mark_backfill,
+    CONTENT_TYPE,
+)
 
 
 class TelemetryPublisher:
+    """
+    Publishes telemetry batches from ``buffer``, the collector's ring
+    buffer unless another stage (such as the aggregator) feeds it.
+
+    A batch is flushed when it reaches ``batch_size`` samples, when its
+    estimated encoded size reaches ``max_batch_bytes``, or when its oldest
+    sample is ``max_latency_s`` old and it holds at least ``min_fill`` samples.
+    Batches that still encode above ``max_batch_bytes`` are split.
+
+    With a ``journal``, batches produced while MQTT is disconnected (or
+    whose publish fails) are stored on disk and later republished at
+    ``backfill_rate`` batches per second, tagged with ``FLAG_BACKFILL``.
+    A journaled batch is only removed once its PUBACK arrives.
+
+    With an ``outbound`` scheduler, live batches are sent as ``TELEMETRY``
+    and backfill as ``BACKFILL`` traffic; live batches it preempts or that
+    fail are journaled like batches produced while disconnected.
+    """
+
     def __init__(
         self,
         collector: TelemetryCollector,
         mqtt: MqttManager,
         topic: str,
         batch_size: int = 10,
+        max_batch_bytes: int = 131072,
+        max_latency_s: float = 3.5,
+        min_fill: int = 1,
+        compression: TelemetryCompression = TelemetryCompression.NONE,
+        journal: Optional[SegmentJournal] = None,
+        backfill_rate: float = 5.0,
+        field_filter: Optional[FieldRateFilter] = None,
+        buffer: Optional[TelemetryRingBuffer] = None,
+        outbound: Optional[OutboundScheduler] = None,
     ):
+        if not compression_available(compression):
+            raise TelemetryException(f"{compression.value} compression unavailable")
+
         self.collector = collector
+        self.buffer = buffer if buffer is not None else collector.buffer
         self.mqtt = mqtt
         self.topic = topic
         self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_latency_s = max_latency_s
+        self.min_fill = max(1, min_fill)
+        self.compression = compression
+        self.journal = journal
+        self.backfill_rate = backfill_rate
+        self.field_filter = field_filter
+        self.outbound = outbound
         self._running = False
         self._task = None
+        self._backfill_task: Optional[asyncio.Task] = None
         self.error_count = 0
         self.last_error: Optional[Exception] | None = None
 
+        self._bytes_per_sample = 16.0
+        self._active_since: Optional[float] = None
+        self._active_seconds = 0.0
+        self.batches_sent = 0
+        self.samples_sent = 0
+        self.bytes_uncompressed = 0
+        self.bytes_sent = 0
+        self.batches_journaled = 0
+        self.batches_backfilled = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.bytes_uncompressed / self.bytes_sent if self.bytes_sent else 1.0
+
+    @property
+    def bytes_per_flight_hour(self) -> float:
+        """Uplink bytes per hour of publisher activity."""
+        active = self._active_seconds
+        if self._active_since is not None:
+            active += time.monotonic() - self._active_since
+        return self.bytes_sent / active * 3600 if active else 0.0
+
     async def start(self):
         """Start publishing telemetry batches."""
         if self._running:
             return
 
         self._running = True
+        self._active_since = time.monotonic()
+        if self.field_filter:
+            self.field_filter.reset()
         self._task = asyncio.create_task(self._publish_topic())
 
     async def stop(self):
@@ -38,43 +121,182 @@ class TelemetryPublisher:
         self._running = False
         if self._task:
             await self._task
+            self._task = None
 
-    async def _publish_topic(self):
-        """Consume queue and publish in batches."""
-        batch = []
+        if self._active_since is not None:
+            self._active_seconds += time.monotonic() - self._active_since
+            self._active_since = None
+            logger.info(
+                f"Telemetry uplink: {self.bytes_sent} B in {self.batches_sent} batches, "
+                f"compression {self.compression_ratio:.2f}x, "
+                f"{self.bytes_per_flight_hour / 1e6:.2f} MB/h"
+            )
 
-        while self._running:
+    async def start_backfill(self):
+        """Start republishing journaled batches whenever MQTT is connected."""
+        if self.journal is None or self._backfill_task:
+            return
+        self._backfill_task = asyncio.create_task(self._backfill_loop())
+
+    async def stop_backfill(self):
+        if self._backfill_task:
+            self._backfill_task.cancel()
             try:
-                telemetry = await asyncio.wait_for(
-                    self.collector.queue.get(), timeout=3.5
-                )
-                batch.append(telemetry.model_dump())
+                await self._backfill_task
+            except asyncio.CancelledError:
+                pass
+            self._backfill_task = None
+        if self.journal is not None:
+            self.journal.sync()
 
-                if len(batch) >= self.batch_size:
-                    self._publish_batch(batch)
-                    batch = []
+    async def _publish_topic(self):
+        """Read batches from the ring buffer and publish them."""
+        buffer = self.buffer
 
-            except asyncio.TimeoutError:
-                if batch:
-                    self._publish_batch(batch)
-                    batch = []
+        while self._running:
+            try:
+                frame = await self._next_batch()
+                if frame is not None and len(frame):
+                    self._publish_batch(self._filter(frame))
 
             except Exception as e:
                 self.error_count += 1
                 self.last_error = e
                 pass
 
-        if batch:
-            self._publish_batch(batch)
+        while len(buffer):
+            self._publish_batch(self._filter(buffer.read(self._target_count())))
+
+    def _filter(self, frame: TelemetryFrame) -> TelemetryFrame:
+        return self.field_filter.apply(frame) if self.field_filter else frame
+
+    def _target_count(self) -> int:
+        by_size = int(self.max_batch_bytes // self._bytes_per_sample)
+        return max(1, min(self.batch_size, by_size))
 
-    def _publish_batch(self, batch: list):
+    async def _next_batch(self) -> Optional[TelemetryFrame]:
+        buffer = self.buffer
+        target = self._target_count()
+
+        oldest = buffer.oldest_timestamp()
+        if oldest is None:
+            remaining = self.max_latency_s
+        else:
+            remaining = max(0.0, oldest + self.max_latency_s - time.time())
+
+        if await buffer.wait_for(target, remaining):
+            return buffer.read(target)
+
+        if len(buffer) >= self.min_fill:
+            return buffer.read(target)
+
+        if len(buffer):
+            await buffer.wait_for(self.min_fill, self.max_latency_s)
+        return None
+
+    def _publish_batch(self, frame: TelemetryFrame):
         """Publish batch to MQTT."""
         try:
-            cbor_bytes: bytes = cbor2.dumps(batch)
-            encoded = base64.b64encode(cbor_bytes).decode("ascii")
+            uncompressed = encode_batch(frame, self.collector.device_name)
+            self._bytes_per_sample = 0.8 * self._bytes_per_sample + 0.2 * (
+                len(uncompressed) / len(frame)
+            )
+
+            payload = compress_batch(uncompressed, self.compression)
 
-            self.mqtt.publish(self.topic, encoded)
+            if len(payload) > self.max_batch_bytes and len(frame) > 1:
+                half = len(frame) // 2
+                self._publish_batch(frame.slice(0, half))
+                self._publish_batch(frame.slice(half))
+                return
+
+            self.samples_sent += len(frame)
+            self.bytes_uncompressed += len(uncompressed)
+            self._send(payload)
         except Exception as e:
             self.error_count += 1
             self.last_error = e
-            pass
+            self._not_sent_live()
+
+    def _not_sent_live(self) -> None:
+        # Receivers take an absent column as unchanged since they last got
+        # it, so after a batch that did not go out live the next one must
+        # carry every column again.
+        if self.field_filter:
+            self.field_filter.reset()
+
+    def _send(self, payload: bytes) -> None:
+        if self.journal is None:
+            self._publish(payload)
+            return
+
+        if self.mqtt.connected:
+            try:
+                self._publish(payload)
+                return
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = e
+
+        self._not_sent_live()
+        self.journal.append(payload)
+        self.batches_journaled += 1
+
+    def _publish(self, payload: bytes) -> None:
+        if self.outbound:
+            sent = self.outbound.publish(
+                PublishPriority.TELEMETRY, self.topic, payload, CONTENT_TYPE
+            )
+            sent.add_done_callback(lambda f: self._on_sent(payload, f))
+            return
+
+        self.mqtt.publish(self.topic, payload, content_type=CONTENT_TYPE)
+        self.batches_sent += 1
+        self.bytes_sent += len(payload)
+
+    def _on_sent(self, payload: bytes, sent: asyncio.Future) -> None:
+        error = sent.exception() if not sent.cancelled() else None
+        if error is None:
+            self.batches_sent += 1
+            self.bytes_sent += len(payload)
+            return
+
+        self.error_count += 1
+        self.last_error = error
+        self._not_sent_live()
+        if self.journal is not None:
+            self.journal.append(payload)
+            self.batches_journaled += 1
+
+    async def _publish_acknowledged(self, payload: bytes, priority: PublishPriority):
+        if self.outbound:
+            await self.outbound.publish(priority, self.topic, payload, CONTENT_TYPE)
+        else:
+            ack = await self.mqtt.publish_async(
+                self.topic, payload, content_type=CONTENT_TYPE
+            )
+            await ack
+        self.batches_sent += 1
+        self.bytes_sent += len(payload)
+
+    async def _backfill_loop(self):
+        while True:
+            if not self.mqtt.connected or not len(self.journal):
+                await asyncio.sleep(1.0)
+                continue
+
+            try:
+                (payload,) = self.journal.peek(1)
+                await self._publish_acknowledged(
+                    mark_backfill(payload), PublishPriority.BACKFILL
+                )
+                self.journal.commit(1)
+                self.batches_backfilled += 1
+            except WireFormatException as e:
+                logger.warning(f"Dropping unreadable journaled telemetry batch: {e}")
+                self.journal.commit(1)
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = e
+
+            await asyncio.sleep(1.0 / self.backfill_rate)
@@ -0,0 +1,124 @@
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.core.state_machine import StateMachine
+from src.enums.execution_state import ExecutionState
+from src.utils.telemetry.ring_buffer import TelemetryFrame, TelemetryRingBuffer
+
+_HIGH_RATE_STATES = {
+    ExecutionState.ARMED,
+    ExecutionState.COMPLETING,
+    ExecutionState.CANCELLING,
+    ExecutionState.MANUAL,
+}
+_CRUISE_STATES = {ExecutionState.IN_FLIGHT}
+
+
+class SamplingRatePolicy:
+    """
+    Chooses the collector's sample interval from the flight phase.
+
+    Takeoff (ARMED), landing (COMPLETING), RTL (CANCELLING) and MANUAL
+    sample at ``high_hz``; IN_FLIGHT samples at ``cruise_hz`` unless the
+    recent samples show climbing, accelerating or a steep battery voltage
+    drop, in which case it also uses ``high_hz``. Every other state is
+    on the ground and samples at ``idle_hz``.
+    """
+
+    def __init__(
+        self,
+        state: StateMachine,
+        cruise_hz: float,
+        high_hz: float,
+        idle_hz: float,
+        window_s: float = 2.0,
+        climb_rate_ms: float = 0.5,
+        acceleration_mss: float = 0.5,
+        voltage_slope_vs: float = -0.02,
+    ) -> None:
+        self.state = state
+        self.cruise_hz = cruise_hz
+        self.high_hz = max(high_hz, cruise_hz)
+        self.idle_hz = min(idle_hz, cruise_hz)
+        self.window_s = window_s
+        self.climb_rate_ms = climb_rate_ms
+        self.acceleration_mss = acceleration_mss
+        self.voltage_slope_vs = voltage_slope_vs
+
+    def next_interval(self, buffer: TelemetryRingBuffer) -> float:
+        return 1.0 / self.rate_hz(buffer)
+
+    def rate_hz(self, buffer: TelemetryRingBuffer) -> float:
+        state = self.state.get_state()
+
+        if state in _HIGH_RATE_STATES:
+            return self.high_hz
+        if state not in _CRUISE_STATES:
+            return self.idle_hz
+
+        window = max(3, int(self.window_s * self.high_hz))
+        if self.is_dynamic(buffer.latest(window)):
+            return self.high_hz
+        return self.cruise_hz
+
+    def is_dynamic(self, frame: TelemetryFrame) -> bool:
+        if len(frame) < 3:
+            return False
+
+        t = frame["timestamp"]
+        recent = t >= t[-1] - self.window_s
+        if recent.sum() < 3:
+            return False
+
+        t = t[recent] - t[recent][0]
+        if t[-1] <= 0:
+            return False
+
+        climb = np.polyfit(t, frame["relative_altitude_m"][recent], 1)[0]
+        acceleration = np.polyfit(t, frame["ground_speed_ms"][recent], 1)[0]
+        voltage_slope = np.polyfit(t, frame["voltage_v"][recent], 1)[0]
+
+        return bool(
+            abs(climb) >= self.climb_rate_ms
+            or abs(acceleration) >= self.acceleration_mss
+            or voltage_slope <= self.voltage_slope_vs
+        )
+
+
+class FieldRateFilter:
+    """
+    Omits slow-changing columns from outgoing batches.
+
+    A column listed in ``field_intervals`` is only sent when its values
+    changed since it was last sent or its interval has elapsed. Receivers
+    treat an absent column as unchanged.
+    """
+
+    def __init__(self, field_intervals: Dict[str, float]) -> None:
+        self.field_intervals = field_intervals
+        self._last_sent: Dict[str, tuple[float, float]] = {}
+
+    def apply(
+        self, frame: TelemetryFrame, now: Optional[float] = None
+    ) -> TelemetryFrame:
+        now = time.monotonic() if now is None else now
+        columns = dict(frame.columns)
+
+        for name, interval in self.field_intervals.items():
+            values = columns.get(name)
+            if values is None or len(values) == 0:
+                continue
+
+            last = self._last_sent.get(name)
+            unchanged = last is not None and np.all(values == last[1])
+            if unchanged and now - last[0] < interval:
+                del columns[name]
+            else:
+                self._last_sent[name] = (now, values[-1])
+
+        return TelemetryFrame(columns)
+
+    def reset(self) -> None:
+        self._last_sent.clear()
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+HEALTH_FLAGS: tuple[str, ...] = (
+    "is_gyrometer_calibration_ok",
+    "is_accelerometer_calibration_ok",
+    "is_magnetometer_calibration_ok",
+    "is_local_position_ok",
+    "is_global_position_ok",
+    "is_home_position_ok",
+)
+
+COLUMNS: Dict[str, type] = {
+    "timestamp": np.float64,
+    "latitude_deg": np.float64,
+    "longitude_deg": np.float64,
+    "relative_altitude_m": np.float32,
+    "voltage_v": np.float32,
+    "remaining_percent": np.float32,
+    "temperature_degc": np.float32,
+    "ground_speed_ms": np.float32,
+    "heading_deg": np.float32,
+    "health": np.uint8,
+}
+
+
+def pack_health(health: Any) -> int:
+    """Pack the MAVSDK health booleans into a bitfield, bit i = HEALTH_FLAGS[i]."""
+    bits = 0
+    for i, flag in enumerate(HEALTH_FLAGS):
+        if getattr(health, flag):
+            bits |= 1 << i
+    return bits
+
+
+def unpack_health(bits: int) -> Dict[str, bool]:
+    return {flag: bool(bits >> i & 1) for i, flag in enumerate(HEALTH_FLAGS)}
+
+
+@dataclass
+class TelemetryFrame:
+    """A contiguous run of samples, one NumPy array per column."""
+
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @staticmethod
+    def concat(frames: list["TelemetryFrame"]) -> "TelemetryFrame":
+        names = frames[0].columns.keys()
+        return TelemetryFrame(
+            {name: np.concatenate([f.columns[name] for f in frames]) for name in names}
+        )
+
+    def slice(self, start: int, stop: Optional[int] = None) -> "TelemetryFrame":
+        return TelemetryFrame({k: v[start:stop] for k, v in self.columns.items()})
+
+    def downsample(self, step: int) -> "TelemetryFrame":
+        """Keep every ``step``-th sample, always including the most recent one."""
+        if step <= 1 or len(self) == 0:
+            return self
+        index = np.arange(len(self) - 1, -1, -step)[::-1]
+        return TelemetryFrame({k: v[index] for k, v in self.columns.items()})
+
+    def deltas(self, name: str) -> np.ndarray:
+        return np.diff(self.columns[name])
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Min/max/mean/last for every numeric column except health, over the
+        samples that are not NaN; all None for a column without any.
+        """
+        if len(self) == 0:
+            return {}
+
+        stats = {}
+        for name, values in self.columns.items():
+            if name == "health":
+                continue
+            valid = np.flatnonzero(~np.isnan(values))
+            if not len(valid):
+                stats[name] = dict.fromkeys(("min", "max", "mean", "last"))
+                continue
+            stats[name] = {
+                "min": float(np.nanmin(values)),
+                "max": float(np.nanmax(values)),
+                "mean": float(np.nanmean(values)),
+                "last": float(values[valid[-1]]),
+            }
+        return stats
+
+    def to_records(self, device_name: str) -> list[dict]:
+        """Expand into ``TelemetryData.model_dump()`` shaped dicts."""
+        c = {name: values.tolist() for name, values in self.columns.items()}
+        return [
+            {
+                "device_name": device_name,
+                "timestamp": c["timestamp"][i],
+                "position": {
+                    "latitude_deg": c["latitude_deg"][i],
+                    "longitude_deg": c["longitude_deg"][i],
+                    "relative_altitude_m": c["relative_altitude_m"][i],
+                },
+                "battery": {
+                    "temperature_degc": c["temperature_degc"][i],
+                    "voltage_v": c["voltage_v"][i],
+                    "remaining_percent": c["remaining_percent"][i],
+                },
+                "health": unpack_health(c["health"][i]),
+                "velocity": {
+                    "ground_speed_ms": c["ground_speed_ms"][i],
+                    "heading_deg": c["heading_deg"][i],
+                },
+            }
+            for i in range(len(self))
+        ]
+
+
+class TelemetryRingBuffer:
+    """
+    Fixed-size columnar ring buffer for telemetry samples.
+    When full, the oldest samples are overwritten and counted in ``dropped``.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()
+        }
+        self._head = 0
+        self._tail = 0
+        self.dropped = 0
+        self._available = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def append(self, **values: float) -> None:
+        """Write one sample; every column in ``COLUMNS`` must be given."""
+        index = self._head % self.capacity
+        for name, column in self._columns.items():
+            column[index] = values[name]
+
+        self._head += 1
+        if len(self) > self.capacity:
+            self._tail += 1
+            self.dropped += 1
+
+        self._available.set()
+
+    def extend(self, frame: TelemetryFrame) -> None:
+        for i in range(len(frame)):
+            self.append(**{name: frame[name][i] for name in COLUMNS})
+
+    def read(self, max_count: Optional[int] = None) -> TelemetryFrame:
+        """Consume up to ``max_count`` of the oldest samples."""
+        count = len(self) if max_count is None else min(max_count, len(self))
+        frame = self._slice(self._tail, count)
+        self._tail += count
+        return frame
+
+    def latest(self, count: int) -> TelemetryFrame:
+        """
+        Return the newest ``count`` samples without consuming them. Samples
+        already read but not yet overwritten are included.
+        """
+        count = min(count, self._head, self.capacity)
+        return self._slice(self._head - count, count)
+
+    def oldest_timestamp(self) -> Optional[float]:
+        if not len(self):
+            return None
+        return float(self._columns["timestamp"][self._tail % self.capacity])
+
+    async def wait_for(self, count: int, timeout: float) -> bool:
+        """Wait until at least ``count`` samples are buffered or ``timeout`` expires."""
+        deadline = time.monotonic() + timeout
+        while len(self) < count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            self._available.clear()
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _slice(self, start: int, count: int) -> TelemetryFrame:
+        begin = start % self.capacity
+        end = begin + count
+
+        if end <= self.capacity:
+            return TelemetryFrame(
+                {k: v[begin:end].copy() for k, v in self._columns.items()}
+            )
+
+        wrapped = end - self.capacity
+        return TelemetryFrame(
+            {
+                k: np.concatenate((v[begin:], v[:wrapped]))
+                for k, v in self._columns.items()
+            }
+        )
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class DeadlineScheduler:
+    """
+    Paces a loop on absolute monotonic deadlines.
+
+    Each deadline is the previous one plus the current ``interval``, so the
+    time spent between calls to ``wait`` does not accumulate as drift and
+    ``interval`` may change between ticks. When the caller overruns one or
+    more whole intervals those deadlines are skipped and counted in
+    ``missed_deadlines`` instead of firing back to back. Lateness of every
+    tick relative to its deadline is tracked as jitter.
+    """
+
+    def __init__(
+        self, interval: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.interval = interval
+        self._clock = clock
+        self._last_deadline: Optional[float] = None
+
+        self.ticks = 0
+        self.missed_deadlines = 0
+        self.last_jitter_s = 0.0
+        self.max_jitter_s = 0.0
+        self._total_jitter_s = 0.0
+
+    @property
+    def mean_jitter_s(self) -> float:
+        return self._total_jitter_s / self.ticks if self.ticks else 0.0
+
+    def reset(self) -> None:
+        """Start over with the next ``wait`` firing immediately."""
+        self._last_deadline = None
+
+    async def wait(self) -> float:
+        """Sleep until the next deadline and return it."""
+        now = self._clock()
+
+        if self._last_deadline is None:
+            deadline = now
+        else:
+            deadline = self._last_deadline + self.interval
+            if now - deadline >= self.interval:
+                missed = int((now - deadline) // self.interval)
+                self.missed_deadlines += missed
+                deadline += missed * self.interval
+
+        if deadline > now:
+            await asyncio.sleep(deadline - now)
+            now = self._clock()
+
+        self._last_deadline = deadline
+        self._record(max(0.0, now - deadline))
+        return deadline
+
+    def _record(self, jitter: float) -> None:
+        self.ticks += 1
+        self.last_jitter_s = jitter
+        self.max_jitter_s = max(self.max_jitter_s, jitter)
+        self._total_jitter_s += jitter
@@ -0,0 +1,334 @@
+"""
+Compact columnar telemetry batch format.
+
+Layout (all integers are LEB128 varints unless noted)::
+
+    magic        b"FT"
+    version      u8
+    flags        u8, bits 0-1 hold the compression codec, bit 2 FLAG_BACKFILL
+    device_name  varint length + UTF-8 bytes
+    count        number of samples
+    column_mask  bit i set when COLUMN_SPECS[i] is present
+    gap_mask     bit i set when COLUMN_SPECS[i] has missing samples
+    validity     one bitmap of ceil(count / 8) bytes per column in gap_mask,
+                 bit j (MSB first) set when sample j is valid
+    columns      one block per present column, numeric columns in
+                 COLUMN_SPECS order followed by the raw u8 columns
+
+Numeric columns are quantized to integers with a fixed scale, delta
+encoded against the previous sample (the first value is absolute) and
+zigzag varint packed. Missing samples (NaN, as MAVSDK reports unknown
+battery values, or any other non-finite value) repeat the previous valid
+value and decode as NaN. The health column is one raw bitfield byte per sample.
+When a codec is set, everything after the header is compressed with it.
+A column missing from the mask is unchanged since the device last sent it.
+"""
+
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    from compression import zstd  # type: ignore  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore
+    except ImportError:
+        zstd = None
+
+from src.enums.telemetry_compression import TelemetryCompression
+from src.exceptions.telemetry_exception import WireFormatException
+from src.utils.telemetry.ring_buffer import TelemetryFrame
+
+MAGIC = b"FT"
+FORMAT_VERSION = 2
+CONTENT_TYPE = "application/vnd.fleetcore.telemetry"
+
+# Column name -> quantization scale; None marks a raw u8 column.
+COLUMN_SPECS: tuple[tuple[str, Optional[int]], ...] = (
+    ("timestamp", 1_000),
+    ("latitude_deg", 10_000_000),
+    ("longitude_deg", 10_000_000),
+    ("relative_altitude_m", 100),
+    ("voltage_v", 1_000),
+    ("remaining_percent", 10),
+    ("temperature_degc", 10),
+    ("ground_speed_ms", 100),
+    ("heading_deg", 100),
+    ("health", None),
+)
+
+_HEADER_SIZE = len(MAGIC) + 2
+
+COMPRESSION_MASK = 0x03
+FLAG_BACKFILL = 0x04
+_CODEC_FLAGS: Dict[TelemetryCompression, int] = {
+    TelemetryCompression.NONE: 0,
+    TelemetryCompression.ZLIB: 1,
+    TelemetryCompression.ZSTD: 2,
+}
+
+
+@dataclass
+class DecodedBatch:
+    version: int
+    flags: int
+    device_name: str
+    frame: TelemetryFrame
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """LEB128-encode an array of unsigned integers."""
+    v = np.asarray(values, dtype=np.uint64)
+    if v.size == 0:
+        return b""
+
+    groups = [v & np.uint64(0x7F)]
+    significant = np.ones(len(v), dtype=np.int64)
+    rest = v >> np.uint64(7)
+    while rest.any():
+        groups.append(rest & np.uint64(0x7F))
+        significant += rest != 0
+        rest = rest >> np.uint64(7)
+
+    chunks = np.stack(groups, axis=1).astype(np.uint8)
+    width = chunks.shape[1]
+
+    position = np.arange(width)
+    valid = position[None, :] < significant[:, None]
+    more = position[None, :] < (significant[:, None] - 1)
+    chunks |= (more << 7).astype(np.uint8)
+
+    return chunks[valid].tobytes()
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data: np.ndarray, offset: int, count: int) -> tuple[np.ndarray, int]:
+    """Decode ``count`` varints from ``data[offset:]``; returns values and new offset."""
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64), offset
+
+    view = data[offset:]
+    ends = np.flatnonzero(view < 0x80)[:count]
+    if len(ends) < count:
+        raise WireFormatException("Truncated varint column")
+
+    end = int(ends[-1]) + 1
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    if lengths.max() > 10:
+        raise WireFormatException("Varint longer than 64 bits")
+
+    shift = (np.arange(end) - np.repeat(starts, lengths)) * 7
+    terms = (view[:end].astype(np.uint64) & np.uint64(0x7F)) << shift.astype(np.uint64)
+
+    return np.add.reduceat(terms, starts), offset + end
+
+
+def zigzag(values: np.ndarray) -> np.ndarray:
+    v = values.astype(np.int64)
+    return ((v << 1) ^ (v >> 63)).view(np.uint64)
+
+
+def unzigzag(values: np.ndarray) -> np.ndarray:
+    v = values.astype(np.uint64)
+    return (v >> np.uint64(1)).view(np.int64) ^ -(v & np.uint64(1)).view(np.int64)
+
+
+def compression_available(compression: TelemetryCompression) -> bool:
+    return compression != TelemetryCompression.ZSTD or zstd is not None
+
+
+def _compress(body: bytes, compression: TelemetryCompression) -> bytes:
+    match compression:
+        case TelemetryCompression.ZLIB:
+            return zlib.compress(body, 6)
+        case TelemetryCompression.ZSTD:
+            if zstd is None:
+                raise WireFormatException("zstd support is not installed")
+            return zstd.compress(body)
+        case _:
+            return body
+
+
+def _decompress(body: bytes, flags: int) -> bytes:
+    codec = flags & COMPRESSION_MASK
+    try:
+        if codec == _CODEC_FLAGS[TelemetryCompression.ZLIB]:
+            return zlib.decompress(body)
+        if codec == _CODEC_FLAGS[TelemetryCompression.ZSTD]:
+            if zstd is None:
+                raise WireFormatException("zstd support is not installed")
+            return zstd.decompress(body)
+    except WireFormatException:
+        raise
+    except Exception as e:
+        raise WireFormatException(f"Corrupt compressed body: {e}")
+
+    if codec:
+        raise WireFormatException(f"Unknown compression codec {codec}")
+    return body
+
+
+def encode_batch(
+    frame: TelemetryFrame,
+    device_name: str,
+    flags: int = 0,
+    compression: TelemetryCompression = TelemetryCompression.NONE,
+) -> bytes:
+    """Encode every column of ``frame`` that is part of ``COLUMN_SPECS``."""
+    count = len(frame)
+    name = device_name.encode("utf-8")
+
+    mask = 0
+    numeric, scales, raw = [], [], []
+    for bit, (column, scale) in enumerate(COLUMN_SPECS):
+        if column not in frame.columns:
+            continue
+        mask |= 1 << bit
+
+        if scale is None:
+            raw.append(frame[column].astype(np.uint8).tobytes())
+        else:
+            numeric.append(frame[column])
+            scales.append(scale)
+
+    body = b""
+    gap_mask = 0
+    if numeric:
+        matrix = np.array(numeric, dtype=np.float64) * np.array(scales)[:, None]
+        valid = np.isfinite(matrix)
+        quantized = np.zeros(matrix.shape, dtype=np.int64)
+        quantized[valid] = np.round(matrix[valid])
+
+        gaps = ~valid.all(axis=1)
+        if gaps.any():
+            # a missing sample repeats the last valid value, a zero delta
+            last_valid = np.where(valid, np.arange(count), 0)
+            np.maximum.accumulate(last_valid, axis=1, out=last_valid)
+            quantized = np.take_along_axis(quantized, last_valid, axis=1)
+
+            numeric_bits = [
+                bit
+                for bit, (_, scale) in enumerate(COLUMN_SPECS)
+                if mask >> bit & 1 and scale is not None
+            ]
+            for bit, row in zip(numeric_bits, valid):
+                if not row.all():
+                    gap_mask |= 1 << bit
+                    body += np.packbits(row).tobytes()
+
+        body += encode_varints(zigzag(np.diff(quantized, axis=1, prepend=0)).ravel())
+
+    flags = flags & ~COMPRESSION_MASK | _CODEC_FLAGS[compression]
+    header = MAGIC + bytes((FORMAT_VERSION, flags))
+    header += _varint(len(name)) + name + _varint(count) + _varint(mask)
+    header += _varint(gap_mask)
+
+    return header + _compress(body + b"".join(raw), compression)
+
+
+def mark_backfill(payload: bytes) -> bytes:
+    """Tag a stored batch as backfilled rather than live."""
+    if payload[: len(MAGIC)] != MAGIC:
+        raise WireFormatException("Not a telemetry batch")
+
+    flags_index = len(MAGIC) + 1
+    return (
+        payload[:flags_index]
+        + bytes((payload[flags_index] | FLAG_BACKFILL,))
+        + payload[flags_index + 1 :]
+    )
+
+
+def compress_batch(payload: bytes, compression: TelemetryCompression) -> bytes:
+    """Compress the body of an uncompressed ``encode_batch`` payload."""
+    if compression == TelemetryCompression.NONE:
+        return payload
+
+    flags = payload[len(MAGIC) + 1]
+    if flags & COMPRESSION_MASK:
+        raise WireFormatException("Batch is already compressed")
+
+    data = np.frombuffer(payload, dtype=np.uint8)
+    (name_length,), offset = decode_varints(data, _HEADER_SIZE, 1)
+    _, header_end = decode_varints(data, offset + int(name_length), 3)
+
+    header = bytearray(payload[:header_end])
+    header[len(MAGIC) + 1] = flags | _CODEC_FLAGS[compression]
+    return bytes(header) + _compress(payload[header_end:], compression)
+
+
+def decode_batch(payload: bytes) -> DecodedBatch:
+    """Reference decoder for ``encode_batch``."""
+    if payload[: len(MAGIC)] != MAGIC:
+        raise WireFormatException("Not a telemetry batch")
+
+    version, flags = payload[len(MAGIC)], payload[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise WireFormatException(f"Unsupported telemetry format version {version}")
+
+    data = np.frombuffer(payload, dtype=np.uint8)
+    (name_length,), offset = decode_varints(data, _HEADER_SIZE, 1)
+    name_end = offset + int(name_length)
+    if name_end > len(payload):
+        raise WireFormatException("Truncated device name")
+    device_name = payload[offset:name_end].decode("utf-8")
+
+    (count, mask, gap_mask), offset = decode_varints(data, name_end, 3)
+    count, mask, gap_mask = int(count), int(mask), int(gap_mask)
+
+    if flags & COMPRESSION_MASK:
+        body = _decompress(payload[offset:], flags)
+        data = np.frombuffer(body, dtype=np.uint8)
+        offset = 0
+
+    present = [(bit, spec) for bit, spec in enumerate(COLUMN_SPECS) if mask >> bit & 1]
+    numeric = [(bit, spec) for bit, spec in present if spec[1] is not None]
+    raw = [column for _, (column, scale) in present if scale is None]
+    if gap_mask & ~sum(1 << bit for bit, _ in numeric):
+        raise WireFormatException("Validity bitmap for a column that has none")
+
+    valid: Dict[str, np.ndarray] = {}
+    bitmap_size = (count + 7) // 8
+    for bit, (column, _) in numeric:
+        if gap_mask >> bit & 1:
+            if offset + bitmap_size > len(data):
+                raise WireFormatException(f"Truncated validity of {column}")
+            bitmap = data[offset : offset + bitmap_size]
+            valid[column] = np.unpackbits(bitmap, count=count).astype(bool)
+            offset += bitmap_size
+
+    columns: Dict[str, np.ndarray] = {}
+    values, offset = decode_varints(data, offset, len(numeric) * count)
+    deltas = unzigzag(values).reshape(len(numeric), count)
+    for (_, (column, scale)), column_deltas in zip(numeric, deltas):
+        columns[column] = np.cumsum(column_deltas) / scale
+        if column in valid:
+            columns[column][~valid[column]] = np.nan
+
+    for column in raw:
+        if offset + count > len(data):
+            raise WireFormatException(f"Truncated column {column}")
+        columns[column] = data[offset : offset + count].copy()
+        offset += count
+
+    if offset != len(data):
+        raise WireFormatException("Trailing bytes after last column")
+
+    return DecodedBatch(
+        version=version,
+        flags=flags,
+        device_name=device_name,
+        frame=TelemetryFrame(columns),
+    )
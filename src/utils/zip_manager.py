@@ -1,5 +1,9 @@
 import os
-from zipfile import ZipFile
+import struct
+import zlib
+from typing import Callable, Dict, Optional
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile
+
 from loguru import logger
 
 
@@ -19,3 +23,145 @@ def extract_mission(zip_path: str, member_name: str, output_path: str) -> str |
     except Exception as e:
         logger.error(e)
         return None
+
+
+def read_mission(zip_path: str, member_name: str) -> bytes | None:
+    """The bytes of a member of a zip file, None if it cannot be read."""
+    try:
+        with ZipFile(zip_path, "r") as archive:
+            return archive.read(member_name)
+    except Exception as e:
+        logger.error(e)
+        return None
+
+
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD64_LOCATOR = struct.Struct("<4sLQL")
+_EOCD64 = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_MAX_TAIL = _EOCD.size + 0xFFFF + _EOCD64_LOCATOR.size
+
+
+class RemoteZip:
+    """
+    Reads single members of a ZIP archive through byte-range reads.
+
+    ``read_range(start, end)`` returns the archive bytes ``[start, end)``;
+    ``tail`` may hold the last bytes of the archive when the caller already
+    has them. Reading a member costs one read for the end of central
+    directory (none if it is in ``tail``), one for the central directory
+    unless it is in the tail too, and one for the member itself.
+    Stored and deflated members are supported, their CRC-32 is checked.
+    """
+
+    def __init__(
+        self, read_range: Callable[[int, int], bytes], size: int, tail: bytes = b""
+    ) -> None:
+        self.read_range = read_range
+        self.size = size
+        self._tail = tail
+        self._directory: Optional[Dict[str, tuple]] = None
+
+    def names(self) -> list[str]:
+        return list(self._central_directory())
+
+    def file_size(self, member_name: str) -> int:
+        """Uncompressed size of the member, from the central directory."""
+        entry = self._central_directory().get(member_name)
+        if entry is None:
+            raise KeyError(f"{member_name} not in archive")
+        return entry[4]
+
+    def read(self, member_name: str) -> bytes:
+        entry = self._central_directory().get(member_name)
+        if entry is None:
+            raise KeyError(f"{member_name} not in archive")
+        flags, method, crc, compressed_size, size, offset, extra_len = entry
+        if flags & 0x1:
+            raise BadZipFile(f"{member_name} is encrypted")
+        if method not in (ZIP_STORED, ZIP_DEFLATED):
+            raise BadZipFile(f"Unsupported compression {method} for {member_name}")
+
+        # the local extra field usually matches the central one, read a
+        # little more in case it does not
+        end = offset + _LOCAL_HEADER.size + len(member_name.encode()) + extra_len
+        data = self._read(offset, min(self.size, end + compressed_size + 1024))
+        header = _LOCAL_HEADER.unpack_from(data)
+        if header[0] != b"PK\x03\x04":
+            raise BadZipFile(f"Bad local header for {member_name}")
+        start = _LOCAL_HEADER.size + header[10] + header[11]
+        if len(data) < start + compressed_size:
+            data += self._read(offset + len(data), offset + start + compressed_size)
+        compressed = data[start : start + compressed_size]
+
+        if method == ZIP_DEFLATED:
+            content = zlib.decompress(compressed, -15)
+        else:
+            content = compressed
+        if len(content) != size or zlib.crc32(content) != crc:
+            raise BadZipFile(f"CRC check failed for {member_name}")
+        return content
+
+    def _read(self, start: int, end: int) -> bytes:
+        tail_start = self.size - len(self._tail)
+        if start >= tail_start:
+            return self._tail[start - tail_start : end - tail_start]
+        return self.read_range(start, end)
+
+    def _central_directory(self) -> Dict[str, tuple]:
+        if self._directory is not None:
+            return self._directory
+
+        position = self._tail.rfind(b"PK\x05\x06")
+        if position < 0 and len(self._tail) < min(self.size, _MAX_TAIL):
+            # a long archive comment, or no tail yet
+            self._tail = self.read_range(max(0, self.size - _MAX_TAIL), self.size)
+            position = self._tail.rfind(b"PK\x05\x06")
+        if position < 0:
+            raise BadZipFile("End of central directory not found")
+        _, _, _, _, entries, cd_size, cd_offset, _ = _EOCD.unpack_from(
+            self._tail, position
+        )
+        if cd_offset == 0xFFFFFFFF or entries == 0xFFFF:
+            locator = _EOCD64_LOCATOR.unpack_from(
+                self._tail, position - _EOCD64_LOCATOR.size
+            )
+            eocd64 = _EOCD64.unpack(self._read(locator[2], locator[2] + _EOCD64.size))
+            entries, cd_size, cd_offset = eocd64[7], eocd64[8], eocd64[9]
+
+        directory = self._read(cd_offset, cd_offset + cd_size)
+        self._directory = {}
+        offset = 0
+        for _ in range(entries):
+            header = _CENTRAL_HEADER.unpack_from(directory, offset)
+            if header[0] != b"PK\x01\x02":
+                raise BadZipFile("Bad central directory entry")
+            name_len, extra_len, comment_len = header[12:15]
+            offset += _CENTRAL_HEADER.size
+            name = directory[offset : offset + name_len].decode(
+                "utf-8" if header[5] & 0x800 else "cp437"
+            )
+            extra = directory[offset + name_len : offset + name_len + extra_len]
+            sizes = _zip64_sizes(extra, header[10], header[11], header[18])
+            self._directory[name] = (header[5], header[6], header[9], *sizes, extra_len)
+            offset += name_len + extra_len + comment_len
+        return self._directory
+
+
+def _zip64_sizes(extra: bytes, compressed_size: int, size: int, offset: int):
+    """Sizes and header offset, replacing 0xFFFFFFFF with the ZIP64 values."""
+    position = 0
+    while position + 4 <= len(extra):
+        tag, length = struct.unpack_from("<2H", extra, position)
+        if tag == 0x0001:
+            values = iter(struct.unpack_from(f"<{length // 8}Q", extra, position + 4))
+            if size == 0xFFFFFFFF:
+                size = next(values)
+            if compressed_size == 0xFFFFFFFF:
+                compressed_size = next(values)
+            if offset == 0xFFFFFFFF:
+                offset = next(values)
+            break
+        position += 4 + length
+    return compressed_size, size, offset
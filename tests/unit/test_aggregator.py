@@ -0,0 +1,93 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils.telemetry.aggregator import TelemetryAggregator
+from src.utils.telemetry.ring_buffer import COLUMNS, TelemetryRingBuffer
+
+
+def sample_frame(count, battery=None, health=None):
+    buffer = TelemetryRingBuffer(max(count, 1))
+    for i in range(count):
+        values = {name: 0.0 for name in COLUMNS}
+        values["timestamp"] = 1000.0 + i
+        values["voltage_v"] = 16.0 + i
+        values["remaining_percent"] = battery[i] if battery else 80.0
+        values["health"] = health[i] if health else 0b111111
+        buffer.append(**values)
+    return buffer.read()
+
+
+@pytest.fixture
+def aggregator():
+    collector = MagicMock()
+    collector.device_name = "drone-1"
+    collector.buffer = TelemetryRingBuffer(64)
+    return TelemetryAggregator(
+        collector, MagicMock(), "summary", "events", low_battery_percent=20
+    )
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not JSON")
+
+
+def published(aggregator, topic):
+    return [
+        json.loads(c.args[1], parse_constant=_reject_constant)
+        for c in aggregator.mqtt.publish.call_args_list
+        if c.args[0] == topic
+    ]
+
+
+def test_summary_covers_whole_window(aggregator):
+    aggregator._process(sample_frame(3))
+    aggregator._process(sample_frame(2))
+    aggregator._flush_window()
+
+    (summary,) = published(aggregator, "summary")
+    assert summary["count"] == 5
+    assert summary["fields"]["voltage_v"]["max"] == 18.0
+    assert summary["health"]["is_global_position_ok"] is True
+    assert len(aggregator.output) == 0
+
+
+def test_summary_of_nan_samples_is_valid_json(aggregator):
+    frame = sample_frame(3)
+    frame["temperature_degc"][:] = float("nan")
+    frame["remaining_percent"][1] = float("nan")
+    aggregator._process(frame)
+    aggregator._flush_window()
+
+    (summary,) = published(aggregator, "summary")
+    assert summary["fields"]["temperature_degc"]["mean"] is None
+    assert summary["fields"]["remaining_percent"]["mean"] == 80.0
+    assert aggregator.error_count == 0
+
+
+def test_low_battery_crossing_publishes_one_event(aggregator):
+    aggregator._process(sample_frame(4, battery=[22.0, 21.0, 19.0, 18.0]))
+
+    (event,) = published(aggregator, "events")
+    assert event["type"] == "low_battery"
+    assert event["details"]["remaining_percent"] == 19.0
+
+
+def test_gps_loss_forwards_raw_window(aggregator):
+    aggregator._process(sample_frame(3))
+    assert len(aggregator.output) == 0
+
+    aggregator._process(sample_frame(2, health=[0b111111, 0b101111]))
+
+    assert [e["type"] for e in published(aggregator, "events")] == ["gps_degraded"]
+    assert aggregator.forwarding_raw
+    assert len(aggregator.output) == 5
+
+
+def test_raw_on_demand(aggregator):
+    aggregator.set_raw_enabled(True)
+    aggregator._process(sample_frame(3))
+
+    assert len(aggregator.output) == 3
+    assert published(aggregator, "events") == []
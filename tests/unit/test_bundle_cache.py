@@ -0,0 +1,38 @@
+import os
+import time
+
+from src.utils.bundle_cache import BundleCache
+
+
+def bundle(tmp_path, name: str, size: int) -> str:
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = BundleCache(str(tmp_path / "cache"), max_bytes=2500)
+    for digest in ("a", "b"):
+        cache.store(bundle(tmp_path, digest, 1000), digest, f"http://x/{digest}", None)
+        time.sleep(0.01)
+
+    cache.lookup("a")
+    cache.store(bundle(tmp_path, "c", 1000), "c", "http://x/c", None)
+
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") and cache.lookup("c")
+    assert cache.evicted == 1
+    assert cache.size_bytes == 2000
+
+
+def test_etags_persist_and_follow_eviction(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = BundleCache(directory, max_bytes=1500)
+    cache.store(bundle(tmp_path, "a", 1000), "a", "http://x/a?sig=1", '"1"')
+
+    reopened = BundleCache(directory, max_bytes=1500)
+    assert reopened.etag("http://x/a?sig=2") == ('"1"', "a")
+
+    time.sleep(0.01)
+    reopened.store(bundle(tmp_path, "b", 1000), "b", "http://x/b", '"2"')
+    assert reopened.etag("http://x/a") is None
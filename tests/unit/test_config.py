@@ -1,9 +1,31 @@
 import unittest
 from unittest.mock import patch
-from src.config import Config
+from src.config import Config, VehicleConfig
 from src.enums.connection_types import ConnectionTypes
 from src.exceptions.config_exceptions import ConfigValueException, ConfigTypeException
 
+VEHICLES_ENV = {
+    "ROLE_ALIAS": "role",
+    "KINESIS_REGION": "eu-west-1",
+    "IOT_ENDPOINT": "test.iot.aws.com",
+    "IOT_THING_NAME": "relay",
+    "DRONE_ADDRESS": "127.0.0.1",
+    "DRONE_PORT": "14540",
+    "DRONE_CONNECTION_TYPE": "udpin",
+    "CERT_FILEPATH": "./certs/cert.pem",
+    "PRIVATE_KEY_FILEPATH": "./certs/key.pem",
+    "CA_FILEPATH": "./certs/ca.pem",
+    "TELEMETRY_SAMPLE_INTERVAL": "1",
+    "TELEMETRY_SAMPLE_COUNT": "10",
+    "TELEMETRY_EXPORT_SOCKET": "/run/fleetcore/telemetry.sock",
+    "YOLO_MODEL_FILEPATH": "./yolo.pt",
+    "STREAM_SAMPLE_RATE": "15",
+    "STREAM_PORT": "5600",
+    "PRESENCE_CONFIRMATION_FRAMES": "5",
+    "DETECTION_CONFIDENCE_THRESHOLD": "60",
+    "VEHICLES": "drone1:0.0.0.0:14540, drone2:0.0.0.0:14541:6000",
+}
+
 
 class ConfigTest(unittest.TestCase):
 
@@ -78,3 +100,35 @@ class ConfigTest(unittest.TestCase):
         with self.assertRaises(ConfigTypeException) as ctx:
             Config()
         assert "ConnectionTypes" in str(ctx.exception)
+
+    @patch("os.path.exists", return_value=True)
+    @patch("os.path.isfile", return_value=True)
+    @patch.dict("os.environ", VEHICLES_ENV, clear=True)
+    def test_vehicles(self, mock_exists, mock_isfile):
+        config = Config()
+
+        assert config.vehicles == [
+            VehicleConfig("drone1", "0.0.0.0", 14540, 5600),
+            VehicleConfig("drone2", "0.0.0.0", 14541, 6000),
+        ]
+        assert config.thing_count == 2
+
+        drone2 = config.for_vehicle(config.vehicles[1])
+        assert drone2.thing_name == "drone2"
+        assert (drone2.drone_port, drone2.stream_port) == (14541, 6000)
+        assert drone2.mavsdk_server_port == 50052
+        assert drone2.internal_topic == "$aws/things/drone2/jobs/notify"
+        assert drone2.telemetry_journal_dir.endswith("drone2")
+        assert drone2.telemetry_export_socket == "/run/fleetcore/telemetry-drone2.sock"
+        assert config.thing_name == "relay"
+        assert config.internal_topic == "$aws/things/relay/jobs/notify"
+
+    @patch("os.path.exists", return_value=True)
+    @patch("os.path.isfile", return_value=True)
+    @patch.dict(
+        "os.environ", {**VEHICLES_ENV, "VEHICLES": "drone1:0.0.0.0"}, clear=True
+    )
+    def test_invalid_vehicles(self, mock_exists, mock_isfile):
+        with self.assertRaises(ConfigTypeException) as ctx:
+            Config()
+        assert "VEHICLES" in str(ctx.exception)
@@ -0,0 +1,107 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+
+from src.core import mqtt_manager
+from src.core.connection_supervisor import ConnectionSupervisor
+from src.core.mqtt_manager import MqttManager
+from src.enums.connection_state import ConnectionState
+
+
+@pytest_asyncio.fixture
+async def mqtt(monkeypatch):
+    monkeypatch.setattr(
+        mqtt_manager.mqtt5_client_builder, "mtls_from_path", lambda **kw: Mock()
+    )
+    monkeypatch.setattr(mqtt_manager.iotjobs, "IotJobsClientV2", Mock())
+    return MqttManager(
+        "cert", "key", "ca", "endpoint", "thing", 5, loop=asyncio.get_running_loop()
+    )
+
+
+def signal(*values):
+    async def source():
+        for rsrp in values:
+            yield rsrp
+            await asyncio.sleep(0)
+
+    return source
+
+
+@pytest.mark.asyncio
+async def test_wait_connected_follows_reconnects(mqtt):
+    assert not await mqtt.wait_connected(timeout=0.01)
+
+    mqtt._on_lifecycle_connection_success(Mock())
+    assert await mqtt.wait_connected(timeout=1)
+    assert mqtt.state == ConnectionState.CONNECTED
+
+    mqtt._on_lifecycle_disconnection(Mock(exception=Exception("link lost")))
+    await asyncio.sleep(0)
+    assert not await mqtt.wait_connected(timeout=0.01)
+    assert mqtt.state == ConnectionState.DISCONNECTED
+
+
+@pytest.mark.asyncio
+async def test_records_disconnects_and_reconnect_time(mqtt):
+    supervisor = ConnectionSupervisor(mqtt, "loopback")
+
+    mqtt._on_lifecycle_connection_success(Mock())
+    mqtt._on_lifecycle_disconnection(Mock(exception=Exception("link lost")))
+    mqtt._on_lifecycle_connection_failure(Mock(exception=Exception("no route")))
+    mqtt._on_lifecycle_connection_success(Mock())
+    await asyncio.sleep(0)
+
+    assert [state for _, state in supervisor.history] == [
+        ConnectionState.CONNECTED,
+        ConnectionState.DISCONNECTED,
+        ConnectionState.FAILED,
+        ConnectionState.CONNECTED,
+    ]
+    assert supervisor.disconnects == 1
+    assert supervisor.reconnect_time.count == 1
+    assert supervisor.last_reconnect_s is not None
+
+
+@pytest.mark.asyncio
+async def test_loopback_measures_rtt(mqtt):
+    mqtt.subscribe = AsyncMock()
+    mqtt.publish = Mock(
+        side_effect=lambda topic, message: supervisor._on_loopback(topic, message)
+    )
+    supervisor = ConnectionSupervisor(
+        mqtt, "loopback", rtt_interval_s=0.01, signal_source=signal()
+    )
+    mqtt._on_lifecycle_connection_success(Mock())
+    await asyncio.sleep(0)
+
+    await supervisor.start()
+    await asyncio.sleep(0.05)
+    await supervisor.stop()
+
+    assert supervisor.rtt.count >= 1
+    assert supervisor.rtt_lost == 0
+    assert json.loads(mqtt.publish.call_args.args[1])["sequence"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_improving_signal_restarts_while_disconnected(mqtt):
+    mqtt.subscribe = AsyncMock()
+    mqtt.restart = Mock()
+    supervisor = ConnectionSupervisor(
+        mqtt, "loopback", signal_source=signal(-110, -100, -95, -80)
+    )
+    mqtt._on_lifecycle_connection_failure(Mock(exception=Exception("no route")))
+    await asyncio.sleep(0)
+
+    await supervisor.start()
+    await asyncio.sleep(0.01)
+    await supervisor.stop()
+
+    # poor -> fair restarts, fair -> good is within the minimum interval
+    assert mqtt.restart.call_count == 1
+    assert supervisor.fast_reconnects == 1
+    assert supervisor.last_rsrp == -80
@@ -0,0 +1,286 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.exceptions.download_exceptions import (
+    DownloadException,
+    DownloadIntegrityException,
+    DownloadNotAllowedFolderException,
+)
+from src.utils.bundle_cache import BundleCache
+from src.utils.download_handler import MissionDownloader
+
+BUNDLE = os.urandom(100_000)
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Serves BUNDLE with ETAG, honouring Range when ``ranges``, If-Range and
+    # If-None-Match; the first response is cut off after ``cut_at`` bytes,
+    # after which ``next_bundle`` is served if set.
+    bundle = BUNDLE
+    etag = ETAG
+    ranges = True
+    cut_at = None
+    next_bundle = None
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.headers.get("Range"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start, end = 0, len(self.bundle)
+        if_range = self.headers.get("If-Range")
+        if self.ranges and self.headers.get("Range") and if_range in (None, self.etag):
+            first, last = self.headers["Range"].split("=")[1].split("-")
+            if not first:
+                start = max(0, end - int(last))
+            else:
+                start, end = int(first), int(last or end - 1) + 1
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{end - 1}/{len(self.bundle)}"
+            )
+        else:
+            self.send_response(200)
+        body = self.bundle[start:end]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+
+        if self.cut_at is not None:
+            body = body[: self.cut_at]
+            type(self).cut_at = None
+            self.close_connection = True
+            if self.next_bundle is not None:
+                type(self).bundle, type(self).etag = self.next_bundle, '"v2"'
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.ranges, _Handler.cut_at, _Handler.requests = True, None, []
+    _Handler.bundle, _Handler.etag, _Handler.next_bundle = BUNDLE, ETAG, None
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/mission.zip"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def downloader(**kwargs) -> MissionDownloader:
+    return MissionDownloader(chunk_size=4096, retry_delay_s=0, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_verifies_checksum_and_reports_progress(server, tmp_path):
+    progress = []
+    path = await downloader(progress_interval_s=0).download(
+        server,
+        str(tmp_path),
+        hashlib.sha256(BUNDLE).hexdigest(),
+        lambda received, total: progress.append((received, total)),
+    )
+
+    assert open(path, "rb").read() == BUNDLE
+    assert progress[-1] == (len(BUNDLE), len(BUNDLE))
+    assert os.listdir(tmp_path) == ["mission.bundle.zip"]
+
+
+@pytest.mark.asyncio
+async def test_resumes_interrupted_download(server, tmp_path):
+    _Handler.cut_at = 30_000
+    d = downloader()
+
+    path = await d.download(server, str(tmp_path), hashlib.sha256(BUNDLE).hexdigest())
+
+    assert open(path, "rb").read() == BUNDLE
+    assert _Handler.requests == [None, "bytes=30000-"]
+    assert d.resumed == 1
+
+
+@pytest.mark.asyncio
+async def test_restarts_when_object_changes_mid_download(server, tmp_path):
+    changed = os.urandom(80_000)
+    _Handler.cut_at = 30_000
+    _Handler.next_bundle = changed
+    d = downloader()
+
+    path = await d.download(server, str(tmp_path))
+
+    assert open(path, "rb").read() == changed
+    assert _Handler.requests == [None, "bytes=30000-"]
+    assert d.resumed == 0
+
+
+@pytest.mark.asyncio
+async def test_restarts_when_range_is_ignored(server, tmp_path):
+    _Handler.ranges = False
+    _Handler.cut_at = 30_000
+
+    path = await downloader().download(server, str(tmp_path))
+
+    assert open(path, "rb").read() == BUNDLE
+
+
+@pytest.mark.asyncio
+async def test_rejects_checksum_mismatch(server, tmp_path):
+    d = downloader()
+
+    with pytest.raises(DownloadIntegrityException):
+        await d.download(server, str(tmp_path), "0" * 64)
+
+    assert os.listdir(tmp_path) == []
+    assert d.error_count == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_retries(tmp_path):
+    with pytest.raises(DownloadException):
+        await downloader(retries=1).download("http://127.0.0.1:1/x", str(tmp_path))
+    with pytest.raises(DownloadNotAllowedFolderException):
+        await downloader().download("http://127.0.0.1:1/x", "./missions")
+
+
+@pytest.mark.asyncio
+async def test_cached_bundle_is_not_downloaded_again(server, tmp_path):
+    cache = BundleCache(str(tmp_path / "cache"))
+    d = downloader(cache=cache)
+    sha256 = hashlib.sha256(BUNDLE).hexdigest()
+
+    await d.download(server, str(tmp_path / "a"), sha256)
+    path = await d.download(server + "?signature=2", str(tmp_path / "b"), sha256)
+
+    assert open(path, "rb").read() == BUNDLE
+    assert len(_Handler.requests) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["bytes_saved"] == len(BUNDLE)
+
+
+@pytest.mark.asyncio
+async def test_revalidates_bundle_without_hash_by_etag(server, tmp_path):
+    cache = BundleCache(str(tmp_path / "cache"))
+    d = downloader(cache=cache)
+
+    await d.download(server + "?signature=1", str(tmp_path / "a"))
+    path = await d.download(server + "?signature=2", str(tmp_path / "b"))
+
+    assert open(path, "rb").read() == BUNDLE
+    assert len(_Handler.requests) == 2
+    assert d.completed == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+MISSION = b'{"mission": {}}'
+MISSION_SHA256 = hashlib.sha256(MISSION).hexdigest()
+
+
+def multi_drone_bundle(mission: bytes = MISSION) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("thing", mission)
+        for i in range(20):
+            archive.writestr(f"drone-{i}", os.urandom(50_000))
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_reads_only_the_member_of_large_bundles(server, tmp_path):
+    _Handler.bundle = multi_drone_bundle()
+    cache = BundleCache(str(tmp_path / "cache"))
+    d = downloader(remote_extract_min_bytes=100_000, cache=cache)
+
+    mission = await d.download_mission(
+        server, str(tmp_path / "a"), "thing", member_sha256=MISSION_SHA256
+    )
+
+    assert mission.content == MISSION
+    assert open(mission.path, "rb").read() == MISSION
+    assert os.listdir(tmp_path / "a") == ["thing"]
+    assert d.members_read == 1
+    # tail with the central directory, then the member
+    assert len(_Handler.requests) == 2
+
+    await d.download_mission(
+        server, str(tmp_path / "b"), "thing", member_sha256=MISSION_SHA256
+    )
+    assert len(_Handler.requests) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_rejects_tampered_member_read_remotely(server, tmp_path):
+    _Handler.bundle = multi_drone_bundle(b'{"mission": {"tampered": 1}}')
+    d = downloader(remote_extract_min_bytes=0)
+
+    with pytest.raises(DownloadIntegrityException):
+        await d.download_mission(
+            server, str(tmp_path), "thing", member_sha256=MISSION_SHA256
+        )
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_bundle_hash_without_member_hash_downloads_whole(server, tmp_path):
+    bundle = _Handler.bundle = multi_drone_bundle()
+    cache = BundleCache(str(tmp_path / "cache"))
+    d = downloader(remote_extract_min_bytes=0, cache=cache)
+
+    with pytest.raises(DownloadIntegrityException):
+        await d.download_mission(server, str(tmp_path / "a"), "thing", "0" * 64)
+    await d.download_mission(
+        server, str(tmp_path / "b"), "thing", hashlib.sha256(bundle).hexdigest()
+    )
+
+    assert d.members_read == 0
+    assert _Handler.requests == [None, None]
+    assert cache.stats()["bundles"] == 1
+
+
+@pytest.mark.asyncio
+async def test_downloads_small_bundles_and_servers_without_range(server, tmp_path):
+    _Handler.bundle = multi_drone_bundle()
+
+    await downloader().download_mission(server, str(tmp_path / "a"), "thing")
+    _Handler.ranges = False
+    await downloader(remote_extract_min_bytes=0).download_mission(
+        server, str(tmp_path / "b"), "thing"
+    )
+
+    for directory in ("a", "b"):
+        assert sorted(os.listdir(tmp_path / directory)) == [
+            "mission.bundle.zip",
+            "thing",
+        ]
+    with pytest.raises(DownloadException):
+        await downloader(remote_extract_min_bytes=0).download_mission(
+            server, str(tmp_path / "c"), "missing"
+        )
+
+
+@pytest.mark.asyncio
+async def test_mission_size(server):
+    bundle = _Handler.bundle = multi_drone_bundle()
+    member = len(b'{"mission": {}}')
+
+    assert await downloader().mission_size(server, "thing") == member + len(bundle)
+    assert (
+        await downloader(remote_extract_min_bytes=0).mission_size(
+            server, "thing", member_sha256=MISSION_SHA256
+        )
+        == member
+    )
+    _Handler.ranges = False
+    # no Range support and no HEAD: unknown
+    assert await downloader().mission_size(server, "thing") is None
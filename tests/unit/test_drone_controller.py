@@ -0,0 +1,129 @@
+import asyncio
+import json
+import struct
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.core.drone_controller import MavsdkController
+from src.enums.connection_types import ConnectionTypes
+
+
+def plan_file(tmp_path, name: str, altitude: float) -> str:
+    plan = {
+        "fileType": "Plan",
+        "mission": {
+            "items": [
+                {
+                    "type": "SimpleItem",
+                    "command": 16,
+                    "frame": 3,
+                    "params": [0, 0, 0, None, 47.39, 8.54, altitude],
+                }
+            ]
+        },
+    }
+    path = tmp_path / name
+    path.write_text(json.dumps(plan))
+    return str(path)
+
+
+@pytest.fixture
+def drone():
+    controller = MavsdkController("127.0.0.1", 14540, ConnectionTypes("udpin"))
+    controller.changes = asyncio.Queue()
+
+    async def mission_changed():
+        while True:
+            yield await controller.changes.get()
+
+    system = Mock()
+    system.mission.set_return_to_launch_after_mission = AsyncMock()
+    system.mission_raw.upload_mission = AsyncMock()
+    system.mission_raw.set_current_mission_item = AsyncMock()
+    system.mission_raw.clear_mission = AsyncMock()
+    system.mission_raw.download_mission = AsyncMock(return_value=[])
+    system.action.return_to_launch = AsyncMock()
+    system.mission_raw.mission_changed = mission_changed
+    controller.system = system
+    return controller
+
+
+@pytest.mark.asyncio
+async def test_skips_upload_of_mission_already_on_vehicle(drone, tmp_path):
+    first = plan_file(tmp_path, "a.plan", 30)
+
+    await drone.upload_mission(first)
+    # reformatted, same items, straight from memory
+    second = json.dumps(json.loads(open(first).read()), indent=2).encode()
+    await drone.upload_mission_bytes(second)
+
+    assert drone.system.mission_raw.upload_mission.await_count == 1
+    drone.system.mission_raw.set_current_mission_item.assert_awaited_once_with(0)
+    metrics = drone.mission_metrics()
+    assert (metrics["uploads"], metrics["uploads_skipped"]) == (1, 1)
+    assert (metrics["items_uploaded"], metrics["items_skipped"]) == (1, 1)
+
+    await drone.upload_mission(plan_file(tmp_path, "c.plan", 40))
+    assert drone.system.mission_raw.upload_mission.await_count == 2
+
+
+def read_back(items):
+    """The items as the vehicle returns them: float32 params, ``current`` set."""
+    copies = []
+    for item in items:
+        copy = type(item)(**vars(item))
+        copy.current = 1
+        copy.z = struct.unpack("<f", struct.pack("<f", item.z))[0]
+        copies.append(copy)
+    return copies
+
+
+@pytest.mark.asyncio
+async def test_uploads_again_after_mission_changed_or_cleared(drone, tmp_path):
+    mission = plan_file(tmp_path, "a.plan", 30)
+    mission_raw = drone.system.mission_raw
+    await drone.upload_mission(mission)
+
+    # someone else's mission: read back, differs, uploaded again
+    mission_raw.download_mission.return_value = []
+    drone.changes.put_nowait(True)
+    await asyncio.sleep(0)
+    await drone.upload_mission(mission)
+    assert mission_raw.upload_mission.await_count == 2
+    assert mission_raw.download_mission.await_count == 1
+
+    await drone.cancel_mission()
+    await drone.upload_mission(mission)
+    assert mission_raw.upload_mission.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_verifies_vehicle_copy_after_change_events(drone, tmp_path):
+    mission = plan_file(tmp_path, "a.plan", 30.1)
+    mission_raw = drone.system.mission_raw
+    await drone.upload_mission(mission)
+    uploaded = mission_raw.upload_mission.call_args.args[0]
+
+    # the event our own upload produced: the vehicle's copy still matches
+    mission_raw.download_mission.return_value = read_back(uploaded)
+    drone.changes.put_nowait(True)
+    await asyncio.sleep(0)
+    await drone.upload_mission(mission)
+    assert mission_raw.upload_mission.await_count == 1
+    assert mission_raw.download_mission.await_count == 1
+
+    # no further events: skipped without reading back
+    await drone.upload_mission(mission)
+    assert mission_raw.upload_mission.await_count == 1
+    assert mission_raw.download_mission.await_count == 1
+    assert drone.mission_metrics()["missions_verified"] == 1
+
+    # a change however soon after our upload is checked
+    changed = read_back(uploaded)
+    changed[0].z += 5
+    mission_raw.download_mission.return_value = changed
+    drone.changes.put_nowait(True)
+    await asyncio.sleep(0)
+    await drone.upload_mission(mission)
+    assert mission_raw.upload_mission.await_count == 2
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from sim.iot_jobs.__main__ import mission_document
+from sim.iot_jobs.broker import Broker
+from sim.iot_jobs.service import IotJobsSimulator
+from src.core.mqtt_manager import MqttManager
+from src.enums.job_status import JobStatus
+
+THING = "thing"
+
+
+@pytest_asyncio.fixture
+async def jobs():
+    broker = Broker("127.0.0.1", 0)
+    await broker.start()
+    simulator = IotJobsSimulator("127.0.0.1", broker.port)
+    await simulator.start()
+    mqtt = MqttManager("", "", "", "127.0.0.1", THING, 5, local_port=broker.port)
+    await mqtt.connect()
+
+    yield simulator, mqtt
+
+    await mqtt.disconnect()
+    await simulator.stop()
+    await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_job_lifecycle_through_mqtt_manager(jobs):
+    simulator, mqtt = jobs
+    notified = asyncio.Event()
+    await mqtt.subscribe(
+        f"$aws/things/{THING}/jobs/notify", lambda topic, payload: notified.set()
+    )
+
+    execution = simulator.add_job(THING, "job-1", mission_document(THING))
+    await asyncio.wait_for(notified.wait(), 5)
+
+    summary = await mqtt.get_next_queued_job()
+    assert summary.job_id == "job-1"
+    document = mqtt.get_job_document(await mqtt.describe_job("job-1"))
+    assert document.operation == "mission"
+
+    await mqtt.update_job_status("job-1", JobStatus.IN_PROGRESS)
+    await mqtt.update_job_status("job-1", JobStatus.SUCCEEDED)
+    assert execution.status == "SUCCEEDED"
+    assert list(execution.reached) == ["QUEUED", "IN_PROGRESS", "SUCCEEDED"]
+    assert await mqtt.get_next_queued_job() is None
+
+
+@pytest.mark.asyncio
+async def test_rejects_invalid_transitions(jobs):
+    simulator, mqtt = jobs
+    simulator.add_job(THING, "job-1", mission_document(THING))
+    await mqtt.update_job_status("job-1", JobStatus.FAILED)
+
+    with pytest.raises(Exception):
+        await mqtt.update_job_status("job-1", JobStatus.SUCCEEDED)
+    with pytest.raises(Exception):
+        await mqtt.describe_job("missing")
+    assert simulator.rejections == 2
+
+
+@pytest.mark.asyncio
+async def test_notify_next_stream_carries_the_document(jobs):
+    simulator, mqtt = jobs
+    established = asyncio.Event()
+    events = asyncio.Queue()
+    mqtt.stream_next_job(events.put_nowait, lambda live: live and established.set())
+    await asyncio.wait_for(established.wait(), 5)
+
+    simulator.add_job(THING, "job-1", mission_document(THING))
+    event = await asyncio.wait_for(events.get(), 5)
+
+    assert event.execution.job_id == "job-1"
+    assert event.execution.status == "QUEUED"
+    assert event.execution.job_document["operation"] == "mission"
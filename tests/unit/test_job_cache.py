@@ -0,0 +1,120 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from awsiot.iotjobs import JobExecutionData, NextJobExecutionChangedEvent
+
+from sim.iot_jobs.__main__ import mission_document
+from src.core.job_cache import JobCache
+from src.models.job_document import Job
+
+
+def mqtt_stub():
+    mqtt = Mock()
+
+    async def describe_job(job_id):
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(job_id=job_id)
+
+    mqtt.describe_job = AsyncMock(side_effect=describe_job)
+    mqtt.get_job_document = Mock(
+        side_effect=lambda response: Job.model_validate(mission_document("thing"))
+    )
+    mqtt.get_next_queued_job = AsyncMock(return_value=SimpleNamespace(job_id="j1"))
+    return mqtt
+
+
+@pytest.mark.asyncio
+async def test_document_is_fetched_once_for_concurrent_lookups():
+    mqtt = mqtt_stub()
+    cache = JobCache(mqtt)
+
+    first, second = await asyncio.gather(cache.document("j1"), cache.document("j1"))
+    third = await cache.document("j1")
+
+    assert first is second is third
+    assert mqtt.describe_job.await_count == 1
+    assert cache.stats() == {
+        "entries": 1,
+        "hits": 1,
+        "misses": 1,
+        "coalesced": 1,
+        "from_notifications": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest_document():
+    mqtt = mqtt_stub()
+    cache = JobCache(mqtt, max_entries=2)
+
+    for job_id in ("a", "b", "a", "c", "a", "b"):
+        await cache.document(job_id)
+
+    assert mqtt.describe_job.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_notify_next_skips_both_lookups():
+    mqtt = mqtt_stub()
+    cache = JobCache(mqtt)
+    notification = json.dumps(
+        {
+            "timestamp": 1,
+            "execution": {
+                "jobId": "j2",
+                "status": "QUEUED",
+                "versionNumber": 1,
+                "jobDocument": mission_document("thing"),
+            },
+        }
+    ).encode()
+
+    summary = await cache.next_job(notification)
+    document = await cache.document(summary.job_id)
+
+    assert summary.job_id == "j2"
+    assert document.operation == "mission"
+    mqtt.get_next_queued_job.assert_not_awaited()
+    mqtt.describe_job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_notify_lists_queued_jobs():
+    cache = JobCache(mqtt_stub())
+
+    queued = {"timestamp": 1, "jobs": {"QUEUED": [{"jobId": "j3"}]}}
+    assert (await cache.next_job(json.dumps(queued).encode())).job_id == "j3"
+    assert await cache.next_job(json.dumps({"timestamp": 1, "jobs": {}})) is None
+
+
+@pytest.mark.asyncio
+async def test_unrecognised_notification_falls_back_to_coalesced_lookup():
+    mqtt = mqtt_stub()
+    cache = JobCache(mqtt)
+
+    results = await asyncio.gather(cache.next_job(b"ping"), cache.next_job(b"{}"))
+
+    assert [r.job_id for r in results] == ["j1", "j1"]
+    assert mqtt.get_next_queued_job.await_count == 1
+    assert cache.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_event_for_running_job_falls_back_to_lookup():
+    mqtt = mqtt_stub()
+    cache = JobCache(mqtt)
+    event = NextJobExecutionChangedEvent(
+        execution=JobExecutionData(
+            job_id="j0", status="IN_PROGRESS", job_document=mission_document("t")
+        )
+    )
+
+    summary = await cache.next_job(event)
+
+    assert summary.job_id == "j1"
+    mqtt.get_next_queued_job.assert_awaited_once()
+    assert (await cache.document("j0")).operation == "mission"
+    mqtt.describe_job.assert_not_awaited()
@@ -0,0 +1,130 @@
+import os
+import time
+
+from src.utils.journal import SegmentJournal
+
+
+def test_append_peek_commit(tmp_path):
+    journal = SegmentJournal(str(tmp_path))
+    for i in range(5):
+        journal.append(f"record-{i}".encode())
+
+    assert len(journal) == 5
+    assert journal.peek(2) == [b"record-0", b"record-1"]
+
+    journal.commit(2)
+
+    assert len(journal) == 3
+    assert journal.peek(10) == [b"record-2", b"record-3", b"record-4"]
+
+
+def test_rotates_and_deletes_committed_segments(tmp_path):
+    journal = SegmentJournal(str(tmp_path), segment_bytes=64)
+    for i in range(20):
+        journal.append(bytes(20))
+
+    segments = [n for n in os.listdir(tmp_path) if n.endswith(".seg")]
+    assert len(segments) > 1
+
+    journal.commit(len(journal))
+
+    assert len(journal) == 0
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".seg")]) == 1
+
+
+def test_evicts_oldest_segments_when_full(tmp_path):
+    journal = SegmentJournal(str(tmp_path), segment_bytes=100, max_bytes=300)
+    for i in range(50):
+        journal.append(i.to_bytes(4, "little") * 10)
+
+    assert journal.size_bytes <= 300 + 100
+    assert journal.evicted_records > 0
+    assert len(journal) + journal.evicted_records == 50
+    assert int.from_bytes(journal.peek(50)[-1][:4], "little") == 49
+
+
+def test_survives_reopen_with_cursor(tmp_path):
+    journal = SegmentJournal(str(tmp_path), segment_bytes=64)
+    for i in range(10):
+        journal.append(bytes([i]) * 8)
+    journal.commit(4)
+    journal.close()
+
+    reopened = SegmentJournal(str(tmp_path), segment_bytes=64)
+    reopened.append(b"new")
+
+    assert len(reopened) == 7
+    assert reopened.peek(1) == [bytes([4]) * 8]
+    assert reopened.peek(7)[-1] == b"new"
+
+
+def test_truncates_torn_record(tmp_path):
+    journal = SegmentJournal(str(tmp_path))
+    journal.append(b"good")
+    journal.append(b"torn-record")
+    journal.close()
+
+    segment = next(n for n in os.listdir(tmp_path) if n.endswith(".seg"))
+    path = os.path.join(tmp_path, segment)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    reopened = SegmentJournal(str(tmp_path))
+
+    assert reopened.corrupt_records == 1
+    assert reopened.peek(5) == [b"good"]
+
+
+def test_fsyncs_every_n_records_and_after_interval(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or fsync(fd))
+    journal = SegmentJournal(str(tmp_path), sync_records=2, sync_interval_s=0.05)
+
+    for i in range(3):
+        journal.append(bytes(8))
+    assert journal.syncs == 1
+
+    time.sleep(0.2)
+    assert journal.syncs == 2
+    assert journal._unsynced == 0
+
+    journal.commit(1)
+    # cursor file and directory
+    assert len(synced) >= 4
+
+
+def test_pending_count_is_kept_without_rescanning(tmp_path, monkeypatch):
+    journal = SegmentJournal(str(tmp_path), segment_bytes=100, max_bytes=300)
+    for i in range(50):
+        journal.append(i.to_bytes(4, "little") * 10)
+    journal.commit(3)
+    expected = journal._count_pending()
+
+    monkeypatch.setattr(journal, "_count_pending", None)
+    assert len(journal) == expected
+    journal.commit(1000)
+    assert len(journal) == 0
+
+    journal.append(b"x")
+    journal.close()
+    assert len(SegmentJournal(str(tmp_path))) == 1
+
+
+def test_cursor_saved_every_n_commits_and_on_close(tmp_path):
+    journal = SegmentJournal(str(tmp_path), sync_records=4, sync_interval_s=60)
+    for i in range(10):
+        journal.append(bytes([i]))
+    journal.sync()
+
+    for _ in range(3):
+        journal.commit(1)
+    # not saved yet: a crash reads these records again
+    assert SegmentJournal(str(tmp_path)).peek(1) == [bytes([0])]
+
+    journal.commit(1)
+    assert SegmentJournal(str(tmp_path)).peek(1) == [bytes([4])]
+
+    journal.commit(1)
+    journal.close()
+    assert SegmentJournal(str(tmp_path)).peek(1) == [bytes([5])]
@@ -0,0 +1,67 @@
+import os
+import socket
+
+import pytest
+
+from src.utils.telemetry.local_export import (
+    RECORD,
+    LocalTelemetryExporter,
+    SharedTelemetryReader,
+    decode_record,
+)
+from src.utils.telemetry.ring_buffer import COLUMNS
+
+
+def sample(i):
+    values = {name: float(i) for name in COLUMNS}
+    values["health"] = 0b111111
+    return values
+
+
+def test_record_layout_is_fixed():
+    assert RECORD.size == 8 + 3 * 8 + 6 * 4 + 1
+
+
+def test_shared_memory_roundtrip():
+    exporter = LocalTelemetryExporter(shm_name=f"fc_test_{os.getpid()}")
+    try:
+        exporter.export(sample(1))
+        reader = SharedTelemetryReader(exporter.shm_name)
+        exporter.export(sample(2))
+
+        count, fields = reader.read()
+        reader.close()
+    finally:
+        exporter.close()
+
+    assert count == 2
+    assert fields["latitude_deg"] == 2.0
+    assert fields["health"] == 0b111111
+
+
+def test_datagram_roundtrip(tmp_path):
+    path = str(tmp_path / "telemetry.sock")
+    receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    receiver.bind(path)
+    exporter = LocalTelemetryExporter(socket_path=path)
+
+    exporter.export(sample(1))
+    exporter.export(sample(2))
+    exporter.close()
+
+    first = decode_record(receiver.recv(RECORD.size))
+    second = decode_record(receiver.recv(RECORD.size))
+    receiver.close()
+
+    assert (first[0], second[0]) == (1, 2)
+    assert second[1]["voltage_v"] == pytest.approx(2.0)
+
+
+def test_datagram_without_listener_is_dropped(tmp_path):
+    exporter = LocalTelemetryExporter(socket_path=str(tmp_path / "nobody.sock"))
+
+    exporter.export(sample(1))
+    exporter.close()
+
+    assert exporter.dropped == 1
+    assert exporter.error_count == 0
@@ -0,0 +1,22 @@
+import pytest
+
+from src.utils.metrics import LatencyHistogram
+
+
+def test_percentiles_report_bucket_upper_bounds():
+    histogram = LatencyHistogram()
+    for seconds in [0.002] * 90 + [0.3] * 9 + [120.0]:
+        histogram.record(seconds)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 0.0025
+    assert histogram.percentile(95) == 0.5
+    assert histogram.percentile(100) == 120.0
+    assert histogram.mean_s == pytest.approx((0.18 + 2.7 + 120.0) / 100)
+
+
+def test_empty_snapshot():
+    snapshot = LatencyHistogram().snapshot()
+
+    assert snapshot["count"] == 0
+    assert snapshot["p99_s"] is None
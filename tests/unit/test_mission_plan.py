@@ -0,0 +1,129 @@
+import copy
+import json
+import math
+
+import pytest
+
+from src.exceptions.mission_exceptions import MissionPlanException
+from src.utils.mission_plan import MissionPlanParser
+
+HOME = [47.3977, 8.5456, 488.0]
+
+
+def waypoint(lat, lon, alt, command=16, frame=3):
+    return {
+        "type": "SimpleItem",
+        "autoContinue": True,
+        "command": command,
+        "doJumpId": 1,
+        "frame": frame,
+        "params": [0, 0, 0, None, lat, lon, alt],
+    }
+
+
+PLAN = {
+    "fileType": "Plan",
+    "groundStation": "QGroundControl",
+    "version": 1,
+    "mission": {
+        "version": 2,
+        "firmwareType": 12,
+        "plannedHomePosition": HOME,
+        "items": [
+            waypoint(47.3977, 8.5456, 20, command=22),
+            {
+                "type": "ComplexItem",
+                "complexItemType": "survey",
+                "TransectStyleComplexItem": {
+                    "Items": [
+                        waypoint(47.3980, 8.5460, 40),
+                        waypoint(47.3985, 8.5460, 40),
+                    ]
+                },
+            },
+            waypoint(47.3977, 8.5456, 0, command=21),
+        ],
+    },
+    "geoFence": {
+        "polygons": [
+            {
+                "inclusion": True,
+                "polygon": [
+                    [47.39, 8.54],
+                    [47.41, 8.54],
+                    [47.41, 8.56],
+                    [47.39, 8.56],
+                ],
+            }
+        ],
+        "circles": [],
+    },
+    "rallyPoints": {"points": []},
+}
+
+
+def encode(plan: dict) -> bytes:
+    return json.dumps(plan).encode()
+
+
+def test_parses_simple_and_complex_items():
+    plan = MissionPlanParser().load_bytes(encode(PLAN))
+
+    assert [item.command for item in plan.items] == [22, 16, 16, 21]
+    assert [item.seq for item in plan.items] == [0, 1, 2, 3]
+    first = plan.items[0]
+    assert (first.x, first.y, first.z) == (473977000, 85456000, 20)
+    assert first.current == 1 and first.autocontinue == 1
+    assert math.isnan(first.param4)
+    assert plan.home == tuple(HOME)
+
+
+def test_caches_by_content():
+    parser = MissionPlanParser(max_entries=1)
+    first = parser.load_bytes(encode(PLAN))
+
+    assert parser.load_bytes(encode(PLAN)) is first
+    other = copy.deepcopy(PLAN)
+    other["mission"]["items"].pop()
+    parser.load_bytes(encode(other))
+    assert parser.load_bytes(encode(PLAN)) is not first
+    assert (parser.hits, parser.misses) == (1, 3)
+    assert parser.parse_latency.count == 3
+
+
+@pytest.mark.parametrize(
+    "change, parser",
+    [
+        (lambda p: p["mission"]["items"].append(waypoint(47.40, 8.55, 150)), None),
+        # AMSL frame, 150 m above home
+        (
+            lambda p: p["mission"]["items"].append(
+                waypoint(47.40, 8.55, HOME[2] + 150, frame=0)
+            ),
+            None,
+        ),
+        (lambda p: p["mission"]["items"].append(waypoint(47.50, 8.55, 30)), None),
+        (lambda p: p["mission"].update(items=[]), None),
+        (lambda p: None, MissionPlanParser(max_items=3)),
+        (lambda p: p["mission"].pop("items"), None),
+        (lambda p: p["mission"].update(plannedHomePosition=HOME[:2]), None),
+        (lambda p: p["mission"].update(plannedHomePosition=["a", "b", "c"]), None),
+        (lambda p: p["mission"].update(plannedHomePosition=[47.3, 8.5, {}]), None),
+    ],
+)
+def test_rejects_invalid_plans(change, parser):
+    plan = copy.deepcopy(PLAN)
+    change(plan)
+
+    with pytest.raises(MissionPlanException):
+        (parser or MissionPlanParser()).load_bytes(encode(plan))
+
+
+def test_exclusion_zones():
+    plan = copy.deepcopy(PLAN)
+    plan["geoFence"]["circles"].append(
+        {"circle": {"center": [47.3985, 8.5460], "radius": 10}, "inclusion": False}
+    )
+
+    with pytest.raises(MissionPlanException, match="geofence"):
+        MissionPlanParser().load_bytes(encode(plan))
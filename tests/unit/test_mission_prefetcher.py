@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from zipfile import ZipFile
+
+import pytest
+
+from sim.iot_jobs.__main__ import mission_document
+from src.core.mission_prefetcher import MissionPrefetcher
+from src.models.job_document import Job
+from src.utils.download_handler import MissionDownloader
+from src.utils.mission_plan import MissionPlanParser
+
+THING = "thing"
+PLAN = json.dumps(
+    {
+        "fileType": "Plan",
+        "mission": {
+            "items": [
+                {
+                    "type": "SimpleItem",
+                    "autoContinue": True,
+                    "command": 22,
+                    "frame": 3,
+                    "params": [0, 0, 0, None, 47.39, 8.54, 30],
+                }
+            ],
+            "plannedHomePosition": [47.39, 8.54, 400],
+        },
+    }
+).encode()
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    path = tmp_path / "mission.zip"
+    with ZipFile(path, "w") as archive:
+        archive.writestr(THING, PLAN)
+    return path
+
+
+def prefetcher(tmp_path, bundle, queued, **kwargs):
+    document = mission_document(THING)
+    document["operation"] = "DOWNLOAD"
+    document["data"]["download_url"] = bundle.as_uri()
+
+    mqtt = Mock()
+    mqtt.get_queued_jobs = AsyncMock(
+        return_value=[SimpleNamespace(job_id=job_id) for job_id in queued]
+    )
+    jobs = Mock()
+    jobs.document = AsyncMock(return_value=Job.model_validate(document))
+    return MissionPrefetcher(
+        mqtt,
+        jobs,
+        MissionDownloader(retries=0),
+        MissionPlanParser(),
+        THING,
+        staging_dir=str(tmp_path / "staging"),
+        **kwargs,
+    )
+
+
+async def settle(p: MissionPrefetcher):
+    await p._look_ahead
+
+
+@pytest.mark.asyncio
+async def test_claims_prefetched_mission(tmp_path, bundle):
+    p = prefetcher(tmp_path, bundle, ["running", "next"])
+
+    p.look_ahead("running")
+    mission = await p.claim("next")
+
+    assert mission.path.endswith(os.path.join("next", THING))
+    assert mission.content == PLAN
+    assert p.plans.misses == 1
+    assert await p.claim("other") is None
+    assert (p.prefetched, p.hits, p.misses) == (1, 1, 1)
+
+    p.release("next")
+    assert not os.path.exists(os.path.dirname(mission.path))
+    assert p.staged_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_skips_missions_over_budget(tmp_path, bundle):
+    p = prefetcher(tmp_path, bundle, ["a"], max_bytes=len(PLAN))
+    download = p.downloader.download_mission = AsyncMock()
+
+    p.look_ahead()
+    await settle(p)
+
+    download.assert_not_awaited()
+    assert p.prefetched == 0
+    assert await p.claim("a") is None
+    assert not os.path.exists(tmp_path / "staging" / "a")
+
+
+@pytest.mark.asyncio
+async def test_evicts_missions_no_longer_queued(tmp_path, bundle):
+    p = prefetcher(tmp_path, bundle, ["a"])
+    p.look_ahead()
+    await settle(p)
+
+    p.thing_jobs.get_queued_jobs.return_value = [SimpleNamespace(job_id="b")]
+    p.look_ahead()
+    await settle(p)
+
+    assert p.evicted == 1
+    assert not os.path.exists(tmp_path / "staging" / "a")
+    assert await p.claim("b")
+
+
+@pytest.mark.asyncio
+async def test_failed_download_is_not_staged(tmp_path, bundle):
+    p = prefetcher(tmp_path, bundle, ["a"])
+    p.jobs.document.return_value.data.download_url = (tmp_path / "gone").as_uri()
+
+    p.look_ahead()
+    await settle(p)
+
+    assert p.error_count == 1
+    assert p.staged_bytes == 0
+    assert await p.claim("a") is None
+    await p.stop()
+
+
+@pytest.mark.asyncio
+async def test_reserves_budget_before_downloading(tmp_path, bundle):
+    size = os.path.getsize(bundle)
+    p = prefetcher(tmp_path, bundle, [], max_bytes=size + len(PLAN))
+    download = p.downloader.download_mission
+    release = asyncio.Event()
+
+    async def slow_download(*args, **kwargs):
+        await release.wait()
+        return await download(*args, **kwargs)
+
+    p.downloader.download_mission = AsyncMock(side_effect=slow_download)
+    fetches = [asyncio.create_task(p._prefetch(job_id)) for job_id in ("a", "b")]
+    await asyncio.sleep(0.2)
+
+    # file URLs have no Range support, the Content-Length is reserved and
+    # leaves no room for a second bundle
+    assert p.downloader.download_mission.await_count == 1
+    assert p.staged_bytes == size
+    release.set()
+    await asyncio.gather(*fetches)
+
+    assert p.prefetched == 1
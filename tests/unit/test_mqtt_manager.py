@@ -0,0 +1,206 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+from awscrt import mqtt5
+
+from src.core import mqtt_manager
+from src.core.mqtt_manager import MqttManager
+from src.core.offline_queue import OfflineQueue
+from src.enums.job_status import JobStatus
+from src.exceptions.mqtt_exceptions import MqttPublishException
+from src.utils.journal import SegmentJournal
+
+
+@pytest_asyncio.fixture
+async def mqtt(monkeypatch):
+    client = Mock()
+    client.futures = []
+
+    def publish(packet):
+        client.futures.append(Future())
+        return client.futures[-1]
+
+    client.publish.side_effect = publish
+    monkeypatch.setattr(
+        mqtt_manager.mqtt5_client_builder, "mtls_from_path", lambda **kw: client
+    )
+    monkeypatch.setattr(mqtt_manager.iotjobs, "IotJobsClientV2", Mock())
+    return MqttManager("cert", "key", "ca", "endpoint", "thing", 5, max_in_flight=2)
+
+
+def complete(future, reason=mqtt5.PubackReasonCode.SUCCESS):
+    future.set_result(
+        mqtt5.PublishCompletionData(puback=mqtt5.PubackPacket(reason_code=reason))
+    )
+
+
+@pytest.mark.asyncio
+async def test_publish_async_resolves_on_puback(mqtt):
+    ack = await mqtt.publish_async("a", "hello")
+    assert mqtt.in_flight_by_topic == {"a": 1}
+
+    complete(mqtt.client.futures[0])
+    completion = await ack
+
+    assert completion.puback.reason_code == mqtt5.PubackReasonCode.SUCCESS
+    assert mqtt.in_flight_by_topic == {}
+    assert mqtt.publishes_acked == 1
+    assert mqtt.publish_latency.count == 1
+
+
+@pytest.mark.asyncio
+async def test_window_applies_backpressure(mqtt):
+    acks = [await mqtt.publish_async("t", b"x") for _ in range(2)]
+    third = asyncio.create_task(mqtt.publish_async("t", b"x"))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    complete(mqtt.client.futures[0])
+    await acks[0]
+    await asyncio.wait_for(third, 1)
+
+    assert mqtt.in_flight == 2
+    assert len(mqtt.client.futures) == 3
+
+
+@pytest.mark.asyncio
+async def test_rejected_puback_raises_and_counts(mqtt):
+    ack = await mqtt.publish_async("t", "hi")
+    complete(mqtt.client.futures[0], mqtt5.PubackReasonCode.NOT_AUTHORIZED)
+
+    with pytest.raises(MqttPublishException):
+        await ack
+    assert mqtt.publishes_failed == 1
+    assert mqtt.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_jobs_requests_are_awaited_without_threads(mqtt):
+    futures = []
+
+    def describe(request):
+        futures.append(Future())
+        return futures[-1]
+
+    mqtt.jobs_client.describe_job_execution.side_effect = describe
+    baseline = threading.active_count()
+    requests = [asyncio.create_task(mqtt.describe_job(f"job-{i}")) for i in range(20)]
+    await asyncio.sleep(0)
+    threads = threading.active_count()
+
+    for i, future in enumerate(futures):
+        threading.Thread(target=future.set_result, args=(i,)).start()
+    results = await asyncio.gather(*requests)
+
+    assert threads == baseline
+    assert results == list(range(20))
+    assert mqtt.request_latency["describe_job_execution"].count == 20
+
+
+@pytest.mark.asyncio
+async def test_failed_request_is_counted(mqtt):
+    future = Future()
+    future.set_exception(RuntimeError("rejected"))
+    mqtt.jobs_client.update_job_execution.return_value = future
+
+    with pytest.raises(RuntimeError):
+        await mqtt.update_job_status("job", JobStatus.SUCCEEDED)
+
+    assert mqtt.request_metrics()["update_job_execution"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_thing_jobs_request_for_their_thing(mqtt):
+    future = Future()
+    future.set_result(Mock(queued_jobs=[]))
+    mqtt.jobs_client.get_pending_job_executions.return_value = future
+    jobs = mqtt.for_thing("vehicle-2")
+
+    assert await jobs.get_next_queued_job() is None
+    jobs.stream_next_job(Mock(), Mock())
+
+    request = mqtt.jobs_client.get_pending_job_executions.call_args.args[0]
+    assert request.thing_name == "vehicle-2"
+    stream = mqtt.jobs_client.create_next_job_execution_changed_stream
+    assert stream.call_args.args[0].thing_name == "vehicle-2"
+    assert jobs._next_job_stream is not None and mqtt.jobs._next_job_stream is None
+    assert not hasattr(jobs, "publish")
+    # the shared connection's metrics
+    assert mqtt.thing_name == mqtt.jobs.thing_name == "thing"
+    assert mqtt.request_latency["get_pending_job_executions"].count == 1
+
+
+@pytest.mark.asyncio
+async def test_received_messages_dispatch_on_loop(mqtt):
+    received = []
+    mqtt._loop = asyncio.get_running_loop()
+    await mqtt.subscribe(
+        "devices/+/stream",
+        lambda topic, payload: received.append((topic, threading.get_ident())),
+    )
+    packet = Mock()
+    packet.publish_packet.topic = "devices/thing/stream"
+
+    thread = threading.Thread(target=mqtt._on_publish_received, args=(packet,))
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0)
+
+    assert received == [("devices/thing/stream", threading.get_ident())]
+
+
+@pytest.mark.asyncio
+async def test_offline_publishes_drain_in_order_after_reconnect(mqtt, tmp_path):
+    mqtt.offline_queue = OfflineQueue(SegmentJournal(str(tmp_path)), 8)
+    mqtt.offline_drain_rate = 1000
+    mqtt._loop = asyncio.get_running_loop()
+
+    queued = [mqtt.publish("t", f"m{i}") for i in range(3)]
+    mqtt.client.publish.assert_not_called()
+
+    mqtt._on_lifecycle_connection_success(Mock())
+    await asyncio.sleep(0.05)
+
+    payloads = [call.args[0].payload for call in mqtt.client.publish.call_args_list]
+    assert payloads == [b"m0", b"m1", b"m2"]
+    complete(mqtt.client.futures[0])
+    await asyncio.sleep(0.01)
+    assert queued[0].result(timeout=1).puback.reason_code == 0
+    # only acknowledged messages leave the queue
+    assert mqtt.offline_queue.pending == 3
+
+    for future in mqtt.client.futures[1:]:
+        complete(future)
+    await asyncio.sleep(0.01)
+    assert mqtt.offline_queue.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_offline_messages_not_acked_are_sent_again(mqtt, tmp_path):
+    mqtt.offline_queue = OfflineQueue(SegmentJournal(str(tmp_path)), 0)
+    mqtt.offline_drain_rate = 1000
+    mqtt._loop = asyncio.get_running_loop()
+    queued = [mqtt.publish("t", f"m{i}") for i in range(3)]
+
+    mqtt._on_lifecycle_connection_success(Mock())
+    await asyncio.sleep(0.05)
+    complete(mqtt.client.futures[0])
+    mqtt.connected = False
+    mqtt.client.futures[1].set_exception(RuntimeError("connection lost"))
+    await asyncio.sleep(0.01)
+    assert mqtt.offline_queue.pending == 2
+
+    mqtt._on_lifecycle_connection_success(Mock())
+    await asyncio.sleep(0.05)
+    for future in mqtt.client.futures[3:]:
+        complete(future)
+    await asyncio.sleep(0.01)
+
+    payloads = [call.args[0].payload for call in mqtt.client.publish.call_args_list]
+    assert payloads == [b"m0", b"m1", b"m2", b"m1", b"m2"]
+    assert mqtt.offline_queue.pending == 0
+    assert all(future.result(timeout=1) for future in queued)
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from src.core.offline_queue import OfflineQueue, QueuedPublish
+from src.exceptions.mqtt_exceptions import MqttPublishException
+from src.utils.journal import SegmentJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return SegmentJournal(str(tmp_path), segment_bytes=256, max_bytes=1024)
+
+
+def drain(queue):
+    items = []
+    while queue.pending:
+        items += queue.peek(2)
+        queue.pop(items[-2:])
+    return items
+
+
+def test_record_roundtrip():
+    item = QueuedPublish("a/b", "héllo", "application/json", queued_at=12.5)
+    decoded = QueuedPublish.decode(item.encode())
+
+    assert (decoded.topic, decoded.message) == ("a/b", "héllo")
+    assert (decoded.content_type, decoded.queued_at) == ("application/json", 12.5)
+    assert QueuedPublish.decode(QueuedPublish("t", b"\x00\x01").encode()).message == (
+        b"\x00\x01"
+    )
+    # the memory limit is in bytes
+    assert QueuedPublish("t", "é" * 10).size == 21
+
+
+def test_spills_to_disk_in_order(journal):
+    queue = OfflineQueue(journal, memory_limit_bytes=20)
+    for i in range(6):
+        queue.put("t", f"message-{i}")
+
+    assert len(journal) > 0
+    assert [item.message for item in drain(queue)] == [f"message-{i}" for i in range(6)]
+
+
+def test_backlog_survives_restart(tmp_path):
+    queue = OfflineQueue(SegmentJournal(str(tmp_path)), memory_limit_bytes=0)
+    queue.put("t", b"persisted")
+
+    restarted = OfflineQueue(SegmentJournal(str(tmp_path)))
+    (item,) = restarted.peek()
+
+    assert item.message == b"persisted"
+    assert item.future is None
+    assert restarted.backlog()["count"] == 1
+
+
+def test_evicted_records_fail_their_futures(journal):
+    queue = OfflineQueue(journal, memory_limit_bytes=0)
+    futures = [queue.put("t", b"x" * 100) for _ in range(20)]
+
+    assert queue.evicted > 0
+    with pytest.raises(MqttPublishException):
+        futures[0].result(timeout=0)
+    assert len(queue._journal_futures) == len(journal)
+
+
+def test_eviction_between_peek_and_pop_commits_nothing_twice(journal):
+    queue = OfflineQueue(journal, memory_limit_bytes=0)
+    futures = [queue.put("t", f"{i:03d}".encode() * 30) for i in range(4)]
+    peeked = queue.peek()
+    assert queue.backlog()["count"] == 4
+
+    # fill the journal until the peeked record's segment is evicted
+    i = 4
+    while not futures[0].done():
+        futures.append(queue.put("t", f"{i:03d}".encode() * 30))
+        i += 1
+    queue.pop(peeked)
+
+    remaining = drain(queue)
+    assert len(remaining) == queue.spilled - queue.evicted
+    assert [item.message[:3] for item in remaining] == sorted(
+        item.message[:3] for item in remaining
+    )
+    assert remaining[0].future is futures[queue.evicted]
+    assert not any(f.done() for f in futures[queue.evicted :])
+
+
+def test_backlog_reports_age(journal):
+    queue = OfflineQueue(journal)
+    queue.put("t", "x")
+    queue._memory[0].queued_at = time.time() - 30
+
+    backlog = queue.backlog()
+    assert backlog["count"] == 1
+    assert backlog["oldest_age_s"] >= 30
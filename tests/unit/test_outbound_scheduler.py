@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.outbound_scheduler import OutboundScheduler
+from src.enums.publish_priority import PublishPriority
+from src.exceptions.mqtt_exceptions import MqttPublishException
+
+
+def recorder(order, name, gate=None):
+    async def send():
+        if gate:
+            await gate.wait()
+        order.append(name)
+        return name
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_goes_first():
+    scheduler = OutboundScheduler(Mock())
+    order = []
+
+    sent = [
+        scheduler.submit(PublishPriority.BACKFILL, 10, recorder(order, "backfill")),
+        scheduler.submit(PublishPriority.TELEMETRY, 10, recorder(order, "telemetry")),
+        scheduler.submit(PublishPriority.CONTROL, 10, recorder(order, "control")),
+    ]
+    await scheduler.start()
+    results = await asyncio.gather(*sent)
+    await scheduler.stop()
+
+    assert order == ["control", "telemetry", "backfill"]
+    assert results == ["backfill", "telemetry", "control"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_in_flight_cap_leaves_room_for_alerts():
+    scheduler = OutboundScheduler(Mock(), max_in_flight={PublishPriority.TELEMETRY: 1})
+    gate = asyncio.Event()
+    order = []
+    await scheduler.start()
+
+    first = scheduler.submit(PublishPriority.TELEMETRY, 10, recorder(order, "t1", gate))
+    second = scheduler.submit(PublishPriority.TELEMETRY, 10, recorder(order, "t2"))
+    await asyncio.sleep(0.01)
+    alert = scheduler.submit(PublishPriority.ALERT, 10, recorder(order, "alert"))
+    await alert
+    assert not second.done()
+
+    gate.set()
+    await asyncio.gather(first, second)
+    await scheduler.stop()
+
+    assert order == ["alert", "t1", "t2"]
+
+
+@pytest.mark.asyncio
+async def test_byte_rate_limits_class():
+    scheduler = OutboundScheduler(Mock(), byte_rates={PublishPriority.TELEMETRY: 1000})
+    order = []
+    await scheduler.start()
+
+    scheduler.submit(PublishPriority.TELEMETRY, 1000, recorder(order, "t1"))
+    scheduler.submit(PublishPriority.TELEMETRY, 500, recorder(order, "t2"))
+    await asyncio.sleep(0.1)
+    assert order == ["t1"]
+
+    await asyncio.sleep(0.5)
+    await scheduler.stop()
+    assert order == ["t1", "t2"]
+
+
+@pytest.mark.asyncio
+async def test_high_priority_preempts_low_priority_backlog():
+    scheduler = OutboundScheduler(Mock(), max_queued_bytes=100)
+    order = []
+
+    backfill = scheduler.submit(PublishPriority.BACKFILL, 80, recorder(order, "b"))
+    alert = scheduler.submit(PublishPriority.ALERT, 50, recorder(order, "alert"))
+    await scheduler.start()
+    await alert
+    await scheduler.stop()
+
+    with pytest.raises(MqttPublishException):
+        backfill.result()
+    assert order == ["alert"]
+    assert scheduler.stats()["BACKFILL"]["preempted"] == 1
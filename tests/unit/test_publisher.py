@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+from unittest.mock import Mock
+
+from src.core.mqtt_manager import MqttManager
+from src.core.outbound_scheduler import OutboundScheduler
+from src.enums.publish_priority import PublishPriority
+from src.enums.telemetry_compression import TelemetryCompression
+from src.exceptions.mqtt_exceptions import MqttPublishException
+from src.utils.journal import SegmentJournal
+from src.utils.telemetry.collector import TelemetryCollector
+from src.utils.telemetry.publisher import TelemetryPublisher
+from src.utils.telemetry.rate_policy import FieldRateFilter
+from src.utils.telemetry.ring_buffer import COLUMNS
+from src.utils.telemetry.wire_format import decode_batch, FLAG_BACKFILL
+
+
+@pytest.fixture
+def collector():
+    collector = TelemetryCollector("drone1", Mock(), interval_hz=10.0)
+    return collector
+
+
+@pytest.fixture
+def mqtt():
+    return Mock(spec=MqttManager)
+
+
+def fill(collector, count, timestamp=None):
+    import time
+
+    for i in range(count):
+        values = {name: float(i) for name in COLUMNS}
+        values["timestamp"] = (timestamp or time.time()) + i * 0.01
+        values["health"] = 0
+        collector.buffer.append(**values)
+
+
+def published_batches(mqtt):
+    calls = mqtt.publish.call_args_list + mqtt.publish_async.call_args_list
+    return [decode_batch(call.args[1]) for call in calls]
+
+
+@pytest.mark.asyncio
+async def test_flushes_full_batches_and_remainder_on_stop(collector, mqtt):
+    publisher = TelemetryPublisher(collector, mqtt, "t", batch_size=10)
+    fill(collector, 25)
+
+    await publisher.start()
+    await publisher.stop()
+
+    sizes = [len(b.frame) for b in published_batches(mqtt)]
+    assert sizes == [10, 10, 5]
+    assert publisher.samples_sent == 25
+    assert publisher.bytes_sent == sum(
+        len(call.args[1]) for call in mqtt.publish.call_args_list
+    )
+
+
+@pytest.mark.asyncio
+async def test_flushes_partial_batch_after_max_latency(collector, mqtt):
+    publisher = TelemetryPublisher(
+        collector, mqtt, "t", batch_size=100, max_latency_s=0.05
+    )
+    fill(collector, 3)
+
+    batch = await publisher._next_batch()
+
+    assert len(batch) == 3
+
+
+@pytest.mark.asyncio
+async def test_min_fill_holds_back_small_batches(collector, mqtt):
+    publisher = TelemetryPublisher(
+        collector, mqtt, "t", batch_size=100, max_latency_s=0.02, min_fill=5
+    )
+    fill(collector, 2)
+
+    assert await publisher._next_batch() is None
+    assert len(collector.buffer) == 2
+
+
+def test_oversized_batches_are_split(collector, mqtt):
+    publisher = TelemetryPublisher(collector, mqtt, "t", max_batch_bytes=200)
+    fill(collector, 64)
+
+    publisher._publish_batch(collector.buffer.read())
+
+    batches = published_batches(mqtt)
+    assert len(batches) > 1
+    assert sum(len(b.frame) for b in batches) == 64
+    assert all(len(call.args[1]) <= 200 for call in mqtt.publish.call_args_list)
+
+
+def test_compression_counters(collector, mqtt):
+    publisher = TelemetryPublisher(
+        collector, mqtt, "t", compression=TelemetryCompression.ZLIB
+    )
+    fill(collector, 200)
+
+    publisher._publish_batch(collector.buffer.read())
+
+    assert publisher.bytes_sent < publisher.bytes_uncompressed
+    assert publisher.compression_ratio > 1.0
+    assert len(published_batches(mqtt)[0].frame) == 200
+
+
+def test_batches_are_journaled_while_disconnected(collector, mqtt, tmp_path):
+    journal = SegmentJournal(str(tmp_path))
+    publisher = TelemetryPublisher(collector, mqtt, "t", journal=journal)
+    mqtt.connected = False
+    fill(collector, 10)
+
+    publisher._publish_batch(collector.buffer.read())
+
+    mqtt.publish.assert_not_called()
+    assert publisher.batches_journaled == 1
+    assert len(journal) == 1
+
+
+def test_failed_publish_is_journaled(collector, mqtt, tmp_path):
+    journal = SegmentJournal(str(tmp_path))
+    publisher = TelemetryPublisher(collector, mqtt, "t", journal=journal)
+    mqtt.connected = True
+    mqtt.publish.side_effect = MqttPublishException("offline")
+    fill(collector, 10)
+
+    publisher._publish_batch(collector.buffer.read())
+
+    assert len(journal) == 1
+    assert publisher.error_count == 1
+
+
+def test_first_live_batch_after_reconnect_has_slow_columns(collector, mqtt, tmp_path):
+    publisher = TelemetryPublisher(
+        collector,
+        mqtt,
+        "t",
+        journal=SegmentJournal(str(tmp_path)),
+        field_filter=FieldRateFilter({"health": 60.0}),
+    )
+
+    def publish_batch():
+        fill(collector, 5)
+        publisher._publish_batch(publisher._filter(collector.buffer.read()))
+
+    mqtt.connected = True
+    publish_batch()
+    publish_batch()
+    mqtt.connected = False
+    publish_batch()
+    mqtt.connected = True
+    publish_batch()
+
+    batches = published_batches(mqtt)
+    assert ["health" in b.frame.columns for b in batches] == [True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_backfill_is_tagged_and_drains_journal(collector, mqtt, tmp_path):
+    journal = SegmentJournal(str(tmp_path))
+    publisher = TelemetryPublisher(
+        collector, mqtt, "t", journal=journal, backfill_rate=100.0
+    )
+    mqtt.connected = False
+    for _ in range(3):
+        fill(collector, 5)
+        publisher._publish_batch(collector.buffer.read())
+
+    mqtt.connected = True
+    mqtt.publish_async.side_effect = lambda *args, **kwargs: asyncio.sleep(0)
+    await publisher.start_backfill()
+    await asyncio.sleep(0.1)
+    await publisher.stop_backfill()
+
+    batches = published_batches(mqtt)
+    assert len(batches) == 3
+    assert all(b.flags & FLAG_BACKFILL for b in batches)
+    assert len(journal) == 0
+    assert publisher.batches_backfilled == 3
+
+
+@pytest.mark.asyncio
+async def test_preempted_batches_are_journaled(collector, mqtt, tmp_path):
+    journal = SegmentJournal(str(tmp_path))
+    outbound = OutboundScheduler(mqtt, max_queued_bytes=1)
+    publisher = TelemetryPublisher(
+        collector, mqtt, "t", journal=journal, outbound=outbound
+    )
+    mqtt.connected = True
+
+    fill(collector, 5)
+    publisher._publish_batch(collector.buffer.read())
+    outbound.submit(PublishPriority.ALERT, 10, lambda: asyncio.sleep(0))
+    await asyncio.sleep(0)
+
+    assert len(journal) == 1
+    assert publisher.batches_journaled == 1
+    await outbound.stop()
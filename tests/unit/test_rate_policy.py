@@ -0,0 +1,68 @@
+import pytest
+
+from src.core.state_machine import StateMachine
+from src.utils.telemetry.rate_policy import SamplingRatePolicy, FieldRateFilter
+from src.utils.telemetry.ring_buffer import COLUMNS, TelemetryRingBuffer
+
+
+def fill(buffer, count, climb_ms=0.0, hz=10.0):
+    for i in range(count):
+        values = {name: 0.0 for name in COLUMNS}
+        values["timestamp"] = 1000.0 + i / hz
+        values["relative_altitude_m"] = 20.0 + climb_ms * i / hz
+        values["voltage_v"] = 16.0
+        values["ground_speed_ms"] = 8.0
+        buffer.append(**values)
+
+
+@pytest.fixture
+def policy():
+    return SamplingRatePolicy(StateMachine(), cruise_hz=10, high_hz=20, idle_hz=1)
+
+
+def to_state(sm, *events):
+    for event in events:
+        sm.trigger(event)
+
+
+def test_idle_on_ground(policy):
+    assert policy.rate_hz(TelemetryRingBuffer(8)) == 1
+
+
+def test_high_rate_during_takeoff_and_landing(policy):
+    to_state(policy.state, "download", "upload", "arm")
+    assert policy.rate_hz(TelemetryRingBuffer(8)) == 20
+
+    to_state(policy.state, "fly", "complete")
+    assert policy.rate_hz(TelemetryRingBuffer(8)) == 20
+
+
+def test_cruise_rate_in_steady_flight(policy):
+    to_state(policy.state, "download", "upload", "arm", "fly")
+    buffer = TelemetryRingBuffer(64)
+    fill(buffer, 40)
+
+    assert policy.rate_hz(buffer) == 10
+
+
+def test_climbing_in_flight_raises_rate(policy):
+    to_state(policy.state, "download", "upload", "arm", "fly")
+    buffer = TelemetryRingBuffer(64)
+    fill(buffer, 40, climb_ms=2.0)
+
+    assert policy.rate_hz(buffer) == 20
+
+
+def test_field_filter_omits_unchanged_slow_columns():
+    buffer = TelemetryRingBuffer(64)
+    fill(buffer, 10)
+    field_filter = FieldRateFilter({"health": 5.0})
+
+    first = field_filter.apply(buffer.latest(5), now=0.0)
+    second = field_filter.apply(buffer.latest(5), now=1.0)
+    due = field_filter.apply(buffer.latest(5), now=6.0)
+
+    assert "health" in first.columns
+    assert "health" not in second.columns
+    assert "voltage_v" in second.columns
+    assert "health" in due.columns
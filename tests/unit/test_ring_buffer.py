@@ -0,0 +1,121 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.utils.telemetry.ring_buffer import (
+    COLUMNS,
+    TelemetryRingBuffer,
+    pack_health,
+    unpack_health,
+    HEALTH_FLAGS,
+)
+
+
+def sample(i: float) -> dict:
+    values = {name: i for name in COLUMNS}
+    values["health"] = 0b101
+    return values
+
+
+def test_read_consumes_in_order():
+    buffer = TelemetryRingBuffer(capacity=8)
+    for i in range(5):
+        buffer.append(**sample(i))
+
+    first = buffer.read(3)
+    rest = buffer.read()
+
+    assert first["timestamp"].tolist() == [0, 1, 2]
+    assert rest["timestamp"].tolist() == [3, 4]
+    assert len(buffer) == 0
+
+
+def test_overwrite_drops_oldest_and_wraps():
+    buffer = TelemetryRingBuffer(capacity=4)
+    for i in range(10):
+        buffer.append(**sample(i))
+
+    assert len(buffer) == 4
+    assert buffer.dropped == 6
+    assert buffer.oldest_timestamp() == 6
+    assert buffer.read()["timestamp"].tolist() == [6, 7, 8, 9]
+
+
+def test_latest_does_not_consume():
+    buffer = TelemetryRingBuffer(capacity=4)
+    for i in range(6):
+        buffer.append(**sample(i))
+
+    assert buffer.latest(2)["timestamp"].tolist() == [4, 5]
+    assert len(buffer) == 4
+
+
+def test_frame_downsample_stats_and_deltas():
+    buffer = TelemetryRingBuffer(capacity=16)
+    for i in range(10):
+        buffer.append(**sample(i))
+    frame = buffer.read()
+
+    assert frame.downsample(3)["timestamp"].tolist() == [0, 3, 6, 9]
+    assert np.all(frame.deltas("timestamp") == 1)
+
+    stats = frame.stats()["voltage_v"]
+    assert stats["min"] == 0
+    assert stats["max"] == 9
+    assert stats["mean"] == pytest.approx(4.5)
+    assert stats["last"] == 9
+
+
+def test_frame_stats_skip_nan():
+    buffer = TelemetryRingBuffer(capacity=16)
+    for i in range(4):
+        buffer.append(**sample(i))
+    frame = buffer.read()
+    frame["voltage_v"][[0, 3]] = np.nan
+    frame["temperature_degc"][:] = np.nan
+
+    stats = frame.stats()
+    assert stats["voltage_v"] == {"min": 1, "max": 2, "mean": 1.5, "last": 2}
+    assert stats["temperature_degc"] == dict.fromkeys(("min", "max", "mean", "last"))
+
+
+def test_to_records_matches_telemetry_data_shape():
+    from src.models.telemetry_data import TelemetryData
+
+    buffer = TelemetryRingBuffer(capacity=4)
+    buffer.append(**sample(1))
+
+    record = buffer.read().to_records("drone1")[0]
+
+    assert TelemetryData.model_validate(record).model_dump() == record
+    assert record["health"]["is_gyrometer_calibration_ok"] is True
+    assert record["health"]["is_accelerometer_calibration_ok"] is False
+
+
+def test_health_round_trip():
+    class Health:
+        pass
+
+    health = Health()
+    for i, flag in enumerate(HEALTH_FLAGS):
+        setattr(health, flag, i % 2 == 0)
+
+    assert unpack_health(pack_health(health)) == {
+        flag: i % 2 == 0 for i, flag in enumerate(HEALTH_FLAGS)
+    }
+
+
+@pytest.mark.asyncio
+async def test_wait_for_returns_when_filled():
+    buffer = TelemetryRingBuffer(capacity=4)
+
+    async def producer():
+        for i in range(2):
+            await asyncio.sleep(0.01)
+            buffer.append(**sample(i))
+
+    asyncio.create_task(producer())
+
+    assert await buffer.wait_for(2, timeout=1.0) is True
+    assert await buffer.wait_for(3, timeout=0.05) is False
@@ -0,0 +1,61 @@
+import pytest
+
+from src.utils.telemetry.scheduler import DeadlineScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+
+    async def fake_sleep(delay):
+        clock.now += delay
+
+    monkeypatch.setattr("src.utils.telemetry.scheduler.asyncio.sleep", fake_sleep)
+    return clock
+
+
+@pytest.mark.asyncio
+async def test_deadlines_do_not_drift(clock):
+    scheduler = DeadlineScheduler(0.1, clock=clock)
+
+    deadlines = []
+    for _ in range(5):
+        deadlines.append(await scheduler.wait())
+        clock.now += 0.03  # sampling latency
+
+    assert deadlines == pytest.approx([100.0, 100.1, 100.2, 100.3, 100.4])
+    assert scheduler.missed_deadlines == 0
+    assert scheduler.max_jitter_s == pytest.approx(0.0)
+
+
+@pytest.mark.asyncio
+async def test_overrun_skips_missed_deadlines(clock):
+    scheduler = DeadlineScheduler(0.1, clock=clock)
+
+    await scheduler.wait()
+    clock.now += 0.35
+    deadline = await scheduler.wait()
+
+    assert deadline == pytest.approx(100.3)
+    assert scheduler.missed_deadlines == 2
+    assert scheduler.last_jitter_s == pytest.approx(0.05)
+
+    assert await scheduler.wait() == pytest.approx(100.4)
+
+
+@pytest.mark.asyncio
+async def test_interval_change_applies_to_next_deadline(clock):
+    scheduler = DeadlineScheduler(1.0, clock=clock)
+
+    await scheduler.wait()
+    scheduler.interval = 0.25
+
+    assert await scheduler.wait() == pytest.approx(100.25)
@@ -0,0 +1,59 @@
+import pytest
+
+from src.core.topic_router import TopicRouter
+
+
+def handler(name):
+    def handle(topic, payload):
+        return name
+
+    handle.__name__ = name
+    return handle
+
+
+@pytest.fixture
+def router():
+    return TopicRouter()
+
+
+def names(handlers):
+    return sorted(h.__name__ for h in handlers)
+
+
+def test_exact_and_wildcard_filters(router):
+    router.add("devices/a/stream", handler("exact"))
+    router.add("devices/+/stream", handler("single"))
+    router.add("devices/#", handler("multi"))
+    router.add("groups/+/cancel", handler("other"))
+
+    assert names(router.match("devices/a/stream")) == ["exact", "multi", "single"]
+    assert names(router.match("devices/b/stream")) == ["multi", "single"]
+    assert names(router.match("devices")) == ["multi"]
+    assert names(router.match("groups/a/b/cancel")) == []
+
+
+def test_dollar_topics_skip_leading_wildcards(router):
+    router.add("#", handler("all"))
+    router.add("$aws/things/+/jobs/notify", handler("jobs"))
+
+    assert names(router.match("$aws/things/t/jobs/notify")) == ["jobs"]
+    assert names(router.match("devices/t")) == ["all"]
+
+
+def test_multiple_handlers_and_removal(router):
+    first, second = handler("first"), handler("second")
+    router.add("a/+", first)
+    router.add("a/+", second)
+    assert names(router.match("a/b")) == ["first", "second"]
+
+    router.remove("a/+", first)
+    assert names(router.match("a/b")) == ["second"]
+
+    router.remove("a/+")
+    assert router.match("a/b") == []
+
+
+@pytest.mark.parametrize("topic_filter", ["a/#/b", "a/b+", "a#"])
+def test_invalid_filters_rejected(router, topic_filter):
+    with pytest.raises(ValueError):
+        router.add(topic_filter, handler("bad"))
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from src.enums.telemetry_compression import TelemetryCompression
+from src.exceptions.telemetry_exception import WireFormatException
+from src.utils.telemetry.ring_buffer import TelemetryRingBuffer
+from src.utils.telemetry.wire_format import (
+    compress_batch,
+    decode_batch,
+    decode_varints,
+    encode_batch,
+    encode_varints,
+    FORMAT_VERSION,
+)
+
+
+def make_frame(count: int = 20):
+    buffer = TelemetryRingBuffer(capacity=count)
+    for i in range(count):
+        buffer.append(
+            timestamp=1_760_000_000.0 + i * 0.1,
+            latitude_deg=47.3977 + i * 1e-6,
+            longitude_deg=8.5456 - i * 1e-6,
+            relative_altitude_m=10.5 + i * 0.2,
+            voltage_v=12.6 - i * 0.001,
+            remaining_percent=85.0,
+            temperature_degc=25.0,
+            ground_speed_ms=5.0,
+            heading_deg=45.0 + i,
+            health=0b111111 if i % 2 else 0b011111,
+        )
+    return buffer.read()
+
+
+def test_varint_round_trip_edges():
+    values = np.array([0, 1, 127, 128, 16_383, 16_384, 2**63, 2**64 - 1], np.uint64)
+
+    encoded = encode_varints(values)
+    decoded, offset = decode_varints(np.frombuffer(encoded, np.uint8), 0, len(values))
+
+    assert decoded.tolist() == values.tolist()
+    assert offset == len(encoded)
+
+
+def test_batch_round_trip_within_quantization():
+    frame = make_frame()
+
+    decoded = decode_batch(encode_batch(frame, "drone1"))
+
+    assert decoded.version == FORMAT_VERSION
+    assert decoded.device_name == "drone1"
+    assert len(decoded.frame) == len(frame)
+    assert np.allclose(decoded.frame["timestamp"], frame["timestamp"], atol=1e-3)
+    assert np.allclose(decoded.frame["latitude_deg"], frame["latitude_deg"], atol=1e-7)
+    assert np.allclose(decoded.frame["voltage_v"], frame["voltage_v"], atol=1e-3)
+    assert decoded.frame["health"].tolist() == frame["health"].tolist()
+
+
+def test_omitted_columns_are_not_decoded():
+    frame = make_frame()
+    del frame.columns["temperature_degc"]
+
+    decoded = decode_batch(encode_batch(frame, "drone1"))
+
+    assert "temperature_degc" not in decoded.frame.columns
+    assert "voltage_v" in decoded.frame.columns
+
+
+def test_compact_batch_is_smaller_than_records():
+    import base64
+    import cbor2
+
+    frame = make_frame()
+    legacy = base64.b64encode(cbor2.dumps(frame.to_records("drone1")))
+
+    assert len(encode_batch(frame, "drone1")) * 5 < len(legacy)
+
+
+def test_rejects_corrupt_payloads():
+    payload = encode_batch(make_frame(), "drone1")
+
+    with pytest.raises(WireFormatException):
+        decode_batch(b"XX" + payload[2:])
+    with pytest.raises(WireFormatException):
+        decode_batch(payload[:-3])
+    with pytest.raises(WireFormatException):
+        decode_batch(payload[:2] + bytes([FORMAT_VERSION + 1]) + payload[3:])
+
+
+def test_zlib_compressed_round_trip():
+    frame = make_frame(200)
+    plain = encode_batch(frame, "drone1")
+
+    compressed = compress_batch(plain, TelemetryCompression.ZLIB)
+    decoded = decode_batch(compressed)
+
+    assert len(compressed) < len(plain)
+    assert compressed == encode_batch(
+        frame, "drone1", compression=TelemetryCompression.ZLIB
+    )
+    assert np.allclose(decoded.frame["heading_deg"], frame["heading_deg"], atol=0.01)
+
+
+def test_missing_samples_round_trip_as_nan():
+    frame = make_frame()
+    # a float32 battery column and a float64 position column, both delta coded
+    frame["temperature_degc"][:] = np.nan
+    frame["remaining_percent"][7] = np.nan
+    frame["latitude_deg"][[0, 5, 6]] = np.nan
+
+    for compression in (TelemetryCompression.NONE, TelemetryCompression.ZLIB):
+        decoded = decode_batch(encode_batch(frame, "drone1", compression=compression))
+
+        assert np.isnan(decoded.frame["temperature_degc"]).all()
+        remaining = decoded.frame["remaining_percent"]
+        assert np.flatnonzero(np.isnan(remaining)).tolist() == [7]
+        assert np.allclose(np.delete(remaining, 7), 85.0)
+        latitude = decoded.frame["latitude_deg"]
+        assert np.flatnonzero(np.isnan(latitude)).tolist() == [0, 5, 6]
+        assert np.allclose(latitude, frame["latitude_deg"], atol=1e-7, equal_nan=True)
+        assert np.allclose(decoded.frame["voltage_v"], frame["voltage_v"], atol=1e-3)
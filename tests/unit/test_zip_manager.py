@@ -0,0 +1,71 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from src.utils.zip_manager import RemoteZip
+
+
+def archive(**members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, (content, compression) in members.items():
+            zf.writestr(name, content, compress_type=compression)
+    return buffer.getvalue()
+
+
+class Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.reads = []
+
+    def __call__(self, start: int, end: int) -> bytes:
+        self.reads.append((start, end))
+        return self.data[start:end]
+
+
+def test_reads_stored_and_deflated_members():
+    other = os.urandom(300_000)
+    data = archive(
+        other=(other, zipfile.ZIP_STORED),
+        thing=(b"plan" * 1000, zipfile.ZIP_DEFLATED),
+    )
+    reader = Reader(data)
+    remote = RemoteZip(reader, len(data))
+
+    assert remote.names() == ["other", "thing"]
+    assert remote.read("thing") == b"plan" * 1000
+    assert remote.read("other") == other
+    # the end of the archive, which also holds "thing", then "other"
+    assert len(reader.reads) == 2
+    assert reader.reads[0][1] - reader.reads[0][0] < 70_000
+
+
+def test_uses_the_callers_tail():
+    data = archive(thing=(b"plan", zipfile.ZIP_DEFLATED))
+    reader = Reader(data)
+
+    assert RemoteZip(reader, len(data), tail=data).read("thing") == b"plan"
+    assert reader.reads == []
+
+
+def test_reads_zip64_members():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        with zf.open("thing", "w", force_zip64=True) as member:
+            member.write(b"plan")
+    data = buffer.getvalue()
+
+    assert RemoteZip(Reader(data), len(data)).read("thing") == b"plan"
+
+
+def test_rejects_corrupt_and_missing_members():
+    data = bytearray(archive(thing=(b"plan", zipfile.ZIP_STORED)))
+    data[data.index(b"plan")] = ord("x")
+    remote = RemoteZip(Reader(bytes(data)), len(data))
+
+    with pytest.raises(zipfile.BadZipFile):
+        remote.read("thing")
+    with pytest.raises(KeyError):
+        remote.read("other")